@@ -0,0 +1,249 @@
+"""Benchmark and verify the date normalization used by DateField.
+
+Each date string in the corpus is run through the cleaning and range parsing
+steps used when dates are inserted, first with the regex/dateutil parser that
+DateField previously used (reproduced below) and then with the compiled and
+memoized sfrCore.helpers.dateNormalizer functions. The outputs of the two are
+compared for every corpus string and for every four-digit year and year range
+form before the timings are reported.
+
+Usage: python benchmarks/dateBenchmark.py [--corpus FILE] [--records N]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from calendar import monthrange, IllegalMonthError
+from datetime import date
+
+from dateutil.parser import parse
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from sfrCore.helpers.dateNormalizer import (  # noqa: E402
+    normalizeDates,
+    parseDateRange,
+    cachedNormalizeDates,
+    cachedParseDateRange,
+    REPLACE_DASH
+)
+
+CORPUS = os.path.join(os.path.dirname(__file__), 'dateCorpus.txt')
+
+
+class LegacyDate():
+    """The previous DateField parsing methods, retained as a reference"""
+    def __init__(self, display_date):
+        self.display_date = display_date
+        self.date_range = None
+
+    @classmethod
+    def cleanDateData(cls, dateData):
+        dateData['date_range'] = dateData['date_range'].strip(' ©.')
+        dateData['display_date'] = dateData['display_date'].strip(' .[]')
+        bracketMatch = re.search(r'\[([\d\-\?u%~©]+)\]', dateData['date_range'])
+        if bracketMatch:
+            dateData['date_range'] = bracketMatch.group(1)
+        if re.search(r'(?:(?<=[0-9])[\?u%~X]+|\-(?![0-9]+)|^(?:c|ca.|c.|ca)(?=[0-9]))', dateData['date_range']):
+            try:
+                cls.parseUncertainty(dateData)
+            except KeyError:
+                pass
+
+    @classmethod
+    def parseUncertainty(cls, dateData):
+        rawDates = re.findall(r'((?:(?:c|ca.|c.|ca))(?=[0-9])|)(\d+)((?:[\?u%~X]*||(?:\-(?![0-9]+))))', dateData['date_range'])
+        if len(rawDates) == 1:
+            parsedDate = cls.setUncertainDates(rawDates[0])
+            dateData['date_range'] = '{}/{}'.format(
+                parsedDate['range']['start'],
+                parsedDate['range']['end']
+            )
+            dateData['display_date'] = parsedDate['display']
+        elif len(rawDates) == 2:
+            startParsedDate = cls.setUncertainDates(rawDates[0])
+            endParsedDate = cls.setUncertainDates(rawDates[1])
+            dateData['date_range'] = '{}/{}'.format(
+                startParsedDate['range']['start'],
+                endParsedDate['range']['end']
+            )
+            dateData['display_date'] = '{}/{}'.format(
+                startParsedDate['display'],
+                endParsedDate['display']
+            )
+
+    @classmethod
+    def setUncertainDates(cls, matchObj):
+        innerDate = {}
+        circaChar = matchObj[0]
+        dateStr = matchObj[1]
+        fuzzyChar = matchObj[2]
+        if len(dateStr) == 1:
+            innerDate['range'] = {
+                'start': '{}000'.format(dateStr),
+                'end': '{}999'.format(dateStr)
+            }
+            innerDate['display'] = '{}XXX'.format(dateStr)
+        if len(dateStr) == 2:
+            innerDate['range'] = {
+                'start': '{}00'.format(dateStr),
+                'end': '{}99'.format(dateStr)
+            }
+            innerDate['display'] = '{}XX'.format(dateStr)
+        elif len(dateStr) == 3:
+            innerDate['range'] = {
+                'start': '{}0'.format(dateStr),
+                'end': '{}9'.format(dateStr)
+            }
+            innerDate['display'] = '{}X'.format(dateStr)
+        elif len(dateStr) == 4:
+            dateInt = int(dateStr)
+            if fuzzyChar != '' or circaChar != '':
+                innerDate['range'] = {
+                    'start': str(dateInt - 1),
+                    'end': str(dateInt + 1)
+                }
+                innerDate['display'] = '{}?'.format(dateStr)
+            else:
+                innerDate['range'] = {
+                    'start': dateStr,
+                    'end': dateStr
+                }
+                innerDate['display'] = dateStr
+        return innerDate
+
+    def setDateRange(self, dateObj):
+        try:
+            if type(dateObj) is list:
+                startYear = parse(dateObj[0]).year
+                endYear = parse(dateObj[1]).year
+                self.date_range = '[{}, {})'.format(
+                    date(startYear, 1, 1),
+                    date(endYear, 12, 31)
+                )
+            elif re.match(r'^[0-9]{4}$', dateObj):
+                year = parse(dateObj).year
+                self.date_range = '[{}, {})'.format(
+                    date(year, 1, 1),
+                    date(year, 12, 31)
+                )
+            elif re.match(r'^[0-9]{4}(?:/|-)[0-9]{4}$', dateObj):
+                if '-' in dateObj:
+                    dateYears = dateObj.split('-')
+                    self.display_date = self.display_date.replace('-', '/')
+                else:
+                    dateYears = dateObj.split('/')
+                startYear = parse(dateYears[0]).year
+                endYear = parse(dateYears[1]).year
+                if endYear < startYear:
+                    raise ValueError
+                self.date_range = '[{}, {})'.format(
+                    date(startYear, 1, 1),
+                    date(endYear, 12, 31)
+                )
+            elif re.match(r'^[0-9]{4}-[0-9]{2}$', dateObj):
+                try:
+                    dateObj = parse(dateObj)
+                    year = dateObj.year
+                    month = dateObj.month
+                    lastDay = monthrange(year, month)[1]
+                    self.date_range = '[{}, {})'.format(
+                        date(year, month, 1),
+                        date(year, month, lastDay)
+                    )
+                except (IllegalMonthError, TypeError):
+                    secondYear = '{}{}'.format(dateObj[:2], dateObj[5:])
+                    self.display_date = '{}/{}'.format(dateObj[:4], secondYear)
+                    self.setDateRange(self.display_date)
+            else:
+                self.date_range = '[{},)'.format(
+                    str(parse(dateObj).date())
+                )
+        except ValueError:
+            self.date_range = None
+
+
+def legacyParse(dateStr):
+    dateData = {'display_date': dateStr, 'date_range': dateStr}
+    LegacyDate.cleanDateData(dateData)
+    dateRec = LegacyDate(dateData['display_date'])
+    dateRec.setDateRange(dateData['date_range'])
+    return dateRec.display_date, dateRec.date_range
+
+
+def normalizedParse(dateStr):
+    displayDate, dateRange = normalizeDates(dateStr, dateStr)
+    parsedRange, displayUpdate = parseDateRange(dateRange)
+    if displayUpdate is REPLACE_DASH:
+        displayDate = displayDate.replace('-', '/')
+    elif displayUpdate is not None:
+        displayDate = displayUpdate
+    return displayDate, parsedRange
+
+
+def verify(dateStrs):
+    mismatches = [
+        (dateStr, legacyParse(dateStr), normalizedParse(dateStr))
+        for dateStr in dateStrs
+        if legacyParse(dateStr) != normalizedParse(dateStr)
+    ]
+
+    for dateStr, legacy, normalized in mismatches:
+        print('MISMATCH {!r}: {} != {}'.format(dateStr, legacy, normalized))
+
+    return len(mismatches) == 0
+
+
+def timeParser(parser, dateStrs):
+    start = time.perf_counter()
+    for dateStr in dateStrs:
+        parser(dateStr)
+    return time.perf_counter() - start
+
+
+def main():
+    argParser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    argParser.add_argument('--corpus', default=CORPUS)
+    argParser.add_argument('--records', type=int, default=200000)
+    args = argParser.parse_args()
+
+    with open(args.corpus, encoding='utf-8') as corpusFile:
+        corpus = [line.rstrip('\n') for line in corpusFile if line.strip()]
+
+    years = ['{:04d}'.format(year) for year in range(10000)]
+    ranges = [
+        '{}{}{}'.format(start, sep, end)
+        for start in years[1800:2100:7] for end in years[1790:2100:11]
+        for sep in ['-', '/']
+    ]
+
+    if not verify(corpus + years + ranges):
+        sys.exit(1)
+    print('Verified {} date strings'.format(
+        len(corpus) + len(years) + len(ranges)
+    ))
+
+    # Weight the sample towards plain years, as in the HathiTrust data
+    weights = [10 if re.match(r'^[0-9]{4}$', d) else 1 for d in corpus]
+    sample = random.Random(0).choices(corpus, weights=weights, k=args.records)
+
+    cachedNormalizeDates.cache_clear()
+    cachedParseDateRange.cache_clear()
+
+    legacyTime = timeParser(legacyParse, sample)
+    normalizedTime = timeParser(normalizedParse, sample)
+
+    print('{} dates from {} distinct strings'.format(len(sample), len(corpus)))
+    print('legacy:     {:.3f}s ({:.2f}us/date)'.format(
+        legacyTime, legacyTime / len(sample) * 1e6
+    ))
+    print('normalized: {:.3f}s ({:.2f}us/date)'.format(
+        normalizedTime, normalizedTime / len(sample) * 1e6
+    ))
+    print('speedup:    {:.1f}x'.format(legacyTime / normalizedTime))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,6 +4,7 @@ from .model import (
     DateField,
     Edition,
     Identifier,
+    IndexHash,
     Instance,
     Item,
     Language,
@@ -15,6 +16,6 @@ from .model import (
     Work
 )
 
-from .lib import SessionManager
+from .lib import SessionManager, OutputWriter
 
 from .helpers import createLog, DBError, DataError
\ No newline at end of file
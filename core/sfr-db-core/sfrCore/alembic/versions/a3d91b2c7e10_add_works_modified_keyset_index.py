@@ -0,0 +1,25 @@
+"""Add works date_modified/id keyset index
+
+Revision ID: a3d91b2c7e10
+Revises: 5e16c177ecef
+Create Date: 2026-10-17 10:12:41.208135
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d91b2c7e10'
+down_revision = '5e16c177ecef'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        'work_modified_keyset', 'works', ['date_modified', 'id']
+    )
+
+
+def downgrade():
+    op.drop_index('work_modified_keyset', table_name='works')
@@ -0,0 +1,37 @@
+"""Add index hashes table
+
+Revision ID: b7f2c4e81d53
+Revises: a3d91b2c7e10
+Create Date: 2026-10-17 11:04:18.593720
+
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import JSON, UUID
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7f2c4e81d53'
+down_revision = 'a3d91b2c7e10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'index_hashes',
+        sa.Column('work_uuid', UUID(as_uuid=True), primary_key=True),
+        sa.Column('doc_hash', sa.String(64), nullable=False),
+        sa.Column('field_hashes', JSON, nullable=False),
+        sa.Column('date_created', sa.DateTime, default=datetime.now()),
+        sa.Column(
+            'date_modified',
+            sa.DateTime, default=datetime.now(), onupdate=datetime.now()
+        )
+    )
+
+
+def downgrade():
+    op.drop_table('index_hashes')
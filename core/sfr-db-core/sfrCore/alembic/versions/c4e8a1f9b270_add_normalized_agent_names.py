@@ -0,0 +1,46 @@
+"""Add normalized agent names
+
+Revision ID: c4e8a1f9b270
+Revises: b7f2c4e81d53
+Create Date: 2026-10-17 14:22:51.307482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4e8a1f9b270'
+down_revision = 'b7f2c4e81d53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.add_column('agents', sa.Column('name_normalized', sa.Unicode))
+    # Mirrors Agent.normalizeName
+    op.execute("""UPDATE agents SET name_normalized = trim(regexp_replace(
+        regexp_replace(lower(name), '[^[:alnum:][:space:]]', '', 'g'),
+        '\\s+', ' ', 'g'
+    ))""")
+    op.create_index(
+        'idx_name_normalized_trgm',
+        'agents',
+        ['name_normalized'],
+        postgresql_ops={'name_normalized': 'gin_trgm_ops'},
+        postgresql_using='gin'
+    )
+    op.execute('DROP INDEX IF EXISTS idx_name_trgm')
+
+
+def downgrade():
+    op.create_index(
+        'idx_name_trgm',
+        'agents',
+        ['name'],
+        postgresql_ops={'name': 'gin_trgm_ops'},
+        postgresql_using='gin'
+    )
+    op.drop_index('idx_name_normalized_trgm', table_name='agents')
+    op.drop_column('agents', 'name_normalized')
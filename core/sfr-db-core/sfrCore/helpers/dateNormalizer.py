@@ -0,0 +1,217 @@
+import os
+import re
+from calendar import monthrange, IllegalMonthError
+from datetime import date
+from functools import lru_cache
+
+from dateutil.parser import parse
+
+from .logger import createLog
+
+logger = createLog('dateNormalizer')
+
+CACHE_SIZE = int(os.environ.get('DATE_CACHE_SIZE', 10000))
+
+BRACKET_REGEX = re.compile(r'\[([\d\-\?u%~©]+)\]')
+UNCERTAIN_REGEX = re.compile(
+    r'(?:(?<=[0-9])[\?u%~X]+|\-(?![0-9]+)|^(?:c|ca.|c.|ca)(?=[0-9]))'
+)
+UNCERTAIN_PARTS_REGEX = re.compile(
+    r'((?:(?:c|ca.|c.|ca))(?=[0-9])|)(\d+)((?:[\?u%~X]*||(?:\-(?![0-9]+))))'
+)
+YEAR_REGEX = re.compile(r'^[0-9]{4}$')
+YEAR_RANGE_REGEX = re.compile(r'^[0-9]{4}(?:/|-)[0-9]{4}$')
+YEAR_MONTH_REGEX = re.compile(r'^[0-9]{4}-[0-9]{2}$')
+
+# Returned in place of a new display date where a hyphenated year range
+# should be displayed with a slash, as this depends on the current display
+REPLACE_DASH = object()
+
+
+def normalizeDates(displayDate, dateRange):
+    """Clean a display date and date range string, parsing uncertain dates
+    (e.g. 'c1885' or '18--?') into explicit ranges. Returns a tuple of the
+    cleaned (display_date, date_range) values."""
+    if isinstance(displayDate, str) and isinstance(dateRange, str):
+        return cachedNormalizeDates(displayDate, dateRange)
+
+    return _normalizeDates(displayDate, dateRange)
+
+
+def parseDateRange(dateObj):
+    """Parse a cleaned date string, or a list of start and end dates, into a
+    postgres daterange string. Returns a tuple of this range, or None if it
+    could not be parsed, and any change to be made to the display date (a new
+    value, REPLACE_DASH or None)."""
+    if isinstance(dateObj, list):
+        return _parseDateBounds(dateObj)
+
+    # Partial dates are completed with the current date by dateutil, so this
+    # is included to keep cached values consistent with the parser
+    return cachedParseDateRange(dateObj, date.today())
+
+
+def parseUncertainty(dateRange):
+    """Return a tuple of the (display_date, date_range) described by an
+    uncertain date, or None if it contains no dates. Raises a KeyError if an
+    uncertain date cannot be parsed."""
+    rawDates = UNCERTAIN_PARTS_REGEX.findall(dateRange)
+    if len(rawDates) == 1:
+        parsedDate = setUncertainDates(rawDates[0])
+        return (
+            parsedDate['display'],
+            '{}/{}'.format(
+                parsedDate['range']['start'],
+                parsedDate['range']['end']
+            )
+        )
+    elif len(rawDates) == 2:
+        startParsedDate = setUncertainDates(rawDates[0])
+        endParsedDate = setUncertainDates(rawDates[1])
+        return (
+            '{}/{}'.format(
+                startParsedDate['display'],
+                endParsedDate['display']
+            ),
+            '{}/{}'.format(
+                startParsedDate['range']['start'],
+                endParsedDate['range']['end']
+            )
+        )
+
+    return None
+
+
+def setUncertainDates(matchObj):
+    innerDate = {}
+    circaChar = matchObj[0]
+    dateStr = matchObj[1]
+    fuzzyChar = matchObj[2]
+    if len(dateStr) == 1:
+        innerDate['range'] = {
+            'start': '{}000'.format(dateStr),
+            'end': '{}999'.format(dateStr)
+        }
+        innerDate['display'] = '{}XXX'.format(dateStr)
+    if len(dateStr) == 2:
+        innerDate['range'] = {
+            'start': '{}00'.format(dateStr),
+            'end': '{}99'.format(dateStr)
+        }
+        innerDate['display'] = '{}XX'.format(dateStr)
+    elif len(dateStr) == 3:
+        innerDate['range'] = {
+            'start': '{}0'.format(dateStr),
+            'end': '{}9'.format(dateStr)
+        }
+        innerDate['display'] = '{}X'.format(dateStr)
+    elif len(dateStr) == 4:
+        dateInt = int(dateStr)
+        if fuzzyChar != '' or circaChar != '':
+            innerDate['range'] = {
+                'start': str(dateInt - 1),
+                'end': str(dateInt + 1)
+            }
+            innerDate['display'] = '{}?'.format(dateStr)
+        else:
+            innerDate['range'] = {
+                'start': dateStr,
+                'end': dateStr
+            }
+            innerDate['display'] = dateStr
+    return innerDate
+
+
+def _normalizeDates(displayDate, dateRange):
+    dateRange = dateRange.strip(' ©.')
+    displayDate = displayDate.strip(' .[]')
+    bracketMatch = BRACKET_REGEX.search(dateRange)
+    if bracketMatch:
+        dateRange = bracketMatch.group(1)
+    if UNCERTAIN_REGEX.search(dateRange):
+        try:
+            uncertain = parseUncertainty(dateRange)
+            if uncertain is not None:
+                displayDate, dateRange = uncertain
+        except KeyError:
+            logger.error('Unable to parse uncertain date {}'.format(
+                dateRange
+            ))
+
+    return displayDate, dateRange
+
+
+cachedNormalizeDates = lru_cache(maxsize=CACHE_SIZE)(_normalizeDates)
+
+
+def _parseDateBounds(dateObj):
+    logger.debug('Received start/end dates, treat as bounds')
+    try:
+        startYear = parse(dateObj[0]).year
+        endYear = parse(dateObj[1]).year
+        return _formatYearRange(startYear, endYear), None
+    except ValueError:
+        logger.error('Could not parse date string {}'.format(dateObj))
+        return None, None
+
+
+def _parseDateRange(dateObj, today):
+    displayUpdate = None
+    try:
+        if YEAR_REGEX.match(dateObj):
+            logger.debug('Received year value, parsing into full year')
+            year = _parseYear(dateObj)
+            return _formatYearRange(year, year), displayUpdate
+        elif YEAR_RANGE_REGEX.match(dateObj):
+            if '-' in dateObj:
+                dateYears = dateObj.split('-')
+                displayUpdate = REPLACE_DASH
+            else:
+                dateYears = dateObj.split('/')
+            startYear = _parseYear(dateYears[0])
+            endYear = _parseYear(dateYears[1])
+            if endYear < startYear:
+                raise ValueError
+            return _formatYearRange(startYear, endYear), displayUpdate
+        elif YEAR_MONTH_REGEX.match(dateObj):
+            logger.debug('Received year-month, parsing into month range')
+            try:
+                parsedDate = parse(dateObj)
+                year = parsedDate.year
+                month = parsedDate.month
+                lastDay = monthrange(year, month)[1]  # Accounts for leap years
+                return '[{}, {})'.format(
+                    date(year, month, 1),
+                    date(year, month, lastDay)
+                ), displayUpdate
+            except (IllegalMonthError, TypeError):
+                logger.debug('Year-month is actually year-2 dig year')
+                secondYear = '{}{}'.format(dateObj[:2], dateObj[5:])
+                displayUpdate = '{}/{}'.format(dateObj[:4], secondYear)
+                return (
+                    _parseDateRange(displayUpdate, today)[0],
+                    displayUpdate
+                )
+        else:
+            logger.debug('Received other value, treating as single date')
+            return '[{},)'.format(str(parse(dateObj).date())), displayUpdate
+    except ValueError:
+        logger.error('Could not parse date string {}'.format(dateObj))
+        logger.debug('Returning None for date_range, date unsearchable')
+        return None, displayUpdate
+
+
+cachedParseDateRange = lru_cache(maxsize=CACHE_SIZE)(_parseDateRange)
+
+
+def _parseYear(yearStr):
+    # dateutil reads years below 100 as two-digit years in the current
+    # century, so only the remaining years can be converted directly
+    if yearStr[:2] == '00':
+        return parse(yearStr).year
+
+    return int(yearStr)
+
+
+def _formatYearRange(startYear, endYear):
+    return '[{}, {})'.format(date(startYear, 1, 1), date(endYear, 12, 31))
@@ -1 +1,2 @@
-from .sessionManager import SessionManager
\ No newline at end of file
+from .sessionManager import SessionManager
+from .outputWriter import OutputWriter
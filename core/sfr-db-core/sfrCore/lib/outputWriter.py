@@ -0,0 +1,262 @@
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from ..helpers import createLog
+
+logger = createLog('outputWriter')
+
+
+class OutputWriter():
+    """Writes batches of records to Kinesis streams and SQS queues. Records
+    are grouped into chunks that fit within the count and size limits of the
+    put_records and send_message_batch APIs, and these chunks are submitted
+    concurrently. Entries that are reported as failed in a response are
+    retried on their own with an exponential backoff, until they succeed or
+    the retry limit is reached. Errors raised for an entire request are
+    retried by the client itself and are passed through.
+
+    Counts of the records sent, failed and retried are kept for each stream
+    and queue in the metrics attribute.
+
+    Configured with the following (optional) environment variables:
+    OUTPUT_RETRIES -- number of times failed entries are retried (5)
+    OUTPUT_BACKOFF -- initial retry wait in seconds, doubled each retry (0.1)
+    OUTPUT_WORKERS -- number of chunks submitted concurrently (4)
+    """
+    KINESIS_MAX_RECORDS = 500
+    KINESIS_MAX_BYTES = 5242880
+    KINESIS_MAX_RECORD_BYTES = 1048576
+    SQS_MAX_MESSAGES = 10
+    SQS_MAX_BYTES = 262144
+    MAX_BACKOFF = 10
+
+    def __init__(self, kinesisClient=None, sqsClient=None):
+        self.kinesisClient = kinesisClient
+        self.sqsClient = sqsClient
+
+        self.maxRetries = int(os.environ.get('OUTPUT_RETRIES', 5))
+        self.backoff = float(os.environ.get('OUTPUT_BACKOFF', 0.1))
+        self.workers = int(os.environ.get('OUTPUT_WORKERS', 4))
+
+        self.metrics = defaultdict(lambda: {
+            'records': 0,
+            'sent': 0,
+            'failed': 0,
+            'retried': 0,
+            'requests': 0
+        })
+
+    def putRecords(self, stream, records):
+        """Write a list of Kinesis records, each a dict with Data and
+        PartitionKey values, to a stream. Returns a list of the records that
+        could not be written.
+        """
+        records, oversized = OutputWriter.splitOversized(
+            records,
+            OutputWriter.KINESIS_MAX_RECORD_BYTES,
+            OutputWriter.recordSize
+        )
+
+        chunks = OutputWriter.chunkEntries(
+            records,
+            OutputWriter.KINESIS_MAX_RECORDS,
+            OutputWriter.KINESIS_MAX_BYTES,
+            OutputWriter.recordSize
+        )
+
+        return self.submitChunks(stream, chunks, self.sendRecords, oversized)
+
+    def sendMessages(self, queue, messages):
+        """Send a list of message bodies to an SQS queue. Returns a list of
+        the messages that could not be sent.
+        """
+        messages, oversized = OutputWriter.splitOversized(
+            messages,
+            OutputWriter.SQS_MAX_BYTES,
+            OutputWriter.messageSize
+        )
+
+        chunks = OutputWriter.chunkEntries(
+            messages,
+            OutputWriter.SQS_MAX_MESSAGES,
+            OutputWriter.SQS_MAX_BYTES,
+            OutputWriter.messageSize
+        )
+
+        return self.submitChunks(
+            queue, chunks, self.sendMessageBatch, oversized
+        )
+
+    def submitChunks(self, target, chunks, sendFunc, failed):
+        """Send each chunk with the provided function, concurrently if there
+        is more than one, and total the results for the target.
+        """
+        if len(chunks) > 1 and self.workers > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(self.workers, len(chunks))
+            ) as executor:
+                results = list(executor.map(
+                    lambda chunk: sendFunc(target, chunk), chunks
+                ))
+        else:
+            results = [sendFunc(target, chunk) for chunk in chunks]
+
+        metrics = self.metrics[target]
+        metrics['failed'] += len(failed)
+        metrics['records'] += len(failed)
+        for chunk, (chunkFailed, requests, retried) in zip(chunks, results):
+            failed.extend(chunkFailed)
+            metrics['records'] += len(chunk)
+            metrics['sent'] += len(chunk) - len(chunkFailed)
+            metrics['failed'] += len(chunkFailed)
+            metrics['requests'] += requests
+            metrics['retried'] += retried
+
+        logger.info(
+            'Wrote {sent}/{records} entries to {target} in {requests} '
+            'requests ({retried} retried, {failed} failed)'.format(
+                target=target, **metrics
+            )
+        )
+
+        return failed
+
+    def sendRecords(self, stream, chunk):
+        def putChunk(pending):
+            resp = self.kinesisClient.put_records(
+                Records=pending,
+                StreamName=stream
+            )
+
+            if not resp.get('FailedRecordCount', 0):
+                return [], []
+
+            # Records fail individually when throttled or on internal errors,
+            # both of which can be retried
+            return [
+                record for record, result in zip(pending, resp['Records'])
+                if 'ErrorCode' in result
+            ], []
+
+        return self.retryChunk(stream, chunk, putChunk)
+
+    def sendMessageBatch(self, queue, chunk):
+        def sendChunk(pending):
+            entries = {str(i): message for i, message in enumerate(pending)}
+            resp = self.sqsClient.send_message_batch(
+                QueueUrl=queue,
+                Entries=[
+                    {'MessageBody': message, 'Id': entryID}
+                    for entryID, message in entries.items()
+                ]
+            )
+
+            failed = []
+            rejected = []
+            for failure in resp.get('Failed', []):
+                # Messages rejected as invalid will fail again if retried
+                if failure.get('SenderFault', False):
+                    logger.error('Message rejected by {}: {}'.format(
+                        queue, failure.get('Message', failure.get('Code'))
+                    ))
+                    rejected.append(entries[failure['Id']])
+                else:
+                    failed.append(entries[failure['Id']])
+
+            return failed, rejected
+
+        return self.retryChunk(queue, chunk, sendChunk)
+
+    def retryChunk(self, target, chunk, sendFunc):
+        """Send a chunk, resending any entries that failed until none remain
+        or the retry limit is reached. The send function returns lists of the
+        entries that failed and of those rejected outright, which are not
+        retried. Returns a tuple of the entries that could not be written, the
+        number of requests made and the number of entries retried.
+        """
+        pending = chunk
+        rejected = []
+        requests = 0
+        retried = 0
+
+        for attempt in range(self.maxRetries + 1):
+            if attempt:
+                logger.info('Retrying {} entries for {}'.format(
+                    len(pending), target
+                ))
+                retried += len(pending)
+                time.sleep(min(
+                    OutputWriter.MAX_BACKOFF,
+                    self.backoff * 2 ** (attempt - 1)
+                ))
+
+            requests += 1
+            pending, chunkRejected = sendFunc(pending)
+            rejected.extend(chunkRejected)
+
+            if not pending:
+                break
+        else:
+            logger.error('Failed to write {} entries to {}'.format(
+                len(pending), target
+            ))
+
+        return pending + rejected, requests, retried
+
+    @staticmethod
+    def chunkEntries(entries, maxCount, maxBytes, sizeFunc):
+        chunks = []
+        chunk = []
+        chunkSize = 0
+
+        for entry in entries:
+            entrySize = sizeFunc(entry)
+            if chunk and (
+                chunkSize + entrySize > maxBytes or len(chunk) >= maxCount
+            ):
+                chunks.append(chunk)
+                chunk = []
+                chunkSize = 0
+
+            chunk.append(entry)
+            chunkSize += entrySize
+
+        if chunk:
+            chunks.append(chunk)
+
+        return chunks
+
+    @staticmethod
+    def splitOversized(entries, maxBytes, sizeFunc):
+        valid = []
+        oversized = []
+        for entry in entries:
+            if sizeFunc(entry) > maxBytes:
+                logger.error('Entry of {} bytes exceeds limit of {}'.format(
+                    sizeFunc(entry), maxBytes
+                ))
+                oversized.append(entry)
+            else:
+                valid.append(entry)
+
+        return valid, oversized
+
+    @staticmethod
+    def recordSize(record):
+        return (
+            OutputWriter.byteLength(record['Data'])
+            + OutputWriter.byteLength(record['PartitionKey'])
+        )
+
+    @staticmethod
+    def messageSize(message):
+        return OutputWriter.byteLength(message)
+
+    @staticmethod
+    def byteLength(value):
+        if isinstance(value, bytes):
+            return len(value)
+
+        return len(str(value).encode('utf-8'))
@@ -3,27 +3,59 @@ from binascii import Error as base64Error
 import boto3
 from botocore.exceptions import ClientError
 import os
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from ..model.core import Base
+from ..model.agent import Agent
 from ..helpers import createLog
 
 
 class SessionManager():
-    def __init__(self, user=None, pswd=None, host=None, port=None, db=None):
+    """Manages the engine and sessions used to connect to the SFR database.
+
+    By default the engine is disposed of when the connection is closed. If
+    persistent is set (or the DB_PERSISTENT_POOL environment variable is
+    "true") a small connection pool is kept open instead, to be reused by
+    later invocations of a warm Lambda container. Connections in this pool
+    are checked with a ping before use and replaced after DB_POOL_RECYCLE
+    seconds (default 300). The pool holds DB_POOL_SIZE connections (default
+    1), with up to DB_POOL_OVERFLOW (default 2) opened as needed.
+
+    The DB_STATEMENT_TIMEOUT (default 30s) and DB_LOCK_TIMEOUT (default 15s)
+    settings are applied to every new connection.
+    """
+    def __init__(
+        self, user=None, pswd=None, host=None, port=None, db=None,
+        persistent=None
+    ):
         self.user = user if user else SessionManager.decryptEnvVar('DB_USER')
         self.pswd = pswd if pswd else SessionManager.decryptEnvVar('DB_PSWD')
         self.host = host if host else SessionManager.decryptEnvVar('DB_HOST')
         self.port = port if port else SessionManager.decryptEnvVar('DB_PORT')
         self.db = db if db else SessionManager.decryptEnvVar('DB_NAME')
 
+        if persistent is None:
+            persistent = os.environ.get(
+                'DB_PERSISTENT_POOL', 'false'
+            ).lower() == 'true'
+        self.persistent = persistent
+
         self.engine = None
         self.session = None
 
         self.logger = createLog('dbManager')
 
     def generateEngine(self):
+        poolArgs = {}
+        if self.persistent:
+            poolArgs = {
+                'pool_size': int(os.environ.get('DB_POOL_SIZE', 1)),
+                'max_overflow': int(os.environ.get('DB_POOL_OVERFLOW', 2)),
+                'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 300)),
+                'pool_pre_ping': True
+            }
+
         try:
             self.engine = create_engine(
                 'postgresql://{}:{}@{}:{}/{}'.format(
@@ -32,15 +64,30 @@ class SessionManager():
                     self.host,
                     self.port,
                     self.db
-                )
+                ),
+                **poolArgs
             )
-            self.engine.execute(text(
-                'SET statement_timeout TO \'30s\'; SET lock_timeout TO\'15s\';'
-            ))
+            event.listen(self.engine, 'connect', SessionManager.setTimeouts)
         except Exception as e:
             self.logger.error(e)
             raise e
 
+    @staticmethod
+    def setTimeouts(dbapiConn, connRecord):
+        """Apply the statement and lock timeouts when a connection is opened,
+        committing them so that they persist for the life of the connection.
+        """
+        cursor = dbapiConn.cursor()
+        cursor.execute(
+            'SET statement_timeout TO %s; SET lock_timeout TO %s;',
+            (
+                os.environ.get('DB_STATEMENT_TIMEOUT', '30s'),
+                os.environ.get('DB_LOCK_TIMEOUT', '15s')
+            )
+        )
+        cursor.close()
+        dbapiConn.commit()
+
     def initializeDatabase(self):
         if not self.engine.dialect.has_table(self.engine, 'works'):
             Base.metadata.create_all(self.engine)
@@ -63,7 +110,9 @@ class SessionManager():
     def closeConnection(self):
         self.commitChanges()
         self.session.close()
-        self.engine.dispose()
+        if not self.persistent:
+            self.engine.dispose()
+        Agent.CACHE.endInvocation()
 
     @staticmethod
     def decryptEnvVar(envVar):
@@ -11,4 +11,5 @@ from .language import Language
 from .link import Link
 from .measurement import Measurement
 from .rawData import RawData
-from .rights import Rights
\ No newline at end of file
+from .rights import Rights
+from .indexHash import IndexHash
\ No newline at end of file
@@ -1,4 +1,6 @@
+from collections import OrderedDict
 import copy
+import os
 import re
 import requests
 from sqlalchemy import (
@@ -8,9 +10,11 @@ from sqlalchemy import (
     String,
     Unicode,
     or_,
+    text,
     Index
 )
-from sqlalchemy.orm import relationship, validates
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session, relationship, validates
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
 from .core import Base, Core
@@ -22,6 +26,88 @@ from ..helpers import createLog, DataError
 logger = createLog('agentModel')
 
 
+class AgentCache():
+    """A bounded map of agent authority identifiers (VIAF and LCNAF) and
+    normalized names to the ids of the agent records they were matched to.
+    Agents recur frequently within and across batches of records, and this
+    allows the authority and pg_trgm lookups to be skipped for agents that
+    have already been resolved. Once the cache reaches its size limit the
+    least recently used entries are evicted.
+
+    By default the cache is cleared at the end of each invocation. If the
+    AGENT_CACHE_PERSIST environment variable is set to true entries are
+    retained for as long as the container remains warm. The maximum number of
+    entries can be set with AGENT_CACHE_SIZE (10000)."""
+
+    NO_MATCH = False
+
+    def __init__(self, maxSize=None, persist=None):
+        self.maxSize = maxSize if maxSize is not None else int(
+            os.environ.get('AGENT_CACHE_SIZE', 10000)
+        )
+        self.persist = persist if persist is not None else os.environ.get(
+            'AGENT_CACHE_PERSIST', 'false'
+        ).lower() == 'true'
+        self.entries = OrderedDict()
+
+    @staticmethod
+    def authorityKeys(agent):
+        return [
+            (authority, str(getattr(agent, authority)))
+            for authority in ['viaf', 'lcnaf']
+            if getattr(agent, authority, None)
+        ]
+
+    @staticmethod
+    def nameKeys(agent):
+        name = getattr(agent, 'name', None)
+        if not name:
+            return []
+
+        return [('name', Agent.normalizeName(name))]
+
+    def get(self, keys):
+        """Return the agent id stored for the first matching key. Names that
+        are known not to match any agent are stored as NO_MATCH."""
+        for key in keys:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+
+        return None
+
+    def contains(self, key):
+        return key in self.entries
+
+    def set(self, keys, agentID):
+        for key in keys:
+            self.entries[key] = agentID
+            self.entries.move_to_end(key)
+
+        while len(self.entries) > self.maxSize:
+            self.entries.popitem(last=False)
+
+    def invalidate(self, keys):
+        for key in keys:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        self.entries.clear()
+
+    def endInvocation(self):
+        """Clear the cache, or only entries recording names without a match
+        if it persists between invocations, as other processes may since
+        have created matching agents"""
+        if not self.persist:
+            self.clear()
+            return
+
+        for key in [
+            k for k, v in self.entries.items() if v is AgentCache.NO_MATCH
+        ]:
+            del self.entries[key]
+
+
 class Agent(Core, Base):
     """An agent records an individual, organization, or family that is
     associated with the production of a FRBR entity (work, instance or item).
@@ -36,6 +122,7 @@ class Agent(Core, Base):
     __tablename__ = 'agents'
     id = Column(Integer, primary_key=True)
     name = Column(Unicode, index=True)
+    name_normalized = Column(Unicode)
     sort_name = Column(Unicode)
     lcnaf = Column(String(25), index=True)
     viaf = Column(String(25), index=True)
@@ -43,9 +130,9 @@ class Agent(Core, Base):
 
     __table_args__ = (
         Index(
-            'idx_name_trgm',
-            'name',
-            postgresql_ops={'name': 'gin_trgm_ops'},
+            'idx_name_normalized_trgm',
+            'name_normalized',
+            postgresql_ops={'name_normalized': 'gin_trgm_ops'},
             postgresql_using='gin'
         ),
     )
@@ -62,6 +149,23 @@ class Agent(Core, Base):
         collection_class=set
     )
 
+    @validates('name')
+    def setNormalizedName(self, key, name):
+        """Maintains the normalized form of the name used for matching"""
+        self.name_normalized = Agent.normalizeName(name)
+        return name
+
+    @staticmethod
+    def normalizeName(name):
+        """Lowercase a name and remove punctuation and excess whitespace. This
+        should be kept consistent with the backfill in migration c4e8a1f9b270
+        """
+        if not isinstance(name, str):
+            return None
+
+        cleanName = re.sub(r'[^\w\s]|_', '', name.lower())
+        return re.sub(r'\s+', ' ', cleanName).strip()
+
     @validates('sort_name')
     def convertSortLower(self, key, name):
         """Ensures that all sort_name values are stored as lowercase strings
@@ -119,8 +223,24 @@ class Agent(Core, Base):
         agentRec, roles = Agent.createAgent(session, copy.deepcopy(agentData))
         existingAgentID = agentRec.lookup()
 
+        existingAgent = None
         if existingAgentID is not None:
             existingAgent = session.query(cls).get(existingAgentID)
+
+        if existingAgentID is not None and existingAgent is None:
+            # A cached agent may have been removed by a rolled back transaction
+            logger.debug('Cached agent {} not found, retrying lookup'.format(
+                existingAgentID
+            ))
+            Agent.CACHE.invalidate(
+                AgentCache.authorityKeys(agentRec)
+                + AgentCache.nameKeys(agentRec)
+            )
+            existingAgentID = agentRec.lookup()
+            if existingAgentID is not None:
+                existingAgent = session.query(cls).get(existingAgentID)
+
+        if existingAgent is not None:
             updateRoles = existingAgent.update(session, agentData)
             return existingAgent, list(set(roles) | set(updateRoles))
 
@@ -172,19 +292,24 @@ class Agent(Core, Base):
             self.tmp_link = [self.tmp_link]
 
         if type(self.tmp_link) is list:
+            existingLinks = Link.mapLinks(self.links)
             for linkItem in self.tmp_link:
                 self.links.add(
                     Link.updateOrInsert(
                         session,
                         linkItem,
                         Agent,
-                        self.id
+                        self.id,
+                        existing=existingLinks
                     )
                 )
 
+        existingDates = DateField.mapDates(self.dates)
         for date in self.tmp_dates:
             self.dates.add(
-                DateField.updateOrInsert(session, date, Agent, self.id)
+                DateField.updateOrInsert(
+                    session, date, Agent, self.id, existing=existingDates
+                )
             )
 
         roles = self.tmp_roles
@@ -239,12 +364,15 @@ class Agent(Core, Base):
 
         agentID = None
         if self.viaf is not None or self.lcnaf is not None:
-            agentID = self.authorityQuery()
+            authKeys = AgentCache.authorityKeys(self)
+            agentID = Agent.CACHE.get(authKeys)
+            if agentID is None:
+                agentID = self.authorityQuery()
+                if agentID is not None:
+                    Agent.CACHE.set(authKeys, agentID)
 
         if agentID is None:
-            agentRec = self.findTrgmQuery()
-            if agentRec:
-                agentID = agentRec['id']
+            agentID = self.findTrgmQuery()
 
         return agentID
 
@@ -257,24 +385,77 @@ class Agent(Core, Base):
             })
 
     def findTrgmQuery(self):
-        logger.debug('Matching agent based off pg_trgm score')
+        """Return the id of the agent whose name most closely matches that of
+        the current record, if any, using previously resolved names where
+        available"""
+        nameKey = AgentCache.nameKeys(self)
+        if len(nameKey) < 1:
+            return None
 
-        escapedName = self.name.replace('\'', '\'\'')
-        trgmQ = """SELECT id, similarity(name, :name) AS score
-        FROM agents
-        WHERE name % :name
-        ORDER BY score DESC;
-        """
-        results = self.session.execute(trgmQ, {'name': escapedName})
+        if not Agent.CACHE.contains(nameKey[0]):
+            Agent.matchNames(self.session, [nameKey[0][1]])
 
-        if results.rowcount <= 1:
-            return results.first()
+        return Agent.CACHE.get(nameKey) or None
 
-        logger.info(
-            'Name/information is too generic to create individual record'
+    @classmethod
+    def prefetchMatches(cls, session, agents):
+        """Resolve the names of a set of agent dicts in a single query, storing
+        the results in the agent cache for subsequent lookups"""
+        names = set()
+        for agent in agents:
+            if not isinstance(agent, dict) or not agent.get('name'):
+                continue
+
+            tmpAgent = Agent()
+            tmpAgent.name = agent['name']
+            tmpAgent.tmp_dates = []
+            tmpAgent.tmp_roles = []
+            tmpAgent.cleanName()
+            names.add(tmpAgent.name_normalized)
+
+        cls.matchNames(session, [
+            n for n in names if n and not cls.CACHE.contains(('name', n))
+        ])
+
+    @classmethod
+    def matchNames(cls, session, names):
+        """Find the closest matching agent for each of a list of normalized
+        names with a single lateral join query. Names are matched against the
+        trigram index of normalized agent names, and matches must meet the
+        AGENT_MATCH_THRESHOLD similarity score (0.6). The best match, or
+        NO_MATCH, is stored in the agent cache for each name."""
+        if len(names) < 1:
+            return
+
+        logger.debug('Matching {} agents based off pg_trgm score'.format(
+            len(names)
+        ))
+        session.execute(
+            text(
+                "SELECT set_config('pg_trgm.similarity_threshold', :threshold, true)"  # noqa: E501
+            ),
+            {'threshold': os.environ.get('AGENT_MATCH_THRESHOLD', '0.6')}
+        )
+        matches = session.execute(
+            text("""SELECT input.name, best.id
+            FROM unnest(CAST(:names AS text[])) AS input(name)
+            LEFT JOIN LATERAL (
+                SELECT agents.id,
+                    similarity(agents.name_normalized, input.name) AS score
+                FROM agents
+                WHERE agents.name_normalized % input.name
+                ORDER BY score DESC, agents.id
+                LIMIT 1
+            ) AS best ON true
+            """),
+            {'names': list(names)}
         )
 
-        return None
+        for name, agentID in matches:
+            cls.CACHE.set(
+                [('name', name)],
+                agentID if agentID is not None else AgentCache.NO_MATCH
+            )
 
     def authorityQuery(self):
         logger.debug('Matching agent on VIAF/LCNAF')
@@ -351,6 +532,25 @@ class Agent(Core, Base):
         self.sort_name = self.name
 
 
+Agent.CACHE = AgentCache()
+
+
+@listens_for(Agent, 'after_insert')
+def cacheNewAgent(mapper, connection, target):
+    """Point any cached entries for the authorities and name of a newly
+    inserted agent at the new record"""
+    Agent.CACHE.set(
+        AgentCache.authorityKeys(target) + AgentCache.nameKeys(target),
+        target.id
+    )
+
+
+@listens_for(Session, 'after_rollback')
+def clearAgentCache(session):
+    """Cached agents may have been created in a rolled back transaction"""
+    Agent.CACHE.clear()
+
+
 class Alias(Core, Base):
     """Alternate, or variant names for an agent."""
     __tablename__ = 'aliases'
@@ -1,8 +1,10 @@
+from collections import OrderedDict
 import unicodedata
 
 from sqlalchemy import Column, DateTime, Unicode
 from sqlalchemy.event import listens_for
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import make_transient_to_detached
 from datetime import datetime
 
 from ..helpers import createLog
@@ -55,3 +57,81 @@ class Core(object):
         default=datetime.utcnow(),
         onupdate=datetime.utcnow()
     )
+
+
+class ReferenceCache():
+    """A map of the natural keys of rows in small, frequently referenced
+    tables (such as languages and subjects) to their column values. Cached
+    rows are rebuilt and merged into the requesting session without being
+    loaded from the database, and entries are retained for as long as the
+    container remains warm. Records created in the current session are
+    returned directly and registered once they have been flushed. If a
+    maximum size is set the least recently used entries are evicted."""
+
+    def __init__(self, model, columns, keyFunc, maxSize=None):
+        self.model = model
+        self.columns = columns
+        self.keyFunc = keyFunc
+        self.maxSize = maxSize
+        self.entries = OrderedDict()
+        self.loaded = False
+        self.session = None
+        self.records = {}
+
+    def preload(self, session):
+        """Load all rows of the table into the cache, once per container"""
+        if self.loaded:
+            return
+
+        for record in session.query(self.model).all():
+            self.add(session, record)
+
+        self.loaded = True
+
+    def get(self, session, key):
+        """Return the record for a key, attached to the provided session, or
+        None if it has not been cached"""
+        records = self.getSessionRecords(session)
+        if key in records:
+            return records[key]
+
+        if key not in self.entries:
+            return None
+
+        self.entries.move_to_end(key)
+        record = self.model(**self.entries[key])
+        make_transient_to_detached(record)
+        records[key] = session.merge(record, load=False)
+
+        return records[key]
+
+    def add(self, session, record):
+        """Add a record that has been loaded or created in the provided
+        session"""
+        self.getSessionRecords(session)[self.keyFunc(record)] = record
+        if record.id is not None:
+            self.register(record)
+
+    def register(self, record):
+        key = self.keyFunc(record)
+        self.entries[key] = {
+            column: getattr(record, column) for column in self.columns
+        }
+        self.entries.move_to_end(key)
+
+        if self.maxSize is not None:
+            while len(self.entries) > self.maxSize:
+                self.entries.popitem(last=False)
+
+    def getSessionRecords(self, session):
+        if session is not self.session:
+            self.session = session
+            self.records = {}
+
+        return self.records
+
+    def clear(self):
+        self.entries.clear()
+        self.loaded = False
+        self.session = None
+        self.records = {}
@@ -1,7 +1,4 @@
-import re
-from dateutil.parser import parse
-from datetime import date
-from calendar import monthrange, IllegalMonthError
+from collections import defaultdict
 from sqlalchemy import (
     Table,
     Column,
@@ -16,6 +13,13 @@ from sqlalchemy.orm.exc import MultipleResultsFound
 from .core import Base, Core
 
 from ..helpers import createLog
+from ..helpers.dateNormalizer import (
+    normalizeDates,
+    parseDateRange,
+    parseUncertainty,
+    setUncertainDates,
+    REPLACE_DASH
+)
 
 logger = createLog('dateModel')
 
@@ -102,22 +106,34 @@ class DateField(Core, Base):
         return '<Date(date={})>'.format(self.display_date)
 
     @classmethod
-    def updateOrInsert(cls, session, dateInst, model, recordID):
+    def updateOrInsert(cls, session, dateInst, model, recordID, existing=None):
         logger.debug('Inserting or updating date {}'.format(
             dateInst['display_date'])
         )
         """Query the database for a date on the current record. If found,
-        update the existing date, if not, insert new row"""
-        try:
-            outDate = DateField.lookupDate(session, dateInst, model, recordID)
-        except MultipleResultsFound:
-            outDate = DateField.mergeDates(session, dateInst, model, recordID)
+        update the existing date, if not, insert new row. If a map of the
+        record's existing dates (see mapDates) is provided it is used in place
+        of the database query and any new date is added to it"""
+        if existing is None:
+            try:
+                outDate = DateField.lookupDate(
+                    session, dateInst, model, recordID
+                )
+            except MultipleResultsFound:
+                outDate = DateField.mergeDates(
+                    session, dateInst, model, recordID
+                )
+        else:
+            outDate = DateField.findDate(session, existing, dateInst)
+
         if outDate:
             logger.info('Updating existing date record {}'.format(outDate.id))
             outDate.update(dateInst)
         else:
             logger.info('Inserting new date object')
             outDate = DateField.insert(dateInst)
+            if existing is not None:
+                existing[outDate.date_type] = [outDate]
 
         return outDate
 
@@ -129,6 +145,12 @@ class DateField(Core, Base):
             .filter(cls.date_type == dateInst['date_type'])\
             .all()
 
+        return DateField.collapseDates(session, dupeDates)
+
+    @staticmethod
+    def collapseDates(session, dupeDates):
+        """Merge a set of dates of the same type into the oldest, preserving
+        the most recently set date range, and delete the others"""
         dupeDates.sort(key=lambda d: d.date_modified)
 
         for i in range(1, len(dupeDates)):
@@ -139,6 +161,28 @@ class DateField(Core, Base):
 
         return dupeDates[0]
 
+    @staticmethod
+    def mapDates(dates):
+        """Return a dict of lists of a record's existing dates, keyed by their
+        date_type"""
+        dateMap = defaultdict(list)
+        for dateRec in dates:
+            dateMap[dateRec.date_type].append(dateRec)
+
+        return dateMap
+
+    @staticmethod
+    def findDate(session, existing, dateInst):
+        matches = existing.get(dateInst['date_type'])
+        if not matches:
+            return None
+        elif len(matches) > 1:
+            existing[dateInst['date_type']] = [
+                DateField.collapseDates(session, matches)
+            ]
+
+        return existing[dateInst['date_type']][0]
+
     @classmethod
     def lookupDate(cls, session, dateInst, model, recordID):
         """Query database for link related to current record. Return link
@@ -167,133 +211,26 @@ class DateField(Core, Base):
 
     @classmethod
     def cleanDateData(cls, dateData):
-        dateData['date_range'] = dateData['date_range'].strip(' ©.')
-        dateData['display_date'] = dateData['display_date'].strip(' .[]')
-        bracketMatch = re.search(r'\[([\d\-\?u%~©]+)\]', dateData['date_range'])
-        if bracketMatch: 
-            dateData['date_range'] = bracketMatch.group(1)
-        if re.search(r'(?:(?<=[0-9])[\?u%~X]+|\-(?![0-9]+)|^(?:c|ca.|c.|ca)(?=[0-9]))', dateData['date_range']):
-            try:
-                DateField.parseUncertainty(dateData)
-            except KeyError:
-                logger.error('Unable to parse uncertain date {}'.format(dateData['date_range']))
+        dateData['display_date'], dateData['date_range'] = normalizeDates(
+            dateData['display_date'], dateData['date_range']
+        )
 
     @classmethod
     def parseUncertainty(cls, dateData):
-        rawDates = re.findall(r'((?:(?:c|ca.|c.|ca))(?=[0-9])|)(\d+)((?:[\?u%~X]*||(?:\-(?![0-9]+))))', dateData['date_range'])
-        if len(rawDates) == 1:
-            parsedDate = DateField.setUncertainDates(rawDates[0])
-            dateData['date_range'] =  '{}/{}'.format(
-                parsedDate['range']['start'],
-                parsedDate['range']['end']
-            )
-            dateData['display_date'] = parsedDate['display']
-        elif len(rawDates) == 2:
-            startParsedDate = DateField.setUncertainDates(rawDates[0])
-            endParsedDate = DateField.setUncertainDates(rawDates[1])
-            dateData['date_range'] = '{}/{}'.format(
-                startParsedDate['range']['start'],
-                endParsedDate['range']['end']
-            )
-            dateData['display_date'] = '{}/{}'.format(
-                startParsedDate['display'],
-                endParsedDate['display']
-            )
+        uncertain = parseUncertainty(dateData['date_range'])
+        if uncertain is not None:
+            dateData['display_date'], dateData['date_range'] = uncertain
 
     @classmethod
     def setUncertainDates(cls, matchObj):
-        innerDate = {}
-        circaChar = matchObj[0]
-        dateStr = matchObj[1]
-        fuzzyChar = matchObj[2]
-        if len(dateStr) == 1:
-            innerDate['range'] =  {
-                'start': '{}000'.format(dateStr),
-                'end': '{}999'.format(dateStr)
-            }
-            innerDate['display'] = '{}XXX'.format(dateStr)
-        if len(dateStr) == 2:
-            innerDate['range'] =  {
-                'start': '{}00'.format(dateStr),
-                'end': '{}99'.format(dateStr)
-            }
-            innerDate['display'] = '{}XX'.format(dateStr)
-        elif len(dateStr) == 3:
-            innerDate['range'] =  {
-                'start': '{}0'.format(dateStr),
-                'end': '{}9'.format(dateStr)
-            }
-            innerDate['display'] = '{}X'.format(dateStr)
-        elif len(dateStr) == 4:
-            dateInt = int(dateStr)
-            if fuzzyChar != '' or circaChar != '':
-                innerDate['range'] =  {
-                    'start': str(dateInt - 1),
-                    'end': str(dateInt + 1)
-                }
-                innerDate['display'] = '{}?'.format(dateStr)
-            else:
-                innerDate['range'] = {
-                    'start': dateStr,
-                    'end': dateStr
-                }
-                innerDate['display'] = dateStr
-        return innerDate
+        return setUncertainDates(matchObj)
 
     def setDateRange(self, dateObj):
-        logger.info('Parsing date string {} into date range'.format(dateObj))
-        try:
-            if type(dateObj) is list:
-                logger.debug('Received start/end dates, treat as bounds')
-                startYear = parse(dateObj[0]).year
-                endYear = parse(dateObj[1]).year
-                self.date_range = '[{}, {})'.format(
-                    date(startYear, 1, 1),
-                    date(endYear, 12, 31)
-                )
-            elif re.match(r'^[0-9]{4}$', dateObj):
-                logger.debug('Received year value, parsing into full year')
-                year = parse(dateObj).year
-                self.date_range =  '[{}, {})'.format(
-                    date(year, 1, 1),
-                    date(year, 12, 31)
-                )
-            elif re.match(r'^[0-9]{4}(?:/|-)[0-9]{4}$', dateObj):
-                if '-' in dateObj:
-                    dateYears = dateObj.split('-')
-                    self.display_date = self.display_date.replace('-', '/')
-                else:
-                    dateYears = dateObj.split('/')
-                startYear = parse(dateYears[0]).year
-                endYear = parse(dateYears[1]).year
-                if endYear < startYear:
-                    raise ValueError
-                self.date_range = '[{}, {})'.format(
-                    date(startYear, 1, 1),
-                    date(endYear, 12, 31)
-                )
-            elif re.match(r'^[0-9]{4}-[0-9]{2}$', dateObj):
-                logger.debug('Received year-month, parsing into month range')
-                try:
-                    dateObj = parse(dateObj)
-                    year = dateObj.year
-                    month = dateObj.month
-                    lastDay = monthrange(year, month)[1]  # Accounts for leap years
-                    self.date_range = '[{}, {})'.format(
-                        date(year, month, 1),
-                        date(year, month, lastDay)
-                    )
-                except (IllegalMonthError, TypeError):
-                    logger.debug('Year-month is actually year-2 dig year')
-                    secondYear = '{}{}'.format(dateObj[:2], dateObj[5:])
-                    self.display_date = '{}/{}'.format(dateObj[:4], secondYear)
-                    self.setDateRange(self.display_date)
-            else:
-                logger.debug('Received other value, treating as single date')
-                self.date_range = '[{},)'.format(
-                    str(parse(dateObj).date())
-                )
-        except ValueError as err:
-            logger.error('Could not parse date string {}'.format(dateObj))
-            logger.debug('Returning None for date_range, date unsearchable')
-            self.date_range = None
+        logger.debug('Parsing date string {} into date range'.format(dateObj))
+        dateRange, displayUpdate = parseDateRange(dateObj)
+        if displayUpdate is REPLACE_DASH:
+            self.display_date = self.display_date.replace('-', '/')
+        elif displayUpdate is not None:
+            self.display_date = displayUpdate
+
+        self.date_range = dateRange
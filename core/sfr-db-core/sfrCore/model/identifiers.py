@@ -1,5 +1,6 @@
 import re
 from collections import defaultdict
+from datetime import datetime
 
 from sqlalchemy import (
     Column,
@@ -8,8 +9,11 @@ from sqlalchemy import (
     Unicode,
     Table,
     func,
-    text
+    literal,
+    select,
+    union_all
 )
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import relationship, selectinload
 from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
@@ -253,6 +257,109 @@ class Identifier(Base):
         except NoResultFound:
             return Identifier.insert(identifier)
 
+    @classmethod
+    def upsertIdentifiers(cls, session, identifiers):
+        """Resolve a list of identifier dicts to Identifier records, creating
+        any that do not yet exist. Existing identifiers are found with a single
+        query per type and new identifiers are created with set-wise inserts.
+        Conflicts with identifiers created concurrently by another process are
+        skipped by the database and resolved to the existing records.
+
+        Returns a list of session-attached Identifier objects, in the order of
+        the distinct valid identifiers received."""
+        idenGroups = cls._groupIdentifiers(identifiers)
+
+        idenIDs = {}
+        for idenType, values in idenGroups.items():
+            idenIDs.update({
+                (idenType, value): idenID
+                for value, idenID in cls._upsertTypeValues(
+                    session, idenType, list(values.keys())
+                ).items()
+            })
+
+        if len(idenIDs) < 1:
+            return []
+
+        idenRecs = {
+            rec.id: rec for rec in session.query(Identifier)
+            .filter(Identifier.id.in_(list(set(idenIDs.values()))))
+            .all()
+        }
+
+        orderedKeys = sorted(
+            idenIDs.keys(), key=lambda k: idenGroups[k[0]][k[1]][0]
+        )
+        return [idenRecs[idenIDs[key]] for key in orderedKeys]
+
+    @classmethod
+    def _upsertTypeValues(cls, session, idenType, values):
+        """Return a dict of identifier ids for values of a single type,
+        inserting new core and typed identifier rows for missing values"""
+        typeTable = cls.identifierTypes[idenType].__table__
+        idenTable = cls.__table__
+
+        idenIDs = cls._lookupTypeValues(session, typeTable, values)
+        newValues = [v for v in values if v not in idenIDs]
+        if len(newValues) < 1:
+            return idenIDs
+
+        logger.debug('Inserting {} new {} identifiers'.format(
+            len(newValues), idenType
+        ))
+        coreIDs = [
+            row[0] for row in session.execute(
+                idenTable.insert()
+                .values([{'type': idenType} for _ in newValues])
+                .returning(idenTable.c.id)
+            )
+        ]
+
+        insertStmt = insert(typeTable).values([
+            {
+                'value': value,
+                'identifier_id': coreID,
+                'date_created': datetime.utcnow(),
+                'date_modified': datetime.utcnow()
+            }
+            for value, coreID in zip(newValues, coreIDs)
+        ])
+        inserted = {
+            row[0]: row[1] for row in session.execute(
+                insertStmt.on_conflict_do_nothing(
+                    index_elements=[typeTable.c.value]
+                ).returning(typeTable.c.value, typeTable.c.identifier_id)
+            )
+        }
+        idenIDs.update(inserted)
+
+        # Values inserted by another process since the lookup above will have
+        # been skipped, remove their unused core rows and fetch the existing
+        conflicts = [v for v in newValues if v not in inserted]
+        if len(conflicts) > 0:
+            logger.debug('Resolving {} concurrently inserted {} values'.format(
+                len(conflicts), idenType
+            ))
+            session.execute(idenTable.delete().where(
+                idenTable.c.id.in_(
+                    list(set(coreIDs) - set(inserted.values()))
+                )
+            ))
+            idenIDs.update(
+                cls._lookupTypeValues(session, typeTable, conflicts)
+            )
+
+        return idenIDs
+
+    @staticmethod
+    def _lookupTypeValues(session, typeTable, values):
+        return {
+            row[0]: row[1] for row in session.execute(
+                select([typeTable.c.value, typeTable.c.identifier_id])
+                .where(typeTable.c.value.in_(values))
+            )
+        }
+
     @classmethod
     def insert(cls, iden):
         logger.debug('Inserting new identifier {} ({})'.format(
@@ -305,38 +412,79 @@ class Identifier(Base):
 
     @classmethod
     def getByIdentifier(cls, model, session, identifiers):
-        """Query database for a record related to a specific identifier. Return
-        if found and raise an error if multiple matching records are found."""
+        """Query database for the record sharing the most identifiers with the
+        provided set. Identifiers are grouped by type and matched with a single
+        parameterized query for each type, combined into one UNION statement.
+        Ties are resolved in favor of the record that matched the earliest
+        identifier in the provided list."""
+        return cls.matchIdentifiers(model, session, [identifiers])[0]
 
+    @classmethod
+    def matchIdentifiers(cls, model, session, identifierSets):
+        """Find the best matching record, as in getByIdentifier, for each of a
+        list of identifier sets. The identifiers of all sets are matched in a
+        single query. Returns a list of record ids (or None) in the order of
+        the provided sets."""
         className = model.__tablename__[:-1]
+        relTable = Base.metadata.tables['{}_identifiers'.format(className)]
+        recordCol = relTable.c['{}_id'.format(className)]
 
-        cleanIdentifiers = []
-        for i in identifiers:
-            try:
-                cleanIdentifiers.append(cls._cleanIdentifier(i))
-            except DataError:
-                continue
+        setGroups = [cls._groupIdentifiers(idens) for idens in identifierSets]
 
-        matches = defaultdict(int)
-        for iden in cleanIdentifiers:
-            logger.debug('Querying database for identifier {} ({})'.format(
-                iden['identifier'],
-                iden['type']
+        allValues = defaultdict(set)
+        for idenGroups in setGroups:
+            for idenType, values in idenGroups.items():
+                allValues[idenType].update(values.keys())
+
+        if len(allValues) < 1:
+            return [None] * len(setGroups)
+
+        typeQueries = []
+        for idenType, values in allValues.items():
+            logger.debug('Querying database for {} {} identifiers'.format(
+                len(values), idenType
             ))
-            idenType = iden['type'] if iden['type'] is not None else 'generic'
-            q = 'SELECT {}_id FROM {}_identifiers JOIN identifiers ON {}_identifiers.identifier_id = identifiers.id JOIN {} ON identifiers.id = {}.identifier_id WHERE {}.value=\'{}\''.format(
-                className, className, className, idenType,
-                idenType, idenType, iden['identifier']
+            idenTable = cls.identifierTypes[idenType].__table__
+            typeQueries.append(
+                select([
+                    recordCol.label('record_id'),
+                    literal(idenType or 'generic').label('type'),
+                    idenTable.c.value
+                ])
+                .select_from(relTable.join(
+                    idenTable,
+                    relTable.c.identifier_id == idenTable.c.identifier_id
+                ))
+                .where(idenTable.c.value.in_(list(values)))
             )
-            results = session.execute(text(q))
 
-            for res in results:
-                matches[res[0]] += 1
+        valueRecords = defaultdict(list)
+        for recordID, idenType, value in session.execute(
+            union_all(*typeQueries)
+        ):
+            idenType = idenType if idenType != 'generic' else None
+            valueRecords[(idenType, value)].append(recordID)
+
+        return [
+            cls._rankMatches(idenGroups, valueRecords)
+            for idenGroups in setGroups
+        ]
+
+    @staticmethod
+    def _rankMatches(idenGroups, valueRecords):
+        matches = {}
+        for idenType, values in idenGroups.items():
+            for value, positions in values.items():
+                for recordID in valueRecords.get((idenType, value), []):
+                    count, first = matches.get(recordID, (0, positions[0]))
+                    matches[recordID] = (
+                        count + len(positions),
+                        min(first, positions[0])
+                    )
 
         sortedMatches = sorted(
             matches.items(),
-            key=lambda x: x[1],
-            reverse=True
+            key=lambda x: (-x[1][0], x[1][1])
         )
 
         if len(sortedMatches) > 0:
@@ -344,6 +492,37 @@ class Identifier(Base):
 
         return None
 
+    @classmethod
+    def identifierKeys(cls, identifiers):
+        """Return a set of the cleaned (type, value) pairs of a list of
+        identifier dicts, skipping any that are invalid"""
+        return {
+            (idenType, value)
+            for idenType, values in cls._groupIdentifiers(identifiers).items()
+            for value in values.keys()
+        }
+
+    @classmethod
+    def _groupIdentifiers(cls, identifiers):
+        """Clean and group identifiers by type, returning a dict of each value
+        and the positions in the original list in which it appears"""
+        idenGroups = defaultdict(lambda: defaultdict(list))
+        for pos, iden in enumerate(identifiers):
+            try:
+                cleanIden = cls._cleanIdentifier(iden)
+            except DataError:
+                continue
+
+            if cleanIden['type'] not in cls.identifierTypes:
+                logger.warning('Skipping unknown identifier type {}'.format(
+                    cleanIden['type']
+                ))
+                continue
+
+            idenGroups[cleanIden['type']][cleanIden['identifier']].append(pos)
+
+        return idenGroups
+
     @staticmethod
     def _cleanIdentifier(identifier):
         """Normalizes all identifiers received to remove issue ids"""
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+from sqlalchemy import (
+    Column,
+    String,
+)
+from sqlalchemy.dialects.postgresql import JSON, UUID, insert
+
+from .core import Base, Core
+from ..helpers import createLog
+
+logger = createLog('indexHashModel')
+
+
+class IndexHash(Core, Base):
+    """This table holds content hashes of the ElasticSearch documents most
+    recently indexed for each work. The hash of the full document is stored
+    along with a hash of each of its top-level fields, allowing unchanged
+    documents to be skipped and changed fields to be identified. Rows are
+    keyed on the work UUID, which is used as the document ID in the index"""
+    __tablename__ = 'index_hashes'
+    work_uuid = Column(UUID(as_uuid=True), primary_key=True)
+    doc_hash = Column(String(64), nullable=False)
+    field_hashes = Column(JSON, nullable=False)
+
+    def __repr__(self):
+        return '<IndexHash(work={}, hash={})>'.format(
+            self.work_uuid, self.doc_hash
+        )
+
+    @classmethod
+    def lookupHashes(cls, session, workUUIDs):
+        """Return a dict of the stored (doc_hash, field_hashes) pairs for the
+        provided works, keyed by the string form of their UUIDs."""
+        return {
+            str(row.work_uuid): (row.doc_hash, row.field_hashes)
+            for row in session.query(
+                cls.work_uuid, cls.doc_hash, cls.field_hashes
+            ).filter(cls.work_uuid.in_(workUUIDs)).all()
+        }
+
+    @classmethod
+    def upsertHashes(cls, session, hashes):
+        """Insert or update hashes for a set of works in a single statement.
+        Takes a dict of (doc_hash, field_hashes) pairs keyed by work UUID."""
+        if len(hashes) < 1:
+            return
+
+        logger.debug('Storing {} document hashes'.format(len(hashes)))
+        insertStmt = insert(cls.__table__).values([
+            {
+                'work_uuid': workUUID,
+                'doc_hash': docHash,
+                'field_hashes': fieldHashes,
+                'date_created': datetime.utcnow(),
+                'date_modified': datetime.utcnow()
+            }
+            for workUUID, (docHash, fieldHashes) in hashes.items()
+        ])
+        session.execute(insertStmt.on_conflict_do_update(
+            index_elements=[cls.work_uuid],
+            set_={
+                'doc_hash': insertStmt.excluded.doc_hash,
+                'field_hashes': insertStmt.excluded.field_hashes,
+                'date_modified': insertStmt.excluded.date_modified
+            }
+        ))
+
+    @classmethod
+    def deleteHashes(cls, session, workUUIDs):
+        """Remove the stored hashes for a set of works, forcing their
+        documents to be fully reindexed on their next update."""
+        session.query(cls)\
+            .filter(cls.work_uuid.in_(workUUIDs))\
+            .delete(synchronize_session=False)
+
+    @classmethod
+    def clearHashes(cls, session):
+        """Remove the stored hashes for every work, for use when the index
+        has been recreated and none of the hashed documents remain in it."""
+        session.query(cls).delete(synchronize_session=False)
@@ -1,4 +1,3 @@
-from collections import defaultdict
 import requests
 from sqlalchemy import (
     Column,
@@ -227,6 +226,7 @@ class Instance(Core, Base):
 
         self.cleanData()
 
+        Agent.prefetchMatches(self.session, self.collectAgents())
         self.addAgents()
         self.addIdentifiers()
         self.addAltTitles()
@@ -261,6 +261,7 @@ class Instance(Core, Base):
 
         self.cleanData()
 
+        Agent.prefetchMatches(self.session, self.collectAgents())
         self.updateAgents()
         self.addIdentifiers()
         self.insertLanguages()
@@ -292,6 +293,16 @@ class Instance(Core, Base):
         if self.pub_place:
             self.pub_place = self.pub_place.strip(' :;,')
 
+    def collectAgents(self):
+        """Gather the agents of the instance and its items so that they can be
+        matched to existing records in a single query"""
+        agents = list(self.tmp_agents)
+        for item in self.tmp_formats:
+            if isinstance(item, dict):
+                agents.extend(item.get('agents', None) or [])
+
+        return agents
+
     def addAgents(self):
         for agent in self.tmp_agents:
             self.addAgent(agent)
@@ -309,24 +320,22 @@ class Instance(Core, Base):
             logger.warning('Unable to read agent {}'.format(agent['name']))
 
     def updateAgents(self):
+        existingRoles = AgentInstances.mapRoles(self.agent_instances)
         for agent in self.tmp_agents:
-            self.updateAgent(agent)
+            self.updateAgent(agent, existingRoles)
 
-    def updateAgent(self, agent):
+    def updateAgent(self, agent, existingRoles):
         try:
             agentRec, roles = Agent.updateOrInsert(self.session, agent)
             if roles is None:
                 roles = ['author']
             for role in roles:
-                if AgentInstances.roleExists(
-                    self.session,
-                    agentRec,
-                    role,
-                    self.id
-                ) is None:
+                if (agentRec.id, role) not in existingRoles:
                     self.session.add(
                         AgentInstances(agent=agentRec, instance=self, role=role)
                     )
+                    if agentRec.id is not None:
+                        existingRoles.add((agentRec.id, role))
         except DataError:
             logger.warning('Unable to read agent {}'.format(agent['name']))
 
@@ -338,16 +347,9 @@ class Instance(Core, Base):
         Existing identifiers are skipped.
         """
 
-        filteredIdentifiers = defaultdict(set)
-        for iden in self.tmp_identifiers:
-            filteredIdentifiers[iden['type']].add(iden['identifier'])
-
-        identifiers = set()
-        for idType, values in filteredIdentifiers.items():
-            for val in values:
-                identifiers.add(self.upsertIdentifier(
-                    {'type': idType, 'identifier': val}
-                ))
+        identifiers = set(
+            Identifier.upsertIdentifiers(self.session, self.tmp_identifiers)
+        )
 
         # This removes all existing identifiers from set, removing unnecessary
         # operations
@@ -361,14 +363,6 @@ class Instance(Core, Base):
             # if iden.type == 'isbn':
             #    self.fetchUnglueitSummary(iden.isbn[0].value)
 
-    def upsertIdentifier(self, iden):
-        try:
-            logger.debug('Adding {}'.format(iden['identifier']))
-            return Identifier.returnOrInsert(self.session, iden)
-        except DataError as err:
-            logger.warning('Received invalid identifier')
-            logger.debug(err)
-
     def insertLanguages(self):
         languages = self.tmp_language
         if languages is not None:
@@ -421,27 +415,36 @@ class Instance(Core, Base):
         }
 
     def updateMeasurements(self):
+        existing = Measurement.mapMeasurements(self.measurements)
         for m in self.tmp_measurements:
             self.measurements.add(
-                Measurement.updateOrInsert(self.session, m, Instance, self.id)
+                Measurement.updateOrInsert(
+                    self.session, m, Instance, self.id, existing=existing
+                )
             )
 
     def addDates(self):
         self.dates = {DateField.insert(d) for d in self.tmp_dates}
 
     def updateDates(self):
+        existing = DateField.mapDates(self.dates)
         for d in self.tmp_dates:
             self.dates.add(
-                DateField.updateOrInsert(self.session, d, Instance, self.id)
+                DateField.updateOrInsert(
+                    self.session, d, Instance, self.id, existing=existing
+                )
             )
 
     def addLinks(self):
         self.links = {Link(**l) for l in self.tmp_links}
 
     def updateLinks(self):
+        existing = Link.mapLinks(self.links)
         for l in self.tmp_links:
             self.links.add(
-                Link.updateOrInsert(self.session, l, Instance, self.id)
+                Link.updateOrInsert(
+                    self.session, l, Instance, self.id, existing=existing
+                )
             )
 
     def addRights(self):
@@ -451,9 +454,12 @@ class Instance(Core, Base):
         }
 
     def updateRights(self):
+        existing = Rights.mapRights(self.rights)
         for r in self.tmp_rights:
             self.rights.add(
-                Rights.updateOrInsert(self.session, r, Instance, self.id)
+                Rights.updateOrInsert(
+                    self.session, r, Instance, self.id, existing=existing
+                )
             )
 
     def fetchUnglueitSummary(self, isbn):
@@ -503,6 +509,12 @@ class AgentInstances(Core, Base):
         self.agent = agent
         self.role = role
 
+    @staticmethod
+    def mapRoles(agentInstances):
+        """Return a set of the (agent_id, role) pairs already related to an
+        instance"""
+        return {(rel.agent_id, rel.role) for rel in agentInstances}
+
     @classmethod
     def roleExists(cls, session, agent, role, recordID):
         """Query database to see if relationship with role exists between
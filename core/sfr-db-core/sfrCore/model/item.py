@@ -267,23 +267,14 @@ class Item(Core, Base):
         delattr(self, 'session')
 
     def addIdentifiers(self):
-        self.identifiers = {
-            Identifier.returnOrInsert(self.session, i)
-            for i in self.tmp_identifiers
-        }
+        self.identifiers = set(
+            Identifier.upsertIdentifiers(self.session, self.tmp_identifiers)
+        )
 
     def updateIdentifiers(self):
-        for identifier in self.tmp_identifiers:
-            self.updateIdentifier(identifier)
-
-    def updateIdentifier(self, identifier):
-        try:
-            self.identifiers.add(
-                Identifier.returnOrInsert(self.session, identifier)
-            )
-        except DataError as err:
-            logger.warning('Received invalid identifier')
-            logger.debug(err)
+        self.identifiers.update(
+            Identifier.upsertIdentifiers(self.session, self.tmp_identifiers)
+        )
 
     def addMeasurements(self):
         self.measurements = {
@@ -291,13 +282,15 @@ class Item(Core, Base):
         }
 
     def updateMeasurements(self):
+        existing = Measurement.mapMeasurements(self.measurements)
         for measurement in self.tmp_measurements:
             self.measurements.add(
                 Measurement.updateOrInsert(
                     self.session,
                     measurement,
                     Item,
-                    self.id
+                    self.id,
+                    existing=existing
                 )
             )
 
@@ -305,18 +298,24 @@ class Item(Core, Base):
         self.links = {Link(**l) for l in self.tmp_links}
 
     def updateLinks(self):
+        existing = Link.mapLinks(self.links)
         for link in self.tmp_links:
             self.links.add(
-                Link.updateOrInsert(self.session, link, Item, self.id)
+                Link.updateOrInsert(
+                    self.session, link, Item, self.id, existing=existing
+                )
             )
 
     def addDates(self):
         self.dates = {DateField.insert(d) for d in self.tmp_dates}
 
     def updateDates(self):
+        existing = DateField.mapDates(self.dates)
         for date in self.tmp_dates:
             self.dates.add(
-                DateField.updateOrInsert(self.session, date, Item, self.id)
+                DateField.updateOrInsert(
+                    self.session, date, Item, self.id, existing=existing
+                )
             )
 
     def addRights(self):
@@ -325,13 +324,15 @@ class Item(Core, Base):
         }
 
     def updateRights(self):
+        existing = Rights.mapRights(self.rights)
         for rightsStmt in self.tmp_rights:
             self.rights.add(
                 Rights.updateOrInsert(
                     self.session,
                     rightsStmt,
                     Item,
-                    self.id
+                    self.id,
+                    existing=existing
                 )
             )
 
@@ -350,19 +351,20 @@ class Item(Core, Base):
             logger.warning('Unable to read agent {}'.format(agent['name']))
 
     def updateAgents(self):
+        existingRoles = AgentItems.mapRoles(self.agent_items)
         for agent in self.tmp_agents:
-            self.updateAgent(agent)
+            self.updateAgent(agent, existingRoles)
 
-    def updateAgent(self, agent):
+    def updateAgent(self, agent, existingRoles):
         try:
             agentRec, roles = Agent.updateOrInsert(self.session, agent)
             if roles is None:
                 roles = ['repository']
             for role in roles:
-                if AgentItems.roleExists(
-                    self.session, agentRec, role, self.id
-                ) is None:
+                if (agentRec.id, role) not in existingRoles:
                     AgentItems(agent=agentRec, item=self, role=role)
+                    if agentRec.id is not None:
+                        existingRoles.add((agentRec.id, role))
         except DataError:
             logger.warning('Unable to read agent {}'.format(agent['name']))
 
@@ -460,6 +462,12 @@ class AgentItems(Core, Base):
         self.agent = agent
         self.role = role
 
+    @staticmethod
+    def mapRoles(agentItems):
+        """Return a set of the (agent_id, role) pairs already related to an
+        item"""
+        return {(rel.agent_id, rel.role) for rel in agentItems}
+
     @classmethod
     def roleExists(cls, session, agent, role, recordID):
         """Query database to check if a role exists between a specific work and
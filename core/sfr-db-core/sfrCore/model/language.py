@@ -1,3 +1,4 @@
+from functools import lru_cache
 from sqlalchemy import (
     Table,
     Column,
@@ -6,12 +7,13 @@ from sqlalchemy import (
     String,
     ForeignKey
 )
-from sqlalchemy.orm import relationship, backref
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session, relationship, backref
 from sqlalchemy.sql import text
 from sqlalchemy.orm.exc import NoResultFound
 import pycountry
 
-from .core import Base, Core
+from .core import Base, Core, ReferenceCache
 
 from ..helpers import createLog, DBError, DataError
 
@@ -97,14 +99,22 @@ class Language(Core, Base):
         else:
             languages = [language]
 
+        Language.CACHE.preload(session)
+
         outLangs = []
         for lang in languages:
-            existing = Language.lookupLanguage(session, lang)
+            existing = Language.CACHE.get(session, lang['iso_3'])
+            if existing is None:
+                existing = Language.lookupLanguage(session, lang)
+
             if existing:
                 outLangs.append(existing)
             else:
                 logger.info('Inserting new language {}'.format(str(language)))
-                outLangs.append(Language.insert(lang))
+                existing = Language.insert(lang)
+                outLangs.append(existing)
+
+            Language.CACHE.add(session, existing)
 
         return outLangs
 
@@ -131,7 +141,15 @@ class Language(Core, Base):
     
     @classmethod
     def loadFromString(cls, lang):
-        parsedLangs = cls.parseLangStr(lang)
+        """Return a list of language dicts parsed from a language name or ISO
+        code. Parsed strings are memoized as the same small set of languages
+        recur throughout most records"""
+        return [dict(l) for l in cls.parseLanguage(lang)]
+
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def parseLanguage(lang):
+        parsedLangs = Language.parseLangStr(lang)
 
         outLangs = []
         for lang in parsedLangs:
@@ -154,7 +172,7 @@ class Language(Core, Base):
                     logger.warning('Unable to format lang {}'.format(lang))
                     logger.debug(err)
 
-        return outLangs
+        return tuple(outLangs)
 
     @classmethod
     def parseLangStr(cls, lang):
@@ -183,3 +201,21 @@ class Language(Core, Base):
             logger.warning('Unable to parse language string {}'.format(lang))
             logger.debug(err)
             return None
+
+
+Language.CACHE = ReferenceCache(
+    Language,
+    ['id', 'language', 'iso_2', 'iso_3'],
+    lambda lang: lang.iso_3
+)
+
+
+@listens_for(Language, 'after_insert')
+def cacheNewLanguage(mapper, connection, target):
+    Language.CACHE.register(target)
+
+
+@listens_for(Session, 'after_rollback')
+def clearLanguageCache(session):
+    """Cached languages may have been created in a rolled back transaction"""
+    Language.CACHE.clear()
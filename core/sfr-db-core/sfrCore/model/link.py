@@ -96,15 +96,29 @@ class Link(Core, Base):
         )
 
     @classmethod
-    def updateOrInsert(cls, session, link, model, recordID):
+    def updateOrInsert(cls, session, link, model, recordID, existing=None):
         """Query the database for a link on the current record. If found,
-        update the existing link, if not, insert new row"""
-        outLink = Link.lookupLink(session, link, model, recordID)
+        update the existing link, if not, insert new row. If a map of the
+        record's existing links (see mapLinks) is provided it is used in place
+        of the database query and any new link is added to it"""
+        if existing is None:
+            outLink = Link.lookupLink(session, link, model, recordID)
+        else:
+            outLink = existing.get(Link.httpRegexSub(link.get('url', None)))
+
         if outLink is None: outLink = Link(**link)
         else: outLink.update(link)
-        
+
+        if existing is not None: existing[outLink.url] = outLink
+
         return outLink
 
+    @staticmethod
+    def mapLinks(links):
+        """Return a dict of a record's existing links keyed by their
+        normalized URL"""
+        return {Link.httpRegexSub(link.url): link for link in links}
+
     def update(self, linkData):
         """Update fields on existing link"""
         for field, value in linkData.items():
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 from sqlalchemy import (
     Column,
     ForeignKey,
@@ -97,19 +99,34 @@ class Measurement(Core, Base):
         )
 
     @classmethod
-    def updateOrInsert(cls, session, measure, model, recordID):
-
-        outMeasure = Measurement.lookupMeasure(
-            session,
-            measure,
-            model,
-            recordID
-        )
+    def updateOrInsert(cls, session, measure, model, recordID, existing=None):
+        """Update the measurement of the same quantity and source on the
+        current record, or insert a new one. If a map of the record's
+        existing measurements (see mapMeasurements) is provided it is used in
+        place of the database query and any new measurement is added to it"""
+        if existing is None:
+            outMeasure = Measurement.lookupMeasure(
+                session,
+                measure,
+                model,
+                recordID
+            )
+        else:
+            outMeasure = Measurement.findMeasure(
+                existing,
+                measure,
+                model,
+                recordID
+            )
 
         if outMeasure:
             outMeasure.update(measure)
         else:
             outMeasure = Measurement.insert(measure)
+            if existing is not None:
+                existing[(measure['quantity'], measure['source_id'])] = [
+                    outMeasure
+                ]
 
         return outMeasure
 
@@ -137,6 +154,30 @@ class Measurement(Core, Base):
             ))
             raise DataError('Duplicate measurement entries')
     
+    @staticmethod
+    def mapMeasurements(measurements):
+        """Return a dict of lists of a record's existing measurements, keyed
+        by their quantity and source"""
+        measureMap = defaultdict(list)
+        for measure in measurements:
+            measureMap[(measure.quantity, measure.source_id)].append(measure)
+
+        return measureMap
+
+    @staticmethod
+    def findMeasure(existing, measure, model, recordID):
+        matches = existing.get((measure['quantity'], measure['source_id']))
+        if not matches:
+            return None
+        elif len(matches) > 1:
+            logger.error('Found duplicate measurements for {} {}'.format(
+                model.__tablename__,
+                recordID
+            ))
+            raise DataError('Duplicate measurement entries')
+
+        return matches[0]
+
     @classmethod
     def getMeasurements(cls, session, measure, model, recordID):
         return [ 
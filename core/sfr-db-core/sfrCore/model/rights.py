@@ -81,10 +81,12 @@ class Rights(Core, Base):
         )
 
     @classmethod
-    def updateOrInsert(cls, session, rights, model, recordID):
+    def updateOrInsert(cls, session, rights, model, recordID, existing=None):
         """Query the database for rights from the provided source on the
         current record. If found, update the existing date, if not, insert new
-        row"""
+        row. If a map of the record's existing rights (see mapRights) is
+        provided it is used in place of the database query and any new rights
+        are added to it"""
 
         logger.debug('Inserting or updating rights {} on record {}'.format(
             rights['license'],
@@ -93,10 +95,15 @@ class Rights(Core, Base):
         
         dates = rights.pop('dates', None)
 
-        outRights = Rights.lookupRights(session, rights, model, recordID)
+        if existing is None:
+            outRights = Rights.lookupRights(session, rights, model, recordID)
+        else:
+            outRights = existing.get(rights['source'])
+
         if outRights is None:
             logger.info('Inserting new rights object on {}'.format(model))
             outRights = Rights.insert(rights, dates)
+            if existing is not None: existing[rights['source']] = outRights
         else:
             logger.info('Updating existing rights record {}'.format(
                 outRights.id
@@ -114,10 +121,13 @@ class Rights(Core, Base):
                 and value.strip() != ''
             ):
                 setattr(self, field, value)
-        
+
+        existingDates = DateField.mapDates(self.dates)
         for date in dates:
             self.dates.add(
-                DateField.updateOrInsert(session, date, Rights, self.id)
+                DateField.updateOrInsert(
+                    session, date, Rights, self.id, existing=existingDates
+                )
             )
 
     @classmethod
@@ -133,6 +143,11 @@ class Rights(Core, Base):
 
         return rights
 
+    @staticmethod
+    def mapRights(rights):
+        """Return a dict of a record's existing rights keyed by source"""
+        return {rightsRec.source: rightsRec for rightsRec in rights}
+
     @classmethod
     def lookupRights(cls, session, rights, model, recordID):
         """Query database for link related to current record. Return link
@@ -1,3 +1,5 @@
+import os
+
 from sqlalchemy import (
     Table,
     Column,
@@ -5,12 +7,14 @@ from sqlalchemy import (
     ForeignKey,
     Unicode,
     Float,
-    String
+    String,
+    tuple_
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.event import listens_for
+from sqlalchemy.orm import Session, relationship
 from sqlalchemy.orm.exc import MultipleResultsFound
 
-from .core import Base, Core
+from .core import Base, Core, ReferenceCache
 from .measurement import SUBJECT_MEASUREMENTS, Measurement
 
 from ..helpers import createLog, DBError
@@ -59,11 +63,17 @@ class Subject(Core, Base):
         otherwise insert a new subject"""
         measurements = subject.pop('measurements', [])
 
-        outSubj = Subject.lookupSubject(session, subject)
+        outSubj = Subject.CACHE.get(
+            session, (subject.get('authority'), subject.get('subject'))
+        )
+        if outSubj is None:
+            outSubj = Subject.lookupSubject(session, subject)
 
         if outSubj is None: outSubj = Subject.insert(subject, measurements)
         else: outSubj.update(session, subject, measurements)
-        
+
+        Subject.CACHE.add(session, outSubj)
+
         return outSubj
 
     def update(self, session, subject, measurements):
@@ -102,6 +112,27 @@ class Subject(Core, Base):
                 Measurement.updateOrInsert(session, measure, Subject, self.id)
             )
 
+    @classmethod
+    def prefetchSubjects(cls, session, subjects):
+        """Load any uncached subjects from a set of subject dicts into the
+        subject cache with a single query"""
+        keys = {
+            (subj.get('authority'), subj.get('subject'))
+            for subj in subjects
+            if isinstance(subj, dict)
+        }
+        keys = [
+            key for key in keys
+            if None not in key and cls.CACHE.get(session, key) is None
+        ]
+        if len(keys) < 1:
+            return
+
+        for subj in session.query(cls)\
+                .filter(tuple_(cls.authority, cls.subject).in_(keys))\
+                .all():
+            cls.CACHE.add(session, subj)
+
     @classmethod
     def lookupSubject(cls, session, subject):
         """Query database for an existing subject. If multiple are found,
@@ -116,3 +147,23 @@ class Subject(Core, Base):
                 subject['subject']
             ))
             return subjQuery.first()
+
+
+Subject.CACHE = ReferenceCache(
+    Subject,
+    ['id', 'authority', 'uri', 'subject', 'weight'],
+    lambda subj: (subj.authority, subj.subject),
+    maxSize=int(os.environ.get('SUBJECT_CACHE_SIZE', 10000))
+)
+
+
+@listens_for(Subject, 'after_insert')
+@listens_for(Subject, 'after_update')
+def cacheSubject(mapper, connection, target):
+    Subject.CACHE.register(target)
+
+
+@listens_for(Session, 'after_rollback')
+def clearSubjectCache(session):
+    """Cached subjects may have been created in a rolled back transaction"""
+    Subject.CACHE.clear()
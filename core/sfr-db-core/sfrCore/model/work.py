@@ -162,6 +162,7 @@ class Work(Core, Base):
 
         self.addImportJson()
         self.addIdentifiers()
+        Agent.prefetchMatches(self.session, self.collectAgents())
         self.addInstances()
         self.addAgents()
         self.addAltTitles()
@@ -202,6 +203,7 @@ class Work(Core, Base):
         self.addImportJson()
         self.addTitles(workData.get('title', ''))
         self.updateIdentifiers()
+        Agent.prefetchMatches(self.session, self.collectAgents())
         self.updateInstances()
         self.updateAgents()
         self.updateSubjects()
@@ -223,28 +225,15 @@ class Work(Core, Base):
 
     def addIdentifiers(self):
         logger.info('Adding identifiers to work')
-        self.identifiers = {
-            self.addIdentifier(i) for i in self.tmp_identifiers
-        }
-
-    def addIdentifier(self, iden):
-        try:
-            return Identifier.returnOrInsert(self.session, iden)
-        except DataError as err:
-            logger.warning('Received invalid identifier')
-            logger.debug(err)
+        self.identifiers = set(
+            Identifier.upsertIdentifiers(self.session, self.tmp_identifiers)
+        )
 
     def updateIdentifiers(self):
         logger.info('Upserting identifiers for work')
-        for iden in self.tmp_identifiers:
-            self.updateIdentifier(iden)
-
-    def updateIdentifier(self, iden):
-        try:
-            self.identifiers.add(Identifier.returnOrInsert(self.session, iden))
-        except DataError as err:
-            logger.warning('Received invalid identifier')
-            logger.debug(err)
+        self.identifiers.update(
+            Identifier.upsertIdentifiers(self.session, self.tmp_identifiers)
+        )
 
     def addInstances(self):
         logger.info('Adding instances to work')
@@ -322,6 +311,24 @@ class Work(Core, Base):
 
         return None
 
+    def collectAgents(self):
+        """Gather the agents of the work and its instances and items so that
+        they can be matched to existing records in a single query"""
+        return Work.gatherAgents(self.tmp_agents, self.tmp_instances)
+
+    @staticmethod
+    def gatherAgents(agents, instances):
+        agents = list(agents or [])
+        for inst in instances or []:
+            if not isinstance(inst, dict):
+                continue
+            agents.extend(inst.get('agents', None) or [])
+            for item in inst.get('formats', None) or []:
+                if isinstance(item, dict):
+                    agents.extend(item.get('agents', None) or [])
+
+        return agents
+
     def addAgents(self):
         logger.info('Adding agents to work')
         for a in self.tmp_agents:
@@ -342,22 +349,20 @@ class Work(Core, Base):
 
     def updateAgents(self):
         logger.info('Upserting agents for work')
+        existingRoles = AgentWorks.mapRoles(self.agent_works)
         for agent in self.tmp_agents:
-            self.updateAgent(agent)
+            self.updateAgent(agent, existingRoles)
 
-    def updateAgent(self, agent):
+    def updateAgent(self, agent, existingRoles):
         try:
             agentRec, roles = Agent.updateOrInsert(self.session, agent)
             if roles is None:
                 roles = ['author']
             for role in roles:
-                if AgentWorks.roleExists(
-                    self.session,
-                    agentRec,
-                    role,
-                    self.id
-                ) is None:
+                if (agentRec.id, role) not in existingRoles:
                     AgentWorks(agent=agentRec, work=self, role=role)
+                    if agentRec.id is not None:
+                        existingRoles.add((agentRec.id, role))
         except (DataError, DBError) as err:
             logger.warning('Unable to read agent {}'.format(agent['name']))
             logger.debug(err)
@@ -383,34 +388,45 @@ class Work(Core, Base):
         }
 
     def updateMeasurements(self):
+        existing = Measurement.mapMeasurements(self.measurements)
         for measurement in self.tmp_measurements:
-            self.updateMeasurement(measurement)
+            self.updateMeasurement(measurement, existing)
 
-    def updateMeasurement(self, measure):
+    def updateMeasurement(self, measure, existing):
         self.measurements.add(
-            Measurement.updateOrInsert(self.session, measure, Work, self.id)
+            Measurement.updateOrInsert(
+                self.session, measure, Work, self.id, existing=existing
+            )
         )
 
     def addLinks(self):
         self.links = {Link(**l) for l in self.tmp_links}
 
     def updateLinks(self):
+        existing = Link.mapLinks(self.links)
         for link in self.tmp_links:
-            self.updateLink(link)
+            self.updateLink(link, existing)
 
-    def updateLink(self, link):
-        self.links.add(Link.updateOrInsert(self.session, link, Work, self.id))
+    def updateLink(self, link, existing):
+        self.links.add(
+            Link.updateOrInsert(
+                self.session, link, Work, self.id, existing=existing
+            )
+        )
 
     def addDates(self):
         self.dates = {DateField.insert(d) for d in self.tmp_dates}
 
     def updateDates(self):
+        existing = DateField.mapDates(self.dates)
         for date in self.tmp_dates:
-            self.updateDate(date)
+            self.updateDate(date, existing)
 
-    def updateDate(self, date):
+    def updateDate(self, date, existing):
         self.dates.add(
-            DateField.updateOrInsert(self.session, date, Work, self.id)
+            DateField.updateOrInsert(
+                self.session, date, Work, self.id, existing=existing
+            )
         )
 
     def addLanguages(self):
@@ -535,6 +551,60 @@ class Work(Core, Base):
             return session.query(Work).get(workID)
         return None
 
+    @classmethod
+    def lookupWorks(cls, session, lookups):
+        """Lookup the works for a batch of records, each described by a tuple
+        of its identifiers and primary identifier, as with lookupWork. Records
+        without a UUID are matched to works, and then instances, in bulk.
+        Returns a list of works (or None) in the order of the lookups."""
+        works = [None] * len(lookups)
+        pending = []
+        for pos, (identifiers, primaryID) in enumerate(lookups):
+            if primaryID is not None and primaryID['type'] == 'uuid':
+                works[pos] = Work.getByUUID(session, primaryID['identifier'])
+            else:
+                pending.append((pos, identifiers))
+
+        if len(pending) < 1:
+            return works
+
+        workIDs = dict(zip(
+            [pos for pos, _ in pending],
+            Identifier.matchIdentifiers(
+                Work, session, [idens for _, idens in pending]
+            )
+        ))
+
+        unmatched = [(pos, idens) for pos, idens in pending if not workIDs[pos]]
+        if len(unmatched) > 0:
+            instanceIDs = dict(zip(
+                [pos for pos, _ in unmatched],
+                Identifier.matchIdentifiers(
+                    Instance, session, [idens for _, idens in unmatched]
+                )
+            ))
+            matchedInstances = set(filter(None, instanceIDs.values()))
+            instanceWorks = dict(
+                session.query(Instance.id, Instance.work_id)
+                .filter(Instance.id.in_(matchedInstances))
+                .all()
+            ) if matchedInstances else {}
+            for pos, instanceID in instanceIDs.items():
+                if instanceID:
+                    workIDs[pos] = instanceWorks.get(instanceID)
+
+        matchedWorks = set(filter(None, workIDs.values()))
+        if len(matchedWorks) > 0:
+            workRecs = {
+                work.id: work for work in session.query(Work)
+                .filter(Work.id.in_(matchedWorks))
+                .all()
+            }
+            for pos, workID in workIDs.items():
+                works[pos] = workRecs.get(workID)
+
+        return works
+
     @classmethod
     def getByUUID(cls, session, recUUID):
         """Query the database for a work by UUID. Returns only one record or
@@ -607,6 +677,12 @@ class AgentWorks(Core, Base):
             self.role
         )
 
+    @staticmethod
+    def mapRoles(agentWorks):
+        """Return a set of the (agent_id, role) pairs already related to a
+        work"""
+        return {(rel.agent_id, rel.role) for rel in agentWorks}
+
     @classmethod
     def roleExists(cls, session, agent, role, recordID):
         """Query database to see if relationship with role exists between
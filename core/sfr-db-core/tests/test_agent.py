@@ -5,10 +5,12 @@ from sqlalchemy.orm.exc import NoResultFound, MultipleResultsFound
 
 from sfrCore.helpers import DataError
 from sfrCore.model import Agent
-from sfrCore.model.agent import Alias
+from sfrCore.model.agent import Alias, AgentCache
 
 
 class TestAgent(unittest.TestCase):
+    def setUp(self):
+        Agent.CACHE.clear()
 
     def test_agent_init(self):
         testAgent = Agent('session')
@@ -170,7 +172,7 @@ class TestAgent(unittest.TestCase):
         self.assertEqual(testAgent.name, 'New, Name')
         self.assertEqual(testAgent.sort_name, 'new, name')
 
-    @patch.object(Agent, 'findTrgmQuery', return_value={'id': 'mockAgent'})
+    @patch.object(Agent, 'findTrgmQuery', return_value='mockAgent')
     def test_agent_lookup_name(self, mock_auth):
         testAgent = Agent()
         testAgent.name = 'Tester, Test'
@@ -188,6 +190,80 @@ class TestAgent(unittest.TestCase):
         res = testAgent.lookup()
         self.assertEqual(res, 'mockAgent')
 
+    @patch.object(Agent, 'matchNames')
+    def test_agent_lookup_name_cached(self, mock_match):
+        mock_match.side_effect = lambda session, names: Agent.CACHE.set(
+            [('name', names[0])], 'mockAgent'
+        )
+        testAgent = Agent()
+        testAgent.name = 'Tester,  Test'
+        self.assertEqual(testAgent.lookup(), 'mockAgent')
+
+        cachedAgent = Agent()
+        cachedAgent.name = 'tester test'
+        self.assertEqual(cachedAgent.lookup(), 'mockAgent')
+        mock_match.assert_called_once_with(None, ['tester test'])
+
+    @patch.object(Agent, 'findTrgmQuery')
+    @patch.object(Agent, 'authorityQuery', return_value='mockAgent')
+    def test_agent_lookup_authority_cached(self, mock_auth, mock_trgm):
+        testAgent = Agent()
+        testAgent.viaf = 999999999
+        testAgent.name = 'Tester, Test'
+        testAgent.lookup()
+
+        cachedAgent = Agent()
+        cachedAgent.viaf = 999999999
+        cachedAgent.name = 'Other, Name'
+        self.assertEqual(cachedAgent.lookup(), 'mockAgent')
+        mock_auth.assert_called_once()
+        mock_trgm.assert_not_called()
+
+    def test_updateInsert_stale_cache(self):
+        with patch('sfrCore.model.Agent.createAgent') as mock_create:
+            mock_agent = MagicMock()
+            mock_agent.viaf = None
+            mock_agent.lcnaf = None
+            mock_agent.name = 'Tester'
+            mock_agent.lookup.side_effect = [1, None]
+            mock_create.return_value = (mock_agent, ['test'])
+            mock_session = MagicMock()
+            mock_session.query.return_value.get.return_value = None
+            Agent.CACHE.set([('name', 'tester')], 1)
+
+            testAgent, roles = Agent.updateOrInsert(mock_session, 'fakeAgent')
+            self.assertEqual(testAgent, mock_agent)
+            self.assertEqual(Agent.CACHE.get([('name', 'tester')]), None)
+
+    def test_agent_cache_eviction(self):
+        testCache = AgentCache(maxSize=2, persist=False)
+        testCache.set([('viaf', '1')], 1)
+        testCache.set([('viaf', '2')], 2)
+        self.assertEqual(testCache.get([('viaf', '1')]), 1)
+        testCache.set([('name', 'test')], 3)
+        self.assertEqual(testCache.get([('viaf', '2')]), None)
+        self.assertEqual(testCache.get([('viaf', '3'), ('viaf', '1')]), 1)
+
+    def test_agent_cache_invocation(self):
+        testCache = AgentCache(maxSize=10, persist=False)
+        testCache.set([('viaf', '1')], 1)
+        testCache.endInvocation()
+        self.assertEqual(testCache.get([('viaf', '1')]), None)
+
+        persistCache = AgentCache(maxSize=10, persist=True)
+        persistCache.set([('viaf', '1')], 1)
+        persistCache.endInvocation()
+        self.assertEqual(persistCache.get([('viaf', '1')]), 1)
+
+    def test_agent_cache_keys(self):
+        testAgent = Agent()
+        testAgent.viaf = 123
+        testAgent.name = ' Tester,\nTest '
+        self.assertEqual(AgentCache.authorityKeys(testAgent), [('viaf', '123')])
+        self.assertEqual(
+            AgentCache.nameKeys(testAgent), [('name', 'tester test')]
+        )
+
     def test_add_lifespan_date(self):
         testAgent = Agent()
         testAgent.tmp_dates = []
@@ -196,36 +272,71 @@ class TestAgent(unittest.TestCase):
 
     def test_trgm_query_success(self):
         mock_session = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.rowcount = 1
-        mock_resp.first.return_value = 'mockAgent'
-        mock_session.execute.return_value = mock_resp
+        mock_session.execute.side_effect = [
+            None, [('otester test', 'mockAgent')]
+        ]
         testAgent = Agent(mock_session)
         testAgent.name = 'O\'Tester, Test'
         matchAgent = testAgent.findTrgmQuery()
         self.assertEqual(matchAgent, 'mockAgent')
-
-    def test_trgm_query_multiple_response(self):
-        mock_session = MagicMock()
-        mock_resp = MagicMock()
-        mock_resp.rowcount = 2
-        mock_session.execute.return_value = mock_resp
-        testAgent = Agent(mock_session)
-        testAgent.name = 'Tester, Test'
-        manyMatches = testAgent.findTrgmQuery()
-        self.assertEqual(manyMatches, None)
+        self.assertEqual(
+            mock_session.execute.call_args[0][1],
+            {'names': ['otester test']}
+        )
 
     def test_trgm_query_no_matches(self):
         mock_session = MagicMock()
-        mock_response = MagicMock()
-        mock_response.rowcount = 0
-        mock_response.first.return_value = None
-        mock_session.execute.return_value = mock_response
+        mock_session.execute.side_effect = [None, [('tester test', None)]]
         testAgent = Agent(mock_session)
         testAgent.name = 'Tester, Test'
         noMatches = testAgent.findTrgmQuery()
         self.assertEqual(noMatches, None)
 
+        # Names without a match are cached as well
+        self.assertEqual(testAgent.findTrgmQuery(), None)
+        self.assertEqual(mock_session.execute.call_count, 2)
+
+    @patch.dict('os.environ', {'AGENT_MATCH_THRESHOLD': '0.8'})
+    def test_match_names_threshold(self):
+        mock_session = MagicMock()
+        mock_session.execute.side_effect = [
+            None, [('name one', 1), ('name two', None)]
+        ]
+        Agent.matchNames(mock_session, ['name one', 'name two'])
+        self.assertEqual(
+            mock_session.execute.call_args_list[0][0][1],
+            {'threshold': '0.8'}
+        )
+        self.assertEqual(Agent.CACHE.get([('name', 'name one')]), 1)
+        self.assertEqual(
+            Agent.CACHE.get([('name', 'name two')]), AgentCache.NO_MATCH
+        )
+
+    @patch.object(Agent, 'matchNames')
+    def test_prefetch_matches(self, mock_match):
+        Agent.CACHE.set([('name', 'cached name')], 1)
+        Agent.prefetchMatches('session', [
+            {'name': 'Tester, Test, 1900-1950 [author]'},
+            {'name': 'Cached Name'},
+            {'name': None},
+            'invalid'
+        ])
+        mock_match.assert_called_once_with('session', ['tester test'])
+
+    def test_normalize_name(self):
+        self.assertEqual(
+            Agent.normalizeName(' Tester,  Test. '), 'tester test'
+        )
+        self.assertEqual(Agent.normalizeName(None), None)
+
+    def test_agent_cache_persist_misses(self):
+        testCache = AgentCache(maxSize=10, persist=True)
+        testCache.set([('name', 'test')], 1)
+        testCache.set([('name', 'other')], AgentCache.NO_MATCH)
+        testCache.endInvocation()
+        self.assertEqual(testCache.get([('name', 'test')]), 1)
+        self.assertFalse(testCache.contains(('name', 'other')))
+
     def test_authority_query_success(self):
         mock_session = MagicMock()
         mock_session.query().filter().one_or_none.return_value = 'mockAgent'
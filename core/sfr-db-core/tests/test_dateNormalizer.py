@@ -0,0 +1,64 @@
+import unittest
+from unittest.mock import patch
+
+from sfrCore.helpers.dateNormalizer import (
+    normalizeDates,
+    parseDateRange,
+    cachedNormalizeDates,
+    cachedParseDateRange,
+    REPLACE_DASH
+)
+
+
+class TestDateNormalizer(unittest.TestCase):
+    def setUp(self):
+        cachedNormalizeDates.cache_clear()
+        cachedParseDateRange.cache_clear()
+
+    def test_normalize_circa(self):
+        self.assertEqual(
+            normalizeDates('c1885', 'c1885'), ('1885?', '1884/1886')
+        )
+
+    def test_normalize_century(self):
+        self.assertEqual(normalizeDates('18--?', '18--?'), ('18XX', '1800/1899'))
+
+    def test_normalize_cached(self):
+        normalizeDates('1900.', '1900.')
+        normalizeDates('1900.', '1900.')
+        self.assertEqual(cachedNormalizeDates.cache_info().hits, 1)
+
+    def test_normalize_uncached_types(self):
+        with self.assertRaises(AttributeError):
+            normalizeDates(None, '1900')
+        self.assertEqual(cachedNormalizeDates.cache_info().currsize, 0)
+
+    @patch('sfrCore.helpers.dateNormalizer.parse')
+    def test_parse_year_fast_path(self, mock_parse):
+        self.assertEqual(
+            parseDateRange('1900'), ('[1900-01-01, 1900-12-31)', None)
+        )
+        mock_parse.assert_not_called()
+
+    @patch('sfrCore.helpers.dateNormalizer.parse')
+    def test_parse_year_range_fast_path(self, mock_parse):
+        self.assertEqual(
+            parseDateRange('1900-1910'),
+            ('[1900-01-01, 1910-12-31)', REPLACE_DASH)
+        )
+        mock_parse.assert_not_called()
+
+    def test_parse_reversed_range(self):
+        self.assertEqual(parseDateRange('1910/1900'), (None, None))
+
+    def test_parse_bounds(self):
+        self.assertEqual(
+            parseDateRange(['1900', '1910']), ('[1900-01-01, 1910-12-31)', None)
+        )
+
+    def test_parse_cached(self):
+        parseDateRange('June 1, 1885')
+        self.assertEqual(
+            parseDateRange('June 1, 1885'), ('[1885-06-01,)', None)
+        )
+        self.assertEqual(cachedParseDateRange.cache_info().hits, 1)
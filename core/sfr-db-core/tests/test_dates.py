@@ -56,6 +56,47 @@ class TestDates(unittest.TestCase):
         self.assertEqual(mergeDate.display_date, '2020')
         self.assertEqual(mergeDate.date_range, '[2020,2020)')
     
+    def test_updateInsert_existing(self):
+        mock_date = MagicMock(date_type='test')
+        existing = DateField.mapDates([mock_date])
+        dateInst = {'date_type': 'test', 'display_date': '0000'}
+        with patch.object(DateField, 'lookupDate') as mock_lookup:
+            testDate = DateField.updateOrInsert(
+                'session', dateInst, 'test', 1, existing=existing
+            )
+            mock_lookup.assert_not_called()
+        self.assertEqual(testDate, mock_date)
+        mock_date.update.assert_called_once_with(dateInst)
+
+    @patch.object(DateField, 'insert')
+    def test_updateInsert_existing_new(self, mock_insert):
+        mock_insert.return_value = MagicMock(date_type='test')
+        existing = DateField.mapDates([])
+        dateInst = {'date_type': 'test', 'display_date': '0000'}
+        testDate = DateField.updateOrInsert(
+            'session', dateInst, 'test', 1, existing=existing
+        )
+        self.assertEqual(existing['test'], [testDate])
+
+    def test_find_date_merge(self):
+        mock_session = MagicMock()
+        oldDate = DateField(
+            id=1, date_type='test', display_date='2010',
+            date_range='[2010,2010)', date_modified='2019-01-01'
+        )
+        newDate = DateField(
+            id=2, date_type='test', display_date='2020',
+            date_range='[2020,2020)', date_modified='2019-06-01'
+        )
+        existing = DateField.mapDates([newDate, oldDate])
+        outDate = DateField.findDate(
+            mock_session, existing, {'date_type': 'test'}
+        )
+        self.assertEqual(outDate, oldDate)
+        self.assertEqual(outDate.display_date, '2020')
+        self.assertEqual(existing['test'], [oldDate])
+        mock_session.delete.assert_called_once_with(newDate)
+
     @patch.object(DateField, 'cleanDateData')
     @patch.object(DateField, 'setDateRange')
     def test_update_date(self, mock_range, mock_clean):
@@ -81,14 +122,22 @@ class TestDates(unittest.TestCase):
         self.assertEqual(res.date_range, None)
         self.assertEqual(res.date_type, 'tester')
     
-    @patch.object(DateField, 'parseUncertainty')
-    def test_clean_date(self, mock_uncertain):
+    def test_clean_date(self):
         dateData = {
             'date_range': 'date [1999?]',
             'display_date': '[1999]'
         }
         DateField.cleanDateData(dateData)
-        self.assertEqual(dateData['date_range'], '1999?')
+        self.assertEqual(dateData['date_range'], '1998/2000')
+        self.assertEqual(dateData['display_date'], '1999?')
+
+    def test_clean_date_certain(self):
+        dateData = {
+            'date_range': '1999.',
+            'display_date': '[1999]'
+        }
+        DateField.cleanDateData(dateData)
+        self.assertEqual(dateData['date_range'], '1999')
         self.assertEqual(dateData['display_date'], '1999')
 
     def test_parse_uncertain_4(self):
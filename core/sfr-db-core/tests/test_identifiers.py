@@ -2,15 +2,13 @@ import unittest
 from unittest.mock import MagicMock
 
 from sfrCore.helpers import DataError
-from sfrCore.model import Identifier
+from sfrCore.model import Identifier, Instance, Item, Work
 
 
 class TestIdentifiers(unittest.TestCase):
     def test_found_single_identifier(self):
         mock_session = MagicMock()
-        mock_session.execute.return_value = [(1,)]
-        mock_instance = MagicMock()
-        mock_instance.__tablename__ = 'testing'
+        mock_session.execute.return_value = [(1, 'isbn', '1234567890')]
         ids = [
             {
                 'identifier': '1234567890',
@@ -18,14 +16,13 @@ class TestIdentifiers(unittest.TestCase):
             }
         ]
 
-        result = Identifier.getByIdentifier(mock_instance, mock_session, ids)
+        result = Identifier.getByIdentifier(Work, mock_session, ids)
         self.assertEqual(result, 1)
+        mock_session.execute.assert_called_once()
 
     def test_new_identifier(self):
         mock_session = MagicMock()
         mock_session.execute.return_value = []
-        mock_instance = MagicMock()
-        mock_instance.__tablename__ = 'testing'
         ids = [
             {
                 'identifier': '1234567890',
@@ -33,14 +30,12 @@ class TestIdentifiers(unittest.TestCase):
             }
         ]
 
-        result = Identifier.getByIdentifier(mock_instance, mock_session, ids)
+        result = Identifier.getByIdentifier(Instance, mock_session, ids)
         self.assertEqual(result, None)
 
     def test_generic_identifier(self):
         mock_session = MagicMock()
-        mock_session.execute.return_value = [(1,)]
-        mock_instance = MagicMock()
-        mock_instance.__tablename__ = 'testing'
+        mock_session.execute.return_value = [(1, 'generic', '123456789')]
         ids = [
             {
                 'identifier': '123456789',
@@ -48,35 +43,92 @@ class TestIdentifiers(unittest.TestCase):
             }
         ]
 
-        result = Identifier.getByIdentifier(mock_instance, mock_session, ids)
+        result = Identifier.getByIdentifier(Work, mock_session, ids)
         self.assertEqual(result, 1)
 
     def test_skip_identifier(self):
         mock_session = MagicMock()
-        mock_session.execute.return_value = [(1,)]
-        mock_instance = MagicMock()
-        mock_instance.__tablename__ = 'testing'
+        mock_session.execute.return_value = [(1, 'isbn', '1234567890')]
         ids = [
             {
                 'identifier': '1234567890',
                 'type': 'isbn'
             }, {
-                'identifier': '999.99',
+                'identifier': '0000',
                 'type': 'ddc'
+            }, {
+                'identifier': '1',
+                'type': 'unknown'
             }
         ]
 
-        result = Identifier.getByIdentifier(mock_instance, mock_session, ids)
+        result = Identifier.getByIdentifier(Work, mock_session, ids)
         self.assertEqual(result, 1)
+        query = str(mock_session.execute.call_args[0][0])
+        self.assertIn('isbn', query)
+        self.assertNotIn('ddc', query)
+
+    def test_match_identifier_sets(self):
+        mock_session = MagicMock()
+        mock_session.execute.return_value = [
+            (1, 'isbn', '1234567890'),
+            (2, 'oclc', '0987654321'),
+            (1, 'oclc', '0987654321')
+        ]
+        idenSets = [
+            [{'identifier': '1234567890', 'type': 'isbn'}],
+            [{'identifier': '0987654321', 'type': 'oclc'}],
+            [{'identifier': '1111111111', 'type': 'isbn'}],
+            []
+        ]
+
+        results = Identifier.matchIdentifiers(Work, mock_session, idenSets)
+        self.assertEqual(results, [1, 2, None, None])
+        mock_session.execute.assert_called_once()
+
+    def test_identifier_keys(self):
+        keys = Identifier.identifierKeys([
+            {'identifier': '1234567890', 'type': 'isbn'},
+            {'identifier': '0000', 'type': 'isbn'},
+            {'identifier': '1', 'type': 'unknown'}
+        ])
+        self.assertEqual(keys, set([('isbn', '1234567890')]))
+
+    def test_no_valid_identifiers(self):
+        mock_session = MagicMock()
+        ids = [{'identifier': '0000', 'type': 'isbn'}]
+
+        result = Identifier.getByIdentifier(Work, mock_session, ids)
+        self.assertEqual(result, None)
+        mock_session.execute.assert_not_called()
 
     def test_multi_identifier(self):
         mock_session = MagicMock()
-        mock_session.execute.side_effect = [
-            [(1,), (2,)],
-            [(1,)]
+        mock_session.execute.return_value = [
+            (2, 'isbn', '1234567890'),
+            (1, 'isbn', '1234567890'),
+            (1, 'oclc', '0987654321')
+        ]
+        ids = [
+            {
+                'identifier': '1234567890',
+                'type': 'isbn'
+            }, {
+                'identifier': '0987654321',
+                'type': 'oclc'
+            }
+        ]
+
+        result = Identifier.getByIdentifier(Work, mock_session, ids)
+        self.assertEqual(result, 1)
+        mock_session.execute.assert_called_once()
+
+    def test_multi_identifier_tie(self):
+        mock_session = MagicMock()
+        mock_session.execute.return_value = [
+            (2, 'oclc', '0987654321'),
+            (1, 'isbn', '1234567890')
         ]
-        mock_instance = MagicMock()
-        mock_instance.__tablename__ = 'test_table'
         ids = [
             {
                 'identifier': '1234567890',
@@ -87,9 +139,65 @@ class TestIdentifiers(unittest.TestCase):
             }
         ]
 
-        result = Identifier.getByIdentifier(mock_instance, mock_session, ids)
+        result = Identifier.getByIdentifier(Item, mock_session, ids)
         self.assertEqual(result, 1)
 
+    def test_upsert_identifiers(self):
+        mock_session = MagicMock()
+        mock_session.execute.side_effect = [
+            [('1', 10)],          # Existing ISBN lookup
+            [(20,)],              # New core identifier row
+            [('2', 20)],          # New ISBN row
+            [('3', 30)]           # Existing OCLC lookup
+        ]
+        mock_isbn1 = MagicMock(id=10)
+        mock_isbn2 = MagicMock(id=20)
+        mock_oclc = MagicMock(id=30)
+        mock_session.query().filter().all.return_value = [
+            mock_oclc, mock_isbn2, mock_isbn1
+        ]
+
+        result = Identifier.upsertIdentifiers(mock_session, [
+            {'type': 'isbn', 'identifier': '1'},
+            {'type': 'isbn', 'identifier': '2'},
+            {'type': 'oclc', 'identifier': '3'},
+            {'type': 'isbn', 'identifier': '1'},
+            {'type': 'oclc', 'identifier': '0000'}
+        ])
+        self.assertEqual(result, [mock_isbn1, mock_isbn2, mock_oclc])
+        self.assertEqual(mock_session.execute.call_count, 4)
+
+    def test_upsert_identifiers_conflict(self):
+        mock_session = MagicMock()
+        mock_session.execute.side_effect = [
+            [],                   # No existing identifiers
+            [(20,), (21,)],       # New core identifier rows
+            [('1', 20)],          # Only first value inserted
+            None,                 # Delete unused core row
+            [('2', 15)]           # Concurrently inserted value
+        ]
+        mock_iden1 = MagicMock(id=20)
+        mock_iden2 = MagicMock(id=15)
+        mock_session.query().filter().all.return_value = [
+            mock_iden1, mock_iden2
+        ]
+
+        result = Identifier.upsertIdentifiers(mock_session, [
+            {'type': 'lccn', 'identifier': '1'},
+            {'type': 'lccn', 'identifier': '2'}
+        ])
+        self.assertEqual(result, [mock_iden1, mock_iden2])
+        deleteStmt = mock_session.execute.call_args_list[3][0][0]
+        self.assertEqual(
+            deleteStmt.compile().params, {'id_1': 21}
+        )
+
+    def test_upsert_identifiers_empty(self):
+        mock_session = MagicMock()
+        result = Identifier.upsertIdentifiers(mock_session, [])
+        self.assertEqual(result, [])
+        mock_session.execute.assert_not_called()
+
     def test_clean_id(self):
         testIden = {'identifier': 'id (test)', 'type': 'testing'}
         clean = Identifier._cleanIdentifier(testIden)
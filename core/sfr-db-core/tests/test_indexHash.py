@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock
+from uuid import UUID
+
+from sqlalchemy.dialects import postgresql
+
+from sfrCore.model import IndexHash
+
+
+class IndexHashTest(unittest.TestCase):
+    def test_index_hash_repr(self):
+        testHash = IndexHash()
+        testHash.work_uuid = 'testUUID'
+        testHash.doc_hash = 'testHash'
+        self.assertEqual(
+            str(testHash), '<IndexHash(work=testUUID, hash=testHash)>'
+        )
+
+    def test_lookup_hashes(self):
+        mock_session = MagicMock()
+        mock_row = MagicMock()
+        mock_row.work_uuid = UUID('00000000-0000-0000-0000-000000000001')
+        mock_row.doc_hash = 'docHash'
+        mock_row.field_hashes = {'title': 'titleHash'}
+        mock_session.query().filter().all.return_value = [mock_row]
+        res = IndexHash.lookupHashes(mock_session, ['uuid1'])
+        self.assertEqual(res, {
+            '00000000-0000-0000-0000-000000000001': (
+                'docHash', {'title': 'titleHash'}
+            )
+        })
+
+    def test_upsert_hashes(self):
+        mock_session = MagicMock()
+        IndexHash.upsertHashes(mock_session, {
+            '00000000-0000-0000-0000-000000000001': (
+                'docHash', {'title': 'titleHash'}
+            )
+        })
+        upsertStmt = mock_session.execute.call_args[0][0]
+        upsertSQL = str(upsertStmt.compile(dialect=postgresql.dialect()))
+        self.assertIn('INSERT INTO index_hashes', upsertSQL)
+        self.assertIn('ON CONFLICT (work_uuid) DO UPDATE', upsertSQL)
+
+    def test_upsert_hashes_empty(self):
+        mock_session = MagicMock()
+        IndexHash.upsertHashes(mock_session, {})
+        mock_session.execute.assert_not_called()
+
+    def test_delete_hashes(self):
+        mock_session = MagicMock()
+        IndexHash.deleteHashes(mock_session, ['uuid1'])
+        mock_session.query().filter().delete.assert_called_once_with(
+            synchronize_session=False
+        )
+
+    def test_clear_hashes(self):
+        mock_session = MagicMock()
+        IndexHash.clearHashes(mock_session)
+        mock_session.query().delete.assert_called_once_with(
+            synchronize_session=False
+        )
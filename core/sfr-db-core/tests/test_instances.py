@@ -3,7 +3,6 @@ from unittest.mock import patch, MagicMock, call, DEFAULT
 
 from sfrCore.model import Instance
 from sfrCore.model.instance import AgentInstances
-from sfrCore.helpers.errors import DataError
 
 
 class InstanceTest(unittest.TestCase):
@@ -98,6 +97,7 @@ class InstanceTest(unittest.TestCase):
         testInstance = Instance()
         with patch.multiple(Instance,
                             cleanData=DEFAULT,
+                            collectAgents=DEFAULT,
                             addAgents=DEFAULT,
                             addIdentifiers=DEFAULT,
                             addAltTitles=DEFAULT,
@@ -124,6 +124,7 @@ class InstanceTest(unittest.TestCase):
                             setWorkFields=DEFAULT,
                             createTmpRelations=DEFAULT,
                             cleanData=DEFAULT,
+                            collectAgents=DEFAULT,
                             updateAgents=DEFAULT,
                             addIdentifiers=DEFAULT,
                             updateAltTitles=DEFAULT,
@@ -184,30 +185,42 @@ class InstanceTest(unittest.TestCase):
         testInstance.tmp_agents = ['agent1', 'agent2', 'agent3']
         testInstance.updateAgents()
         mock_update.assert_has_calls([
-            call('agent1'),
-            call('agent2'),
-            call('agent3')
+            call('agent1', set()),
+            call('agent2', set()),
+            call('agent3', set())
         ])
 
     @patch('sfrCore.model.instance.Agent')
     @patch('sfrCore.model.instance.AgentInstances')
     def test_update_agent(self, mock_agent_instances, mock_agent):
-        mock_agent.updateOrInsert.return_value = ('agent1', None)
-        mock_agent_instances.roleExists.return_value = None
+        mock_agent_rec = MagicMock(id=1)
+        mock_agent.updateOrInsert.return_value = (mock_agent_rec, None)
         test_agent = {'name': 'agent1'}
         mockSession = MagicMock()
         testInstance = Instance(session=mockSession)
-        testInstance.updateAgent(test_agent)
-        mock_agent_instances.assert_has_calls([
-            call.roleExists(mockSession, 'agent1', 'author', None),
-            call(agent='agent1', instance=testInstance, role='author')
-        ])
+        existingRoles = set()
+        testInstance.updateAgent(test_agent, existingRoles)
+        mock_agent_instances.assert_called_once_with(
+            agent=mock_agent_rec, instance=testInstance, role='author'
+        )
         mockSession.add.assert_called_once()
+        self.assertEqual(existingRoles, set([(1, 'author')]))
+
+    @patch('sfrCore.model.instance.Agent')
+    @patch('sfrCore.model.instance.AgentInstances')
+    def test_update_agent_existing(self, mock_agent_instances, mock_agent):
+        mock_agent.updateOrInsert.return_value = (MagicMock(id=1), None)
+        mockSession = MagicMock()
+        testInstance = Instance(session=mockSession)
+        testInstance.updateAgent({'name': 'agent1'}, set([(1, 'author')]))
+        mock_agent_instances.assert_not_called()
+        mockSession.add.assert_not_called()
 
-    @patch('sfrCore.model.Instance.upsertIdentifier')
+    @patch('sfrCore.model.instance.Identifier.upsertIdentifiers')
     @patch('sfrCore.model.Instance.fetchUnglueitSummary')
-    def test_add_identifiers(self, mock_unglue, mock_identifier):
+    def test_add_identifiers(self, mock_unglue, mock_upsert):
         testInst = Instance()
+        testInst.session = 'session'
         testInst.tmp_identifiers = [
             {'identifier': 'id1', 'type': 'test'},
             {'identifier': 'id2', 'type': 'isbn'}
@@ -219,39 +232,17 @@ class InstanceTest(unittest.TestCase):
         mockISBNValue = MagicMock()
         mockISBNValue.value = 'testISBN'
         mockTestISBN.isbn = [mockISBNValue]
-        mock_identifier.side_effect = [
-            mockTestID,
-            mockTestISBN
-        ]
+        mock_upsert.return_value = [mockTestID, mockTestISBN]
 
         testInst.addIdentifiers()
         # mock_unglue.assert_called_once_with('testISBN')
         mock_unglue.assert_not_called()  # Temporarily disabled for performance
-        mock_identifier.assert_has_calls([
-            call(testInst.tmp_identifiers[0]),
-            call(testInst.tmp_identifiers[1])
-        ])
-
-    @patch('sfrCore.model.instance.Identifier.returnOrInsert', return_value=1)
-    def test_identifier_upsert(self, mock_returnOrInsert):
-        testInst = Instance()
-        newIden = testInst.upsertIdentifier({
-            'type': 'test',
-            'identifier': 1
-        })
-        self.assertEqual(newIden, 1)
-
-    @patch(
-        'sfrCore.model.instance.Identifier.returnOrInsert',
-        side_effect=DataError('Test Error')
-    )
-    def test_identifier_upsert_err(self, mock_returnOrInsert):
-        testInst = Instance()
-        newIden = testInst.upsertIdentifier({
-            'type': 'test',
-            'identifier': 1
-        })
-        self.assertEqual(newIden, None)
+        mock_upsert.assert_called_once_with(
+            'session', testInst.tmp_identifiers
+        )
+        self.assertEqual(
+            testInst.identifiers, set([mockTestID, mockTestISBN])
+        )
 
     @patch('sfrCore.model.instance.AltTitle', return_value='test_title')
     @patch.object(Instance, 'alt_titles', return_value=set('test_title'))
@@ -191,14 +191,18 @@ class ItemTest(unittest.TestCase):
     @patch('sfrCore.model.item.Identifier')
     def test_add_identifiers(self, mock_identifier):
         testItem = Item()
+        testItem.session = 'session'
         testItem.tmp_identifiers = ['id1', 'id2']
 
-        mock_identifier.returnOrInsert.side_effect = [
+        mock_identifier.upsertIdentifiers.return_value = [
             MagicMock(), MagicMock()
         ]
 
         testItem.addIdentifiers()
         self.assertEqual(len(testItem.identifiers), 2)
+        mock_identifier.upsertIdentifiers.assert_called_once_with(
+            'session', ['id1', 'id2']
+        )
     
     @patch.object(Item, 'addAgent')
     def test_add_agents(self, mock_add):
@@ -1,27 +1,46 @@
 import unittest
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 
 from sfrCore.model import Language
+from sfrCore.model.core import ReferenceCache
 from sfrCore.helpers import DataError
 
 
 class TestLanguage(unittest.TestCase):
 
+    @patch.object(Language, 'CACHE')
     @patch.object(Language, 'lookupLanguage', return_value=None)
     @patch.object(Language, 'insert', return_value='test_language')
-    def test_check_new(self, mock_insert, mock_lookup):
-        res = Language.updateOrInsert('session', {'language': 'test_language'})
-        mock_lookup.expect_to_be_called()
+    def test_check_new(self, mock_insert, mock_lookup, mock_cache):
+        mock_cache.get.return_value = None
+        res = Language.updateOrInsert('session', {'iso_3': 'tes'})
+        mock_lookup.assert_called_once_with('session', {'iso_3': 'tes'})
+        mock_cache.add.assert_called_once_with('session', 'test_language')
         self.assertEqual(res[0], 'test_language')
-    
+
+    @patch.object(Language, 'CACHE')
     @patch.object(Language, 'lookupLanguage', return_value='test_language')
-    def test_check_existing(self, mock_lookup):
-        res = Language.updateOrInsert('session', {'language': 'test_language'})
+    def test_check_existing(self, mock_lookup, mock_cache):
+        mock_cache.get.return_value = None
+        res = Language.updateOrInsert('session', {'iso_3': 'tes'})
         self.assertEqual(res[0], 'test_language')
 
-    @patch.object(Language, 'loadFromString', return_value='test_language')
+    @patch.object(Language, 'CACHE')
+    @patch.object(Language, 'lookupLanguage')
+    def test_check_cached(self, mock_lookup, mock_cache):
+        mock_cache.get.return_value = 'cached_language'
+        res = Language.updateOrInsert('session', {'iso_3': 'tes'})
+        mock_cache.preload.assert_called_once_with('session')
+        mock_lookup.assert_not_called()
+        self.assertEqual(res[0], 'cached_language')
+
+    @patch.object(Language, 'CACHE')
+    @patch.object(
+        Language, 'loadFromString', return_value=[{'iso_3': 'tes'}]
+    )
     @patch.object(Language, 'lookupLanguage', return_value='test_language')
-    def test_check_string(self, mock_lookup, mock_string):
+    def test_check_string(self, mock_lookup, mock_string, mock_cache):
+        mock_cache.get.return_value = None
         res = Language.updateOrInsert('session', 'test_language')
         self.assertEqual(res[0], 'test_language')
 
@@ -56,6 +75,12 @@ class TestLanguage(unittest.TestCase):
         lang = Language.loadFromString('english')
         self.assertEqual(lang[0]['language'], 'English')
     
+    def test_load_memoized(self):
+        first = Language.loadFromString('fre')
+        first[0]['language'] = 'Altered'
+        second = Language.loadFromString('fre')
+        self.assertEqual(second[0]['language'], 'French')
+
     def test_missing_load(self):
         lang = Language.loadFromString('test')
         self.assertEqual(lang, [])
@@ -74,3 +99,51 @@ class TestLanguage(unittest.TestCase):
             if l is not None
         ])
         self.assertListEqual(langList, ['French'])
+
+    def test_cache_add_register(self):
+        testCache = ReferenceCache(
+            Language, ['id', 'iso_3'], lambda lang: lang.iso_3
+        )
+        newLang = Language(iso_3='tes')
+        testCache.add('session', newLang)
+        self.assertEqual(testCache.get('session', 'tes'), newLang)
+        self.assertEqual(len(testCache.entries), 0)
+
+        newLang.id = 1
+        testCache.register(newLang)
+        self.assertEqual(testCache.entries['tes'], {'id': 1, 'iso_3': 'tes'})
+
+    def test_cache_get_new_session(self):
+        testCache = ReferenceCache(
+            Language, ['id', 'iso_3'], lambda lang: lang.iso_3
+        )
+        testCache.register(Language(id=1, iso_3='tes'))
+        mock_session = MagicMock()
+        mock_session.merge.side_effect = lambda rec, load: rec
+        cachedLang = testCache.get(mock_session, 'tes')
+        self.assertEqual(cachedLang.id, 1)
+        self.assertEqual(testCache.get(mock_session, 'tes'), cachedLang)
+        mock_session.merge.assert_called_once()
+        mock_session.query.assert_not_called()
+        self.assertEqual(testCache.get(mock_session, 'oth'), None)
+
+    def test_cache_preload(self):
+        testCache = ReferenceCache(
+            Language, ['id', 'iso_3'], lambda lang: lang.iso_3
+        )
+        mock_session = MagicMock()
+        mock_session.query().all.return_value = [
+            Language(id=1, iso_3='tes'), Language(id=2, iso_3='oth')
+        ]
+        testCache.preload(mock_session)
+        testCache.preload(mock_session)
+        mock_session.query().all.assert_called_once()
+        self.assertEqual(testCache.get(mock_session, 'oth').id, 2)
+
+    def test_cache_evict(self):
+        testCache = ReferenceCache(
+            Language, ['id', 'iso_3'], lambda lang: lang.iso_3, maxSize=1
+        )
+        testCache.register(Language(id=1, iso_3='tes'))
+        testCache.register(Language(id=2, iso_3='oth'))
+        self.assertEqual(list(testCache.entries.keys()), ['oth'])
@@ -28,6 +28,29 @@ class LinkTest(unittest.TestCase):
         testLink = Link.updateOrInsert('session', fakeLink, 'testing', 1)
         self.assertEqual(testLink, mock_existing)
 
+    def test_link_updateInsert_existing(self):
+        mock_existing = MagicMock()
+        existing = Link.mapLinks([MagicMock(url='testing')])
+        existing['testing'] = mock_existing
+        testLink = Link.updateOrInsert(
+            'session', {'url': 'https://Testing'}, 'testing', 1,
+            existing=existing
+        )
+        self.assertEqual(testLink, mock_existing)
+        mock_existing.update.assert_called_once()
+
+    def test_link_updateInsert_existing_new(self):
+        existing = {}
+        testLink = Link.updateOrInsert(
+            'session', {'url': 'http://testing'}, 'testing', 1,
+            existing=existing
+        )
+        self.assertEqual(existing['testing'], testLink)
+
+    def test_map_links(self):
+        linkMap = Link.mapLinks([Link(url='https://test1'), Link(url='test2')])
+        self.assertEqual(sorted(linkMap.keys()), ['test1', 'test2'])
+
     def test_link_update(self):
         testLink = Link()
         testLink.url = 'oldURL'
@@ -2,6 +2,7 @@ import unittest
 from unittest.mock import patch, MagicMock, call
 
 from sfrCore.model import Measurement
+from sfrCore.helpers import DataError
 
 class MeasurementTest(unittest.TestCase):
     def test_measure_repr(self):
@@ -25,6 +26,38 @@ class MeasurementTest(unittest.TestCase):
         testMeasure = Measurement.updateOrInsert('session', fakeMeasure, 'testing', 1)
         self.assertEqual(testMeasure, mock_existing)
     
+    def test_measure_updateInsert_existing(self):
+        mock_existing = MagicMock(quantity='test', source_id='src')
+        existing = Measurement.mapMeasurements([mock_existing])
+        fakeMeasure = {'quantity': 'test', 'source_id': 'src'}
+        testMeasure = Measurement.updateOrInsert(
+            'session', fakeMeasure, 'testing', 1, existing=existing
+        )
+        self.assertEqual(testMeasure, mock_existing)
+        mock_existing.update.assert_called_once_with(fakeMeasure)
+
+    def test_measure_updateInsert_existing_new(self):
+        existing = Measurement.mapMeasurements([])
+        fakeMeasure = {'quantity': 'test', 'source_id': 'src'}
+        testMeasure = Measurement.updateOrInsert(
+            'session', fakeMeasure, 'testing', 1, existing=existing
+        )
+        self.assertIsInstance(testMeasure, Measurement)
+        self.assertEqual(existing[('test', 'src')], [testMeasure])
+
+    def test_measure_find_duplicate(self):
+        mock_model = MagicMock()
+        mock_model.__tablename__ = 'testing'
+        existing = Measurement.mapMeasurements([
+            MagicMock(quantity='test', source_id='src'),
+            MagicMock(quantity='test', source_id='src')
+        ])
+        with self.assertRaises(DataError):
+            Measurement.findMeasure(
+                existing, {'quantity': 'test', 'source_id': 'src'},
+                mock_model, 1
+            )
+
     def test_measure_insert(self):
         testMeasure = Measurement.insert({'quantity': 'test'})
         self.assertIsInstance(testMeasure, Measurement)
@@ -0,0 +1,169 @@
+from threading import Lock
+import unittest
+from unittest.mock import patch
+
+from sfrCore.lib import OutputWriter
+
+
+class StubKinesisClient():
+    """Accepts put_records calls, failing each record the number of times
+    given by its Data value"""
+    def __init__(self):
+        self.calls = []
+        self.attempts = {}
+        self.lock = Lock()
+
+    def put_records(self, Records, StreamName):
+        with self.lock:
+            self.calls.append(Records)
+            results = []
+            for rec in Records:
+                attempt = self.attempts.get(rec['PartitionKey'], 0)
+                self.attempts[rec['PartitionKey']] = attempt + 1
+                if attempt < int(rec['Data']):
+                    results.append({
+                        'ErrorCode': 'ProvisionedThroughputExceededException'
+                    })
+                else:
+                    results.append({'SequenceNumber': '1', 'ShardId': '1'})
+
+        return {
+            'FailedRecordCount': len([r for r in results if 'ErrorCode' in r]),
+            'Records': results
+        }
+
+
+class StubSQSClient():
+    """Fails messages with a body of 'retry' once and rejects those with a
+    body of 'invalid'"""
+    def __init__(self):
+        self.calls = []
+
+    def send_message_batch(self, QueueUrl, Entries):
+        self.calls.append(Entries)
+        failed = []
+        for entry in Entries:
+            if entry['MessageBody'] == 'invalid':
+                failed.append({'Id': entry['Id'], 'SenderFault': True})
+            elif entry['MessageBody'] == 'retry' and len(self.calls) == 1:
+                failed.append({'Id': entry['Id'], 'SenderFault': False})
+
+        return {'Successful': [], 'Failed': failed}
+
+
+@patch('sfrCore.lib.outputWriter.time.sleep')
+class OutputWriterTest(unittest.TestCase):
+    def test_putRecords_chunks(self, mock_sleep):
+        stub = StubKinesisClient()
+        testWriter = OutputWriter(kinesisClient=stub)
+        records = [
+            {'Data': '0', 'PartitionKey': str(i)} for i in range(1201)
+        ]
+
+        failed = testWriter.putRecords('testStream', records)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(
+            sorted(len(call) for call in stub.calls), [201, 500, 500]
+        )
+        self.assertEqual(testWriter.metrics['testStream']['sent'], 1201)
+        self.assertEqual(testWriter.metrics['testStream']['requests'], 3)
+        mock_sleep.assert_not_called()
+
+    def test_chunkEntries_bytes(self, mock_sleep):
+        records = [
+            {'Data': '0' * 1048000, 'PartitionKey': str(i)} for i in range(6)
+        ]
+
+        chunks = OutputWriter.chunkEntries(
+            records, 500, OutputWriter.KINESIS_MAX_BYTES,
+            OutputWriter.recordSize
+        )
+
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 1])
+
+    def test_putRecords_retry_failed(self, mock_sleep):
+        stub = StubKinesisClient()
+        testWriter = OutputWriter(kinesisClient=stub)
+        records = [
+            {'Data': '0', 'PartitionKey': '1'},
+            {'Data': '2', 'PartitionKey': '2'},
+            {'Data': '0', 'PartitionKey': '3'}
+        ]
+
+        failed = testWriter.putRecords('testStream', records)
+
+        self.assertEqual(failed, [])
+        self.assertEqual(stub.calls[1], [records[1]])
+        self.assertEqual(stub.calls[2], [records[1]])
+        self.assertEqual(testWriter.metrics['testStream']['retried'], 2)
+        self.assertEqual(mock_sleep.call_count, 2)
+        self.assertEqual(mock_sleep.call_args[0][0], 0.2)
+
+    def test_putRecords_retries_exhausted(self, mock_sleep):
+        stub = StubKinesisClient()
+        testWriter = OutputWriter(kinesisClient=stub)
+        testWriter.maxRetries = 2
+        records = [
+            {'Data': '5', 'PartitionKey': '1'},
+            {'Data': '0', 'PartitionKey': '2'}
+        ]
+
+        failed = testWriter.putRecords('testStream', records)
+
+        self.assertEqual(failed, [records[0]])
+        self.assertEqual(len(stub.calls), 3)
+        self.assertEqual(testWriter.metrics['testStream']['failed'], 1)
+        self.assertEqual(testWriter.metrics['testStream']['sent'], 1)
+
+    def test_putRecords_oversized(self, mock_sleep):
+        stub = StubKinesisClient()
+        testWriter = OutputWriter(kinesisClient=stub)
+        bigRecord = {'Data': '0' * 1048576, 'PartitionKey': '1'}
+
+        failed = testWriter.putRecords('testStream', [bigRecord])
+
+        self.assertEqual(failed, [bigRecord])
+        self.assertEqual(stub.calls, [])
+
+    def test_putRecords_error(self, mock_sleep):
+        stub = StubKinesisClient()
+        stub.put_records = None
+        testWriter = OutputWriter(kinesisClient=stub)
+
+        with self.assertRaises(TypeError):
+            testWriter.putRecords(
+                'testStream', [{'Data': '0', 'PartitionKey': '1'}]
+            )
+
+    def test_sendMessages(self, mock_sleep):
+        stub = StubSQSClient()
+        testWriter = OutputWriter(sqsClient=stub)
+        testWriter.workers = 1
+        messages = ['msg{}'.format(i) for i in range(12)]
+
+        failed = testWriter.sendMessages('testQueue', messages)
+
+        self.assertEqual(failed, [])
+        self.assertEqual([len(call) for call in stub.calls], [10, 2])
+        self.assertEqual(
+            stub.calls[1],
+            [
+                {'MessageBody': 'msg10', 'Id': '0'},
+                {'MessageBody': 'msg11', 'Id': '1'}
+            ]
+        )
+
+    def test_sendMessages_failures(self, mock_sleep):
+        stub = StubSQSClient()
+        testWriter = OutputWriter(sqsClient=stub)
+
+        failed = testWriter.sendMessages(
+            'testQueue', ['msg1', 'retry', 'invalid']
+        )
+
+        self.assertEqual(failed, ['invalid'])
+        self.assertEqual(
+            stub.calls[1], [{'MessageBody': 'retry', 'Id': '0'}]
+        )
+        self.assertEqual(testWriter.metrics['testQueue']['sent'], 2)
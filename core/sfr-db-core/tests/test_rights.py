@@ -38,6 +38,34 @@ class TestRights(unittest.TestCase):
             self.assertEqual(res, mock_rights)
 
 
+    def test_check_existing_map(self):
+        mock_rights = MagicMock()
+        existing = Rights.mapRights([MagicMock(source='test')])
+        existing['test'] = mock_rights
+        with patch.object(Rights, 'lookupRights') as mock_lookup:
+            res = Rights.updateOrInsert(
+                'session',
+                {'source': 'test', 'license': 'new_uri'},
+                'Rights',
+                1,
+                existing=existing
+            )
+            mock_lookup.assert_not_called()
+        self.assertEqual(res, mock_rights)
+
+    @patch.object(Rights, 'insert', return_value='newRights')
+    def test_check_new_map(self, mock_insert):
+        existing = {}
+        res = Rights.updateOrInsert(
+            'session',
+            {'source': 'test', 'license': 'new_uri'},
+            'Rights',
+            1,
+            existing=existing
+        )
+        self.assertEqual(res, 'newRights')
+        self.assertEqual(existing['test'], 'newRights')
+
     def test_update_rights(self):
         testRights = Rights()
         testRights.source = 'test'
@@ -10,20 +10,37 @@ class SubjectTest(unittest.TestCase):
         testSubject.subject = 'subject'
         self.assertEqual(str(testSubject), '<Subject(subject=subject, uri=None, authority=test)>')
     
+    @patch.object(Subject, 'CACHE')
     @patch.object(Subject, 'lookupSubject', return_value=None)
     @patch.object(Subject, 'insert', return_value='newSubject')
-    def test_subject_updateInsert_insert(self, mock_insert, mock_lookup):
+    def test_subject_updateInsert_insert(self, mock_insert, mock_lookup, mock_cache):
+        mock_cache.get.return_value = None
         fakeSubject = {'authority': 'test'}
         testSubject = Subject.updateOrInsert('session', fakeSubject)
         self.assertEqual(testSubject, 'newSubject')
+        mock_cache.add.assert_called_once_with('session', 'newSubject')
     
+    @patch.object(Subject, 'CACHE')
     @patch.object(Subject, 'lookupSubject')
-    def test_measure_updateInsert_update(self, mock_lookup):
+    def test_measure_updateInsert_update(self, mock_lookup, mock_cache):
+        mock_cache.get.return_value = None
         fakeSubject = {'authority': 'test'}
         mock_existing = MagicMock()
         mock_lookup.return_value = mock_existing
         testSubject = Subject.updateOrInsert('session', fakeSubject)
         self.assertEqual(testSubject, mock_existing)
+
+    @patch.object(Subject, 'CACHE')
+    @patch.object(Subject, 'lookupSubject')
+    def test_subject_updateInsert_cached(self, mock_lookup, mock_cache):
+        mock_existing = MagicMock()
+        mock_cache.get.return_value = mock_existing
+        fakeSubject = {'authority': 'test', 'subject': 'subj'}
+        testSubject = Subject.updateOrInsert('session', fakeSubject)
+        mock_cache.get.assert_called_once_with('session', ('test', 'subj'))
+        mock_lookup.assert_not_called()
+        mock_existing.update.assert_called_once_with('session', fakeSubject, [])
+        self.assertEqual(testSubject, mock_existing)
     
     @patch.object(Subject, 'addMeasurements')
     def test_subject_insert(self, mock_measure):
@@ -47,4 +64,27 @@ class SubjectTest(unittest.TestCase):
             .filter().filter()\
             .one_or_none.return_value = 'testSubject'
         testSubject = Subject.lookupSubject(mock_session, {'authority': 'test', 'subject': 'subj'})
-        self.assertEqual(testSubject, 'testSubject')
\ No newline at end of file
+        self.assertEqual(testSubject, 'testSubject')
+
+    @patch.object(Subject, 'CACHE')
+    def test_prefetch_subjects(self, mock_cache):
+        mock_cache.get.side_effect = lambda session, key: (
+            'cached' if key == ('test', 'cached') else None
+        )
+        mock_session = MagicMock()
+        mock_session.query().filter().all.return_value = ['subj1']
+        Subject.prefetchSubjects(mock_session, [
+            {'authority': 'test', 'subject': 'cached'},
+            {'authority': 'test', 'subject': 'new'},
+            {'authority': None, 'subject': 'none'}
+        ])
+        mock_cache.add.assert_called_once_with(mock_session, 'subj1')
+
+    @patch.object(Subject, 'CACHE')
+    def test_prefetch_subjects_all_cached(self, mock_cache):
+        mock_cache.get.return_value = 'cached'
+        mock_session = MagicMock()
+        Subject.prefetchSubjects(
+            mock_session, [{'authority': 'test', 'subject': 'cached'}]
+        )
+        mock_session.query.assert_not_called()
@@ -5,6 +5,7 @@ from unittest.mock import patch, MagicMock, call, DEFAULT
 from sqlalchemy.orm.exc import NoResultFound
 
 from sfrCore.model.work import Work, AgentWorks
+from sfrCore.model.instance import Instance
 from sfrCore.model.date import DateField
 
 from sfrCore.helpers import DataError, DBError
@@ -59,6 +60,7 @@ class WorkTest(unittest.TestCase):
             createTmpRelations=DEFAULT,
             addImportJson=DEFAULT,
             addIdentifiers=DEFAULT,
+            collectAgents=DEFAULT,
             addInstances=DEFAULT,
             addAgents=DEFAULT,
             addAltTitles=DEFAULT,
@@ -88,6 +90,7 @@ class WorkTest(unittest.TestCase):
             addImportJson=DEFAULT,
             addTitles=DEFAULT,
             updateIdentifiers=DEFAULT,
+            collectAgents=DEFAULT,
             updateInstances=DEFAULT,
             updateAgents=DEFAULT,
             updateSubjects=DEFAULT,
@@ -261,57 +264,51 @@ class WorkTest(unittest.TestCase):
         matchedInstance = testWork.matchLocalInstance(testInstance, testDict)
         self.assertEqual(matchedInstance, None)
 
-    @patch.object(Work, 'addIdentifier')
-    def test_add_identifiers(self, mock_add):
+    def test_collect_agents(self):
         testWork = Work()
+        testWork.tmp_agents = [{'name': 'work'}]
+        testWork.tmp_instances = [
+            {
+                'agents': [{'name': 'instance'}],
+                'formats': [{'agents': [{'name': 'item'}]}, 'other']
+            },
+            {'agents': None},
+            MagicMock()
+        ]
+        self.assertEqual(
+            [a['name'] for a in testWork.collectAgents()],
+            ['work', 'instance', 'item']
+        )
+
+    @patch('sfrCore.model.work.Identifier')
+    def test_add_identifiers(self, mock_identifier):
+        testWork = Work()
+        testWork.session = 'session'
         testWork.tmp_identifiers = ['id1']
         mock_val = MagicMock()
         mock_val.value = 'testID'
-        mock_add.return_value = mock_val
+        mock_identifier.upsertIdentifiers.return_value = [mock_val]
 
         testWork.addIdentifiers()
         self.assertEqual(list(testWork.identifiers)[0].value, 'testID')
-    
-    @patch('sfrCore.model.work.Identifier')
-    def test_add_identifier(self, mock_identifier):
-        testWork = Work()
-        mock_id = MagicMock()
-        mock_id.value = 'id1'
-        mock_identifier.returnOrInsert.return_value = mock_id
+        mock_identifier.upsertIdentifiers.assert_called_once_with(
+            'session', ['id1']
+        )
 
-        testID = testWork.addIdentifier('id1')
-        self.assertEqual(testID.value, 'id1')
-    
     @patch('sfrCore.model.work.Identifier')
-    def test_add_identifier_err(self, mock_identifier):
-        testWork = Work()
-        mock_identifier.returnOrInsert.side_effect = DataError('test error')
-        testID = testWork.addIdentifier('id1')
-        self.assertEqual(testID, None)
-    
-    @patch.object(Work, 'updateIdentifier')
-    def test_update_identifiers(self, mock_update):
+    def test_update_identifiers(self, mock_identifier):
         testWork = Work()
-        testWork.tmp_identifiers = ['id1']
-        testWork.updateIdentifiers()
-        mock_update.assert_has_calls([call('id1')])
-    
-    @patch('sfrCore.model.work.Identifier')
-    def test_update_identifier(self, mock_identifier):
-        testWork = Work()
-        mock_id = MagicMock()
-        mock_id.value = 'id1'
-        mock_identifier.returnOrInsert.return_value = mock_id
+        testWork.session = 'session'
+        testWork.tmp_identifiers = ['id1', 'id2']
+        mock_existing = MagicMock()
+        mock_new = MagicMock()
+        testWork.identifiers.add(mock_existing)
+        mock_identifier.upsertIdentifiers.return_value = [
+            mock_existing, mock_new
+        ]
 
-        testWork.updateIdentifier('id1')
-        self.assertEqual(list(testWork.identifiers)[0].value, 'id1')
-    
-    @patch('sfrCore.model.work.Identifier')
-    def test_update_identifier_err(self, mock_identifier):
-        testWork = Work()
-        mock_identifier.returnOrInsert.side_effect = DataError('test error')
-        testWork.updateIdentifier('id1')
-        self.assertEqual(testWork.identifiers, set())
+        testWork.updateIdentifiers()
+        self.assertEqual(testWork.identifiers, set([mock_existing, mock_new]))
 
     @patch('sfrCore.model.work.Agent')
     @patch('sfrCore.model.work.AgentWorks')
@@ -459,6 +456,37 @@ class WorkTest(unittest.TestCase):
         testID = Work.lookupWork(mock_session, ['id1'], None)
         self.assertEqual(testID, None)
 
+    @patch('sfrCore.model.work.Identifier')
+    @patch.object(Work, 'getByUUID', return_value='uuid_work')
+    def test_lookup_works(self, mock_get_uuid, mock_iden):
+        mock_session = MagicMock()
+        mock_iden.matchIdentifiers.side_effect = [[1, None, None], [5, None]]
+        mock_session.query().filter().all.side_effect = [
+            [(5, 2)],
+            [MagicMock(id=1), MagicMock(id=2)]
+        ]
+        works = Work.lookupWorks(mock_session, [
+            (['id1'], None),
+            (['id2'], {'type': 'uuid', 'identifier': 'test_uuid'}),
+            (['id3'], None),
+            (['id4'], None)
+        ])
+        self.assertEqual(works[0].id, 1)
+        self.assertEqual(works[1], 'uuid_work')
+        self.assertEqual(works[2].id, 2)
+        self.assertEqual(works[3], None)
+        mock_iden.matchIdentifiers.assert_has_calls([
+            call(Work, mock_session, [['id1'], ['id3'], ['id4']]),
+            call(Instance, mock_session, [['id3'], ['id4']])
+        ])
+
+    def test_gather_agents(self):
+        agents = Work.gatherAgents(
+            [{'name': 'work'}],
+            [{'agents': [{'name': 'inst'}], 'formats': [{'agents': None}]}]
+        )
+        self.assertEqual(agents, [{'name': 'work'}, {'name': 'inst'}])
+
     @patch('sfrCore.model.work.uuid.UUID', return_value='test_uuid')
     def test_get_by_uuid(self, mock_uuid):
         mock_session = MagicMock()
@@ -487,6 +515,18 @@ class WorkTest(unittest.TestCase):
         role = AgentWorks.roleExists(mock_session, mock_agent, 'role', 1)
         self.assertEqual(role, 'test_role')
 
+    def test_map_roles(self):
+        existing = [
+            AgentWorks(role='author'),
+            AgentWorks(role='editor')
+        ]
+        existing[0].agent_id = 1
+        existing[1].agent_id = 2
+        self.assertEqual(
+            AgentWorks.mapRoles(existing),
+            set([(1, 'author'), (2, 'editor')])
+        )
+
     # Special test case to ensure that dates are handled properly
     def test_date_backref(self):
         testWork = Work()
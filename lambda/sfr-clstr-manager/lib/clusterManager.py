@@ -1,3 +1,5 @@
+from sqlalchemy import bindparam
+
 from helpers.errorHelpers import DataError
 from .kMeansModel import KModel
 from sfrCore import Work, Edition, Instance
@@ -27,42 +29,117 @@ class ClusterManager:
         mlModel = KModel(self.work.instances)
         mlModel.createDF()
         session.close()
-        mlModel.generateClusters()
+        # Only run k-means if instances remain that can't be exactly matched
+        if mlModel.groupExactMatches() > 1:
+            mlModel.generateClusters()
         self.editions = mlModel.parseEditions()
     
-    def deleteExistingEditions(self):
+    def reconcileEditions(self):
+        """Replace the existing editions of the work with the newly generated
+        clusters in a single transaction. Editions containing exactly the same
+        set of instances as an existing edition update that row in place, all
+        others are inserted and any remaining existing editions are removed.
+        """
         session = self.dbManager.createSession()
-        session.add(self.work)
-        self.logger.info('Deleting previous editions for {}'.format(self.work))
-        for ed in self.work.editions:
-            self.logger.debug('Deleting edition {}'.format(ed))
-            session.delete(ed)
-        session.commit()
-        session.close()
+        try:
+            existing, existingIDs = self.loadExistingEditions(session)
 
-    def storeEditions(self):
-        self.logger.debug('Adding new editions to session')
-        session = self.dbManager.createSession()
-        session.add(self.work)
-        session.add_all([
-            self.createEdition(session, ed)
-            for ed in self.editions
-        ])
-        session.commit()
-        session.close()
-    
-    def createEdition(self, session, edition):
-        self.logger.info('Creating edition for {}'.format(self.work))
-        merged = self.mergeInstances(edition)
-        self.logger.debug('Merged edition for {}|{}'.format(
-            merged.get('pubPlace', ''),
-            merged.get('pubDate', '')
-        ))
-        return Edition.createEdition(
-            merged,
-            self.work,
-            self.fetchInstances(session, merged.pop('rowIDs'))
-        )
+            updates = []
+            inserts = []
+            for edition in self.editions:
+                merged = self.mergeInstances(edition)
+                instIDs = frozenset(int(i) for i in merged.pop('rowIDs'))
+                editionRow = ClusterManager.createEditionRow(merged)
+                editionID = existing.pop(instIDs, None)
+                if editionID is not None:
+                    updates.append({'editionID': editionID, **editionRow})
+                else:
+                    inserts.append((instIDs, editionRow))
+
+            matchedIDs = set(u['editionID'] for u in updates)
+            staleIDs = [i for i in existingIDs if i not in matchedIDs]
+            self.logger.info(
+                'Updating {}, inserting {} and deleting {} editions'.format(
+                    len(updates), len(inserts), len(staleIDs)
+                )
+            )
+
+            self.applyEditionChanges(session, updates, inserts, staleIDs)
+            session.commit()
+        except Exception:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+    def loadExistingEditions(self, session):
+        """Return a dict of the current editions of the work keyed by the set
+        of instance ids they contain, along with the ids of every edition.
+        """
+        editionInstances = {}
+        for editionID, instanceID in session.query(Edition.id, Instance.id)\
+                .outerjoin(Instance, Instance.edition_id == Edition.id)\
+                .filter(Edition.work_id == self.work.id)\
+                .all():
+            editionInstances.setdefault(editionID, set())
+            if instanceID is not None:
+                editionInstances[editionID].add(instanceID)
+
+        existing = {
+            frozenset(instIDs): editionID
+            for editionID, instIDs in editionInstances.items()
+        }
+        return existing, list(editionInstances.keys())
+
+    def applyEditionChanges(self, session, updates, inserts, staleIDs):
+        editionTable = Edition.__table__
+        instanceTable = Instance.__table__
+
+        if staleIDs:
+            session.execute(
+                instanceTable.update()
+                    .where(instanceTable.c.edition_id.in_(staleIDs))
+                    .values(edition_id=None)
+            )
+
+        if updates:
+            session.execute(
+                editionTable.update()
+                    .where(editionTable.c.id == bindparam('editionID')),
+                updates
+            )
+
+        # Postgres does not guarantee the order of the ids returned from a
+        # multi-row insert, so each edition is inserted on its own
+        for instIDs, editionRow in inserts:
+            editionID = session.execute(
+                editionTable.insert()
+                    .values(work_id=self.work.id, **editionRow)
+                    .returning(editionTable.c.id)
+            ).scalar()
+
+            session.execute(
+                instanceTable.update()
+                    .where(instanceTable.c.id.in_(list(instIDs)))
+                    .values(edition_id=editionID)
+            )
+
+        if staleIDs:
+            session.execute(
+                editionTable.delete().where(editionTable.c.id.in_(staleIDs))
+            )
+
+    @staticmethod
+    def createEditionRow(merged):
+        return {
+            'publication_place': merged.get('pubPlace', None),
+            'publication_date': merged.get('pubDate', None),
+            'edition_statement': merged.get('edition_statement', None),
+            'volume': merged.get('volume', None),
+            'table_of_contents': merged.get('table_of_contents', None),
+            'extent': merged.get('extent', None),
+            'summary': merged.get('summary', None)
+        }
 
     def mergeInstances(self, edition):
         out = {'rowIDs': []}
@@ -108,8 +185,3 @@ class ClusterManager:
                 self.identifier
             ))
             return Work.lookupWork(session, [identifierDict])
-    
-    def fetchInstances(self, session, instIDs):
-        self.logger.debug('Fetching instances for work {}'.format(self.work))
-        return session.query(Instance)\
-            .filter(Instance.id.in_([int(i) for i in instIDs])).all()
\ No newline at end of file
@@ -1,4 +1,3 @@
-from collections import defaultdict
 from math import sqrt
 import re
 import string
@@ -7,7 +6,7 @@ import warnings
 import pandas as pd
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer, CountVectorizer
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.pipeline import Pipeline, FeatureUnion
 from sklearn.preprocessing import MinMaxScaler
 from sklearn.base import BaseEstimator, TransformerMixin
@@ -40,53 +39,102 @@ class NumberSelector(BaseEstimator, TransformerMixin):
 
 class KModel:
     LOGGER = createLog('kMeans')
+    MINI_BATCH_ROWS = 500
+    MINI_BATCH_SIZE = 1024
+    EDITION_FIELDS = [
+        'pubDate', 'publisher', 'pubPlace', 'rowID', 'edition', 'volume',
+        'table_of_contents', 'extent', 'summary'
+    ]
     
     def __init__(self, instances):
         self.instances = instances
         self.df = None
-        self.clusters = defaultdict(list)
-    
-    def createPipeline(self):
-        return Pipeline([
-            ('union', FeatureUnion(
-                transformer_list=[
-                    ('place', Pipeline([
-                        ('selector', TextSelector(key='place')),
-                        ('tfidf', TfidfVectorizer(
-                            preprocessor=KModel.pubProcessor,
-                            stop_words='english',
-                            strip_accents='unicode',
-                            analyzer='char_wb',
-                            ngram_range=(2,4))
-                        )
-                    ])),
-                    ('publisher', Pipeline([
-                        ('selector', TextSelector(key='publisher')),
-                        ('tfidf', TfidfVectorizer(
-                            preprocessor=KModel.pubProcessor,
-                            stop_words='english',
-                            strip_accents='unicode',
-                            analyzer='char_wb',
-                            ngram_range=(2,4))
-                        )
-                    ])),
-                    ('date', Pipeline([
-                        ('selector', NumberSelector(key='pubDate')),
-                        ('scaler', MinMaxScaler())
-                    ]))
-                ],
-                transformer_weights={
-                    'place': 0.5,
-                    'publisher': 1.0,
-                    'date': 2.0 
-                }
-            )),
-            ('kmeans', KMeans(
-                n_clusters=self.currentK,
-                n_jobs=-1
-            ))
-        ])
+        self.clusterDF = None
+        self.features = None
+        self.centers = {}
+        self.scores = {}
     
+    def createFeatureUnion(self):
+        return FeatureUnion(
+            transformer_list=[
+                ('place', Pipeline([
+                    ('selector', TextSelector(key='place')),
+                    ('tfidf', TfidfVectorizer(
+                        preprocessor=KModel.pubProcessor,
+                        stop_words='english',
+                        strip_accents='unicode',
+                        analyzer='char_wb',
+                        ngram_range=(2,4))
+                    )
+                ])),
+                ('publisher', Pipeline([
+                    ('selector', TextSelector(key='publisher')),
+                    ('tfidf', TfidfVectorizer(
+                        preprocessor=KModel.pubProcessor,
+                        stop_words='english',
+                        strip_accents='unicode',
+                        analyzer='char_wb',
+                        ngram_range=(2,4))
+                    )
+                ])),
+                ('date', Pipeline([
+                    ('selector', NumberSelector(key='pubDate')),
+                    ('scaler', MinMaxScaler())
+                ]))
+            ],
+            transformer_weights={
+                'place': 0.5,
+                'publisher': 1.0,
+                'date': 2.0 
+            }
+        )
+
+    def createModel(self, k, init='k-means++'):
+        seeded = not isinstance(init, str)
+        # Larger works are clustered in mini-batches, which converges on
+        # effectively the same clusters in a fraction of the time
+        if len(self.clusterDF.index) > KModel.MINI_BATCH_ROWS:
+            return MiniBatchKMeans(
+                n_clusters=k,
+                init=init,
+                n_init=1 if seeded else 3,
+                batch_size=KModel.MINI_BATCH_SIZE
+            )
+
+        return KMeans(n_clusters=k, init=init, n_init=1 if seeded else 10)
+
+    def getFeatures(self):
+        """Vectorize the instance DataFrame. This is done once for each work
+        and the resulting matrix is reused for every evaluated value of k.
+        """
+        if self.features is None:
+            self.LOGGER.debug('Generating feature matrix for instances')
+            self.features = self.createFeatureUnion().fit_transform(
+                self.clusterDF
+            )
+
+        return self.features
+
+    def getInitialCenters(self, k):
+        """Warm start k-means from the centers found for k - 1, adding the
+        instance furthest from its current center as the new center. If no
+        previous run is available, or all instances already sit on a center,
+        k-means++ initialization is used.
+        """
+        previous = self.centers.get(k - 1, None)
+        if previous is None:
+            return 'k-means++'
+
+        centers, distances = previous
+        if distances.max() <= 0:
+            return 'k-means++'
+
+        newCenter = self.features[int(distances.argmax())]
+        if hasattr(newCenter, 'toarray'):
+            newCenter = newCenter.toarray()
+
+        return np.vstack([centers, newCenter])
+
     @classmethod
     def pubProcessor(cls, raw):
         if isinstance(raw, list):
@@ -125,13 +173,44 @@ class KModel:
             for i in self.instances
             if KModel.emptyInstance(i) != False
         ])
-        self.maxK = len(self.df.index) if len(self.df.index) > 1 else 2
+        self.clusterDF = self.df
+        self.setMaxK()
+
+    def setMaxK(self):
+        rowCount = len(self.clusterDF.index)
+        self.maxK = rowCount if rowCount > 1 else 2
         if self.maxK > 1000:
             self.maxK = int(self.maxK * (2/9))
         elif self.maxK > 500:
             self.maxK = int(self.maxK * (3/9))
         elif self.maxK > 250:
             self.maxK = int(self.maxK * (4/9))
+
+    def groupExactMatches(self):
+        """Group instances that share an identical publication date and
+        normalized publisher and place. These will always fall in the same
+        edition, so only one row per group needs to be passed to k-means.
+        Returns the number of distinct groups, all instances are assigned
+        to a single cluster until generateClusters is run.
+        """
+        self.df['matchKey'] = list(zip(
+            self.df['pubDate'],
+            self.df['publisher'].map(KModel.normalizeField),
+            self.df['place'].map(KModel.normalizeField)
+        ))
+        self.df['cluster'] = 0
+        self.clusterDF = self.df.drop_duplicates('matchKey').copy()
+        self.setMaxK()
+
+        groupCount = len(self.clusterDF.index)
+        self.LOGGER.info('Grouped {} instances into {} exact matches'.format(
+            len(self.df.index), groupCount
+        ))
+        return groupCount
+
+    @classmethod
+    def normalizeField(cls, raw):
+        return cls.pubProcessor(raw).strip()
     
     @staticmethod
     def emptyInstance(instance):
@@ -189,15 +268,14 @@ class KModel:
             self.k = 1
         
         try:
-            labels = self.cluster(self.k)
-        except ValueError as err:
-            labels = [0] * len(self.instances)
-        
-        for n, item in enumerate(labels):
-            try:
-                self.clusters[item].append(self.df.loc[[n]])
-            except KeyError:
-                continue
+            self.clusterDF['cluster'] = self.cluster(self.k)
+        except ValueError:
+            self.clusterDF['cluster'] = 0
+
+        if self.clusterDF is not self.df:
+            self.df['cluster'] = self.df['matchKey'].map(
+                self.clusterDF.set_index('matchKey')['cluster']
+            )
     
     def getK(self, start, stop, step):
         self.LOGGER.info('Calculating number of clusters, max {}'.format(
@@ -232,40 +310,40 @@ class KModel:
         return None
     
     def cluster(self, k, score=False):
-        self.currentK = k
         self.LOGGER.info('Generating cluster for k={}'.format(k))
-        pipeline = self.createPipeline()
+        features = self.getFeatures()
         if score is True:
+            # The two passes made by getK overlap, so reuse earlier scores
+            if k in self.scores:
+                return self.scores[k]
+
             self.LOGGER.debug('Returning score for n_clusters estimation')
-            pipeline.fit(self.df)
-            return pipeline['kmeans'].inertia_
+            model = self.createModel(k, init=self.getInitialCenters(k))
+            distances = model.fit_transform(features).min(axis=1)
+            self.centers[k] = (model.cluster_centers_, distances)
+            self.scores[k] = model.inertia_
+            return self.scores[k]
         else:
             self.LOGGER.debug('Returning model prediction')
-            return pipeline.fit_predict(self.df)
+            # Start from the centers found while scoring k, if available
+            init = self.centers[k][0] if k in self.centers else 'k-means++'
+            return self.createModel(k, init=init).fit_predict(features)
     
     def parseEditions(self):
-        eds = []
-        self.LOGGER.info('Generating editions from clusters')
-        for clust in dict(self.clusters):
-            yearEds = defaultdict(list)
-            self.LOGGER.info('Parsing cluster {}'.format(clust))
-            for ed in self.clusters[clust]:
-                self.LOGGER.info('Adding instance to {} edition'.format(
-                    ed.iloc[0]['pubDate']
-                ))
-                yearEds[ed.iloc[0]['pubDate']].append({
-                    'pubDate': ed.iloc[0]['pubDate'],
-                    'publisher': ed.iloc[0]['publisher'],
-                    'pubPlace': ed.iloc[0]['place'],
-                    'rowID': ed.iloc[0]['rowID'],
-                    'edition': ed.iloc[0]['edition'],
-                    'volume': ed.iloc[0]['volume'],
-                    'table_of_contents': ed.iloc[0]['table_of_contents'],
-                    'extent': ed.iloc[0]['extent'],
-                    'summary': ed.iloc[0]['summary']
-                })
-            eds.extend([(year, data) for year, data in yearEds.items()])
-            eds.sort(key=lambda x: x[0])
+        """Group the clustered instances into editions by cluster and
+        publication year, returning a list of (year, [instance]) tuples
+        sorted by year.
+        """
+        self.LOGGER.info('Generating editions from {} clusters'.format(
+            self.df['cluster'].nunique()
+        ))
+        editionDF = self.df.rename(columns={'place': 'pubPlace'})
+        eds = [
+            (year, group[KModel.EDITION_FIELDS].to_dict('records'))
+            for (_, year), group in editionDF.groupby(
+                ['cluster', 'pubDate'], sort=False
+            )
+        ]
+        eds.sort(key=lambda x: x[0])
 
         return eds
-            
@@ -73,8 +73,7 @@ def parseRecord(encodedRec):
         try:
             clustManager = ClusterManager(record, MANAGER)
             clustManager.clusterInstances()
-            clustManager.deleteExistingEditions()
-            clustManager.storeEditions()
+            clustManager.reconcileEditions()
         except Exception as err:  # noqa: Q000
             # There are a large number of SQLAlchemy errors that can be thrown
             # These should be handled elsewhere, but this should catch anything
@@ -70,61 +70,143 @@ class TestClusterManager(object):
         mockFetch.return_value = mockWork
         mockWork.instances = ['inst1', 'inst2']
         mockEditions = MagicMock()
-        mocker.patch.multiple(KModel,
+        mockKMeans = mocker.patch.multiple(KModel,
             createDF=DEFAULT,
+            groupExactMatches=DEFAULT,
             generateClusters=DEFAULT,
             parseEditions=mockEditions
         )
+        mockKMeans['groupExactMatches'].return_value = 2
         mockEditions.return_value = 'editions'
         testManager.clusterInstances()
         assert testManager.work == mockWork
         assert testManager.editions == 'editions'
+        mockKMeans['generateClusters'].assert_called_once()
+
+    def test_clusterInstances_exact_match(self, mocker, testManager):
+        mockFetch = mocker.patch.object(ClusterManager, 'fetchWork')
+        mockWork = MagicMock()
+        mockFetch.return_value = mockWork
+        mockWork.instances = ['inst1', 'inst2']
+        mockKMeans = mocker.patch.multiple(KModel,
+            createDF=DEFAULT,
+            groupExactMatches=DEFAULT,
+            generateClusters=DEFAULT,
+            parseEditions=DEFAULT
+        )
+        mockKMeans['groupExactMatches'].return_value = 1
+        mockKMeans['parseEditions'].return_value = 'editions'
+        testManager.clusterInstances()
+        assert testManager.editions == 'editions'
+        mockKMeans['generateClusters'].assert_not_called()
     
-    def test_deleteEditions(self, testManager):
+    def test_reconcileEditions(self, mocker, testManager):
         testManager.work = MagicMock()
-        testManager.work.editions = ['ed1', 'ed2']
+        testManager.editions = ['ed1', 'ed2', 'ed3']
         mockSession = MagicMock()
-        mockDelete = MagicMock()
         testManager.dbManager.createSession.return_value = mockSession
-        mockSession.delete = mockDelete
-        testManager.deleteExistingEditions()
-        mockDelete.assert_has_calls([call('ed1'), call('ed2')])
-    
-    def test_storeEditions(self, mocker, testManager):
-        testManager.editions = ['ed1', 'ed2']
+
+        mockLoad = mocker.patch.object(ClusterManager, 'loadExistingEditions')
+        mockLoad.return_value = ({frozenset([1, 2]): 10}, [10, 11])
+        mockMerge = mocker.patch.object(ClusterManager, 'mergeInstances')
+        mockMerge.side_effect = [
+            {'rowIDs': [2, 1], 'pubPlace': 'place1'},
+            {'rowIDs': [3], 'pubPlace': 'place2'},
+            {'rowIDs': [4, 5], 'pubPlace': 'place3'}
+        ]
+        mockApply = mocker.patch.object(ClusterManager, 'applyEditionChanges')
+
+        testManager.reconcileEditions()
+
+        updates, inserts, staleIDs = mockApply.call_args[0][1:]
+        assert len(updates) == 1
+        assert updates[0]['editionID'] == 10
+        assert updates[0]['publication_place'] == 'place1'
+        assert [i[0] for i in inserts] == [
+            frozenset([3]), frozenset([4, 5])
+        ]
+        assert staleIDs == [11]
+        mockSession.commit.assert_called_once()
+        mockSession.close.assert_called_once()
+
+    def test_reconcileEditions_error(self, mocker, testManager):
         testManager.work = MagicMock()
-        mockCreate = mocker.patch.object(ClusterManager, 'createEdition')
-        mockCreate.side_effect = ['ed1', 'ed2']
         mockSession = MagicMock()
-        mockAddAll = MagicMock()
-        mockSession.add_all = mockAddAll
         testManager.dbManager.createSession.return_value = mockSession
-        testManager.storeEditions()
-        mockCreate.assert_has_calls([call(mockSession, 'ed1'), call(mockSession, 'ed2')])
-        mockAddAll.assert_called_once_with(['ed1', 'ed2'])
-    
-    def test_createEdition(self, mocker, testManager):
-        mockMerge = mocker.patch.object(ClusterManager, 'mergeInstances')
-        mergeData = {
-            'pubPlace': 'testtown',
-            'pubDate': '2019',
-            'rowIDs': 0
+        mockLoad = mocker.patch.object(ClusterManager, 'loadExistingEditions')
+        mockLoad.side_effect = Exception
+
+        with pytest.raises(Exception):
+            testManager.reconcileEditions()
+
+        mockSession.commit.assert_not_called()
+        mockSession.rollback.assert_called_once()
+        mockSession.close.assert_called_once()
+
+    def test_loadExistingEditions(self, testManager):
+        testManager.work = MagicMock()
+        mockSession = MagicMock()
+        mockSession.query().outerjoin().filter().all.return_value = [
+            (1, 10), (1, 11), (2, 12), (3, None)
+        ]
+
+        existing, existingIDs = testManager.loadExistingEditions(mockSession)
+        assert existing == {
+            frozenset([10, 11]): 1,
+            frozenset([12]): 2,
+            frozenset(): 3
         }
-        mockMerge.return_value = mergeData
+        assert existingIDs == [1, 2, 3]
+
+    def test_applyEditionChanges(self, testManager):
+        testManager.work = MagicMock()
+        testManager.work.id = 1
+        mockSession = MagicMock()
+        mockSession.execute().scalar.side_effect = [20, 21]
+        mockSession.execute.reset_mock()
+
+        testManager.applyEditionChanges(
+            mockSession,
+            [{'editionID': 10, 'volume': 'v1'}],
+            [(frozenset([3]), {'volume': 'v2'}), (frozenset([4]), {})],
+            [11]
+        )
+
+        # Clear stale, update, insert and assign two editions, delete stale
+        assert mockSession.execute.call_count == 7
+        assert mockSession.execute.call_args_list[1][0][1] == [
+            {'editionID': 10, 'volume': 'v1'}
+        ]
+        insertParams = [
+            mockSession.execute.call_args_list[i][0][0].compile().params
+            for i in (2, 4)
+        ]
+        assert insertParams[0]['volume'] == 'v2'
+        assert 'volume' not in insertParams[1]
+        assignParams = [
+            mockSession.execute.call_args_list[i][0][0].compile().params
+            for i in (3, 5)
+        ]
+        assert assignParams[0]['edition_id'] == 20
+        assert assignParams[1]['edition_id'] == 21
+
+    def test_applyEditionChanges_none(self, testManager):
+        testManager.work = MagicMock()
+        mockSession = MagicMock()
+        testManager.applyEditionChanges(mockSession, [], [], [])
+        mockSession.execute.assert_not_called()
+
+    def test_createEditionRow(self):
+        outRow = ClusterManager.createEditionRow({
+            'pubPlace': 'testtown',
+            'pubDate': '[1900-01-01,1900-12-31]',
+            'edition_statement': '2nd ed.'
+        })
+        assert outRow['publication_place'] == 'testtown'
+        assert outRow['publication_date'] == '[1900-01-01,1900-12-31]'
+        assert outRow['edition_statement'] == '2nd ed.'
+        assert outRow['volume'] is None
 
-        mockCreate = mocker.patch.object(Edition, 'createEdition')
-        mockCreate.return_value = True
-        
-        testManager.work = 'testWork'
-        mockFetch = mocker.patch.object(ClusterManager, 'fetchInstances')
-        mockFetch.return_value = 0
-
-        newEd = testManager.createEdition('session', 'ed1')
-        assert newEd is True
-        mockMerge.assert_called_once_with('ed1')
-        mockFetch.assert_called_once_with('session', 0)
-        mockCreate.assert_called_once_with(mergeData, 'testWork', 0)
-    
     def test_mergeInstances_date(self, testManager, mockEditions):
         testEditions = (1900, mockEditions[1])
         out = testManager.mergeInstances(testEditions)
@@ -167,11 +249,3 @@ class TestClusterManager(object):
             'session',
             [{'type': 'test', 'identifier': 'xxxxxxxxx'}]
         )
-    
-    def test_fetchInstances(self, testManager):
-        mockSession = MagicMock()
-        testManager.dbManager.createSession.return_value = mockSession
-        mockSession.query().filter().all.return_value = [1, 2, 3]
-        testManager.work = 'testWork'
-        outInstances = testManager.fetchInstances(mockSession, [1, 2, 3])
-        assert outInstances == [1, 2, 3]
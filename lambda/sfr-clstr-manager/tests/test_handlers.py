@@ -81,7 +81,7 @@ class TestHandler(object):
         mockCluster.work = MagicMock()
         mockCluster.work.uuid = 'uuid'
         mockCluster.work.title = 'title'
-        mockCluster.storeEditions.side_effect = Exception
+        mockCluster.reconcileEditions.side_effect = Exception
         res = mockManager[2]({'body': json.dumps({'identifier': 'xxxxxxxxx'})})
         assert res == ('failure', 'uuid|title')
     
@@ -1,6 +1,7 @@
-from collections import defaultdict
+import numpy as np
 from pandas import DataFrame
 import pytest
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from unittest.mock import MagicMock, patch, DEFAULT, call
 
 from helpers.errorHelpers import DataError
@@ -41,56 +42,18 @@ class TestKMeansModel(object):
     
     @pytest.fixture
     def testClusters(self, testModel):
-        testModel.clusters = {
-            0: [
-                DataFrame({
-                    'pubDate': 1900,
-                    'publisher': 'test',
-                    'place': 'testtown',
-                    'rowID': 1,
-                    'edition': '',
-                    'volume': '',
-                    'extent': '',
-                    'table_of_contents': '',
-                    'summary': ''
-                }, index=[0]),
-                DataFrame({
-                    'pubDate': 1900,
-                    'publisher': 'test',
-                    'place': 'testtown',
-                    'rowID': 2,
-                    'edition': '',
-                    'volume': '',
-                    'extent': '',
-                    'table_of_contents': '',
-                    'summary': ''
-                }, index=[0])
-            ],
-            1: [
-                DataFrame({
-                    'pubDate': 2000,
-                    'publisher': 'test',
-                    'place': 'testtown',
-                    'rowID': 3,
-                    'edition': '',
-                    'volume': '',
-                    'extent': '',
-                    'table_of_contents': '',
-                    'summary': ''
-                }, index=[0]),
-                DataFrame({
-                    'pubDate': 1950,
-                    'publisher': 'test',
-                    'place': 'testtown',
-                    'rowID': 4,
-                    'edition': '',
-                    'volume': '',
-                    'extent': '',
-                    'table_of_contents': '',
-                    'summary': ''
-                }, index=[0])
-            ]
-        }
+        testModel.df = DataFrame({
+            'pubDate': [1900, 1900, 2000, 1950],
+            'publisher': ['test'] * 4,
+            'place': ['testtown'] * 4,
+            'rowID': [1, 2, 3, 4],
+            'edition': [''] * 4,
+            'volume': [''] * 4,
+            'extent': [''] * 4,
+            'table_of_contents': [''] * 4,
+            'summary': [''] * 4,
+            'cluster': [0, 0, 1, 1]
+        })
 
     @staticmethod
     def createInstance(**kwargs):
@@ -126,7 +89,7 @@ class TestKMeansModel(object):
     def test_kModel_init(self, testModel):
         assert testModel.instances == []
         assert testModel.df == None
-        assert isinstance(testModel.clusters, defaultdict)
+        assert testModel.features == None
     
     def test_pubProcessor_str(self):
         cleanStr = KModel.pubProcessor('Testing & Testing,')
@@ -163,6 +126,34 @@ class TestKMeansModel(object):
         assert testModel.df.iloc[1]['rowID'] == 3
         assert testModel.maxK == 2
 
+    def test_groupExactMatches(self, testModel):
+        testModel.df = DataFrame({
+            'place': ['New York', 'new york,', 'London', 'London'],
+            'publisher': ['Test & Co', 'Test and Co', 'Test', 'Test'],
+            'pubDate': [1900, 1900, 1900, 1950]
+        })
+
+        assert testModel.groupExactMatches() == 3
+        assert list(testModel.clusterDF.index) == [0, 2, 3]
+        assert list(testModel.df['cluster']) == [0, 0, 0, 0]
+        assert testModel.maxK == 3
+
+    def test_generateClusters_exact_matches(self, mocker, testModel):
+        mocker.patch.object(KModel, 'getK')
+        mockCluster = mocker.patch.object(KModel, 'cluster')
+        mockCluster.return_value = [0, 1]
+        testModel.k = 2
+        testModel.df = DataFrame({
+            'place': ['New York', 'New York', 'London'],
+            'publisher': ['Test', 'Test', 'Other'],
+            'pubDate': [1900, 1900, 1950]
+        })
+        testModel.groupExactMatches()
+
+        testModel.generateClusters()
+        assert list(testModel.clusterDF['cluster']) == [0, 1]
+        assert list(testModel.df['cluster']) == [0, 0, 1]
+
     def test_getPubDateFloat_both(self):
         mockDates = [
             TestKMeansModel.createDate(date_type='other_date'),
@@ -232,11 +223,10 @@ class TestKMeansModel(object):
         ]
 
         testModel.df = DataFrame(['row1', 'row2', 'row3'])
+        testModel.clusterDF = testModel.df
 
         testModel.generateClusters()
-        assert testModel.clusters[0][0].iloc[0][0] == 'row1'
-        assert testModel.clusters[0][1].iloc[0][0] == 'row3'
-        assert testModel.clusters[1][0].iloc[0][0] == 'row2'
+        assert list(testModel.df['cluster']) == [0, 1, 0]
     
     def test_generateClusters_single(self, mocker, testModel):
         mockGetK = mocker.patch.object(KModel, 'getK')
@@ -246,39 +236,94 @@ class TestKMeansModel(object):
         mockCluster.side_effect = ValueError
         testModel.instances = ['row1']
         testModel.df = DataFrame(['row1'])
+        testModel.clusterDF = testModel.df
         testModel.maxK = 3
 
         testModel.generateClusters()
-        assert testModel.clusters[0][0].iloc[0][0] == 'row1'        
+        assert list(testModel.df['cluster']) == [0]
+
+    def test_getFeatures(self, mocker, testModel):
+        mockUnion = MagicMock()
+        mockUnion.fit_transform.return_value = 'testMatrix'
+        mockCreate = mocker.patch.object(KModel, 'createFeatureUnion')
+        mockCreate.return_value = mockUnion
+
+        assert testModel.getFeatures() == 'testMatrix'
+        assert testModel.getFeatures() == 'testMatrix'
+        mockUnion.fit_transform.assert_called_once_with(None)
+
+    def test_createModel_small(self, testModel):
+        testModel.clusterDF = DataFrame(['row1', 'row2'])
+        model = testModel.createModel(2)
+        assert isinstance(model, KMeans)
+        assert model.n_init == 10
+
+    def test_createModel_large(self, testModel):
+        testModel.clusterDF = DataFrame(
+            ['row'] * (KModel.MINI_BATCH_ROWS + 1)
+        )
+        model = testModel.createModel(2, init=np.zeros((2, 2)))
+        assert isinstance(model, MiniBatchKMeans)
+        assert model.n_init == 1
+
+    def test_getInitialCenters_none(self, testModel):
+        assert testModel.getInitialCenters(2) == 'k-means++'
+
+    def test_getInitialCenters_previous(self, testModel):
+        testModel.features = np.array([[0, 0], [1, 1], [5, 5]])
+        testModel.centers[1] = (np.array([[2, 2]]), np.array([2, 1, 3]))
+        outCenters = testModel.getInitialCenters(2)
+        assert outCenters.tolist() == [[2, 2], [5, 5]]
+
+    def test_getInitialCenters_exhausted(self, testModel):
+        testModel.centers[1] = (np.array([[2, 2]]), np.array([0, 0]))
+        assert testModel.getInitialCenters(2) == 'k-means++'
 
     def test_cluster_score(self, mocker, testModel):
-        mockPipeline = MagicMock()
-        
-        def fakeGet(self, key):
-            mockGet = MagicMock()
-            mockGet.inertia_ = 1
-            if key == 'kmeans':
-                return mockGet   
-            return MagicMock()
-
-        mockCreate = mocker.patch.object(KModel, 'createPipeline')
-        mockCreate.return_value = mockPipeline
-        mockPipeline.__getitem__ = fakeGet
+        mockGetFeatures = mocker.patch.object(KModel, 'getFeatures')
+        mockGetFeatures.return_value = 'testMatrix'
+        mockModel = MagicMock()
+        mockModel.inertia_ = 1
+        mockCreate = mocker.patch.object(KModel, 'createModel')
+        mockCreate.return_value = mockModel
 
         out = testModel.cluster(1, score=True)
         assert out == 1
-        mockPipeline.fit.assert_called_once()
+        assert testModel.cluster(1, score=True) == 1
+        mockCreate.assert_called_once_with(1, init='k-means++')
+        mockModel.fit_transform.assert_called_once_with('testMatrix')
+        assert 1 in testModel.centers
     
     def test_cluster_predict(self, mocker, testModel):
-        mockPipeline = MagicMock()
-        mockCreate = mocker.patch.object(KModel, 'createPipeline')
-        mockCreate.return_value = mockPipeline
+        mocker.patch.object(KModel, 'getFeatures')
+        mockModel = MagicMock()
+        mockCreate = mocker.patch.object(KModel, 'createModel')
+        mockCreate.return_value = mockModel
+        testModel.centers[1] = ('testCenters', None)
 
         testModel.cluster(1)
-        mockCreate.assert_called_once()
-        mockPipeline.fit_predict.assert_called_once()
+        mockCreate.assert_called_once_with(1, init='testCenters')
+        mockModel.fit_predict.assert_called_once()
+
+    def test_generateClusters_reuses_features(self, mocker):
+        testModel = KModel([])
+        testModel.df = DataFrame({
+            'place': ['New York', 'New York', 'London', 'London'],
+            'publisher': ['Test', 'Test', 'Other', 'Other'],
+            'pubDate': [1900, 1900, 1950, 1950]
+        })
+        testModel.clusterDF = testModel.df
+        testModel.maxK = 3
+        createSpy = mocker.spy(testModel, 'createFeatureUnion')
+
+        testModel.generateClusters()
+        createSpy.assert_called_once()
+        assert testModel.df['cluster'].notnull().all()
 
     def test_parseEditions(self, mocker, testModel, testClusters):
         outEditions = testModel.parseEditions()
         assert len(outEditions) == 3
-        assert outEditions[1][0] == 1950
\ No newline at end of file
+        assert outEditions[1][0] == 1950
+        assert [i['rowID'] for i in outEditions[0][1]] == [1, 2]
+        assert outEditions[0][1][0]['pubPlace'] == 'testtown'
+        assert 'cluster' not in outEditions[0][1][0]
\ No newline at end of file
@@ -1,5 +1,7 @@
 from collections import defaultdict
 
+from sfrCore import Agent, Identifier, Language, Subject, Work
+
 from lib.importers.workImporter import WorkImporter
 from lib.importers.instanceImporter import InstanceImporter
 from lib.importers.itemImporter import ItemImporter
@@ -29,13 +31,81 @@ class DBManager:
         self.sqsMsgs = defaultdict(list)
 
     def importRecord(self, record):
+        return self.runImporter(
+            record.get('type', 'work'), self.createImporter(record)
+        )
+
+    def importBatch(self, records):
+        """Import a batch of decoded records in the current transaction. The
+        existing works, agents and subjects of all work records are resolved
+        in bulk before any records are imported. Records that share an
+        identifier with a work inserted earlier in the batch are sent to the
+        update stream with that work's UUID, as they would be if imported
+        individually."""
+        importers = [
+            (record.get('type', 'work'), self.createImporter(record))
+            for record in records
+        ]
+        self.prefetchWorks([
+            imp for _, imp in importers if isinstance(imp, WorkImporter)
+        ])
+
+        batchWorks = {}
+        results = []
+        for recordType, importer in importers:
+            if isinstance(importer, WorkImporter):
+                idenKeys = Identifier.identifierKeys(
+                    importer.data.get('identifiers', [])
+                )
+                if importer.work is None:
+                    importer.work = next(
+                        (batchWorks[k] for k in idenKeys if k in batchWorks),
+                        None
+                    )
+
+                results.append(self.runImporter(recordType, importer))
+
+                for key in idenKeys:
+                    batchWorks.setdefault(key, importer.work)
+            else:
+                results.append(self.runImporter(recordType, importer))
+
+        return results
+
+    def prefetchWorks(self, importers):
+        if len(importers) < 1:
+            return
+
+        logger.debug('Resolving existing records for {} works'.format(
+            len(importers)
+        ))
+        existingWorks = Work.lookupWorks(self.session, [
+            (imp.data.get('identifiers', []), imp.data.get('primary_identifier'))
+            for imp in importers
+        ])
+        for importer, work in zip(importers, existingWorks):
+            importer.setExistingWork(work)
+
+        Agent.prefetchMatches(self.session, [
+            agent for imp in importers for agent in Work.gatherAgents(
+                imp.data.get('agents'), imp.data.get('instances')
+            )
+        ])
+        Subject.prefetchSubjects(self.session, [
+            subj for imp in importers for subj in imp.data.get('subjects') or []
+        ])
+        Language.CACHE.preload(self.session)
+
+    def createImporter(self, record):
         recordType = record.get('type', 'work')
         logger.info('Updating {} record'.format(recordType))
 
         # Create specific importer
-        importer = self.IMPORTERS[recordType](
+        return self.IMPORTERS[recordType](
             record, self.session, self.kinesisMsgs, self.sqsMsgs
         )
+
+    def runImporter(self, recordType, importer):
         action = importer.lookupRecord()
         if action == 'insert':
             importer.setInsertTime()
@@ -47,9 +117,14 @@ class DBManager:
             action, recordType.upper(), importer.identifier
         )
 
+    def clearMessages(self):
+        """Discard any messages generated by records that were rolled back"""
+        self.kinesisMsgs.clear()
+        self.sqsMsgs.clear()
+
     def sendMessages(self):
-        for records, stream in self.kinesisMsgs.items():
-            OutputManager.putKinesisBatch(stream, records)
+        for stream, records in self.kinesisMsgs.items():
+            OutputManager.putKinesisBatch(records, stream)
 
-        for messages, queue in self.sqsMsgs.items():
-            OutputManager.putQueueBatches(queue, messages)
+        for queue, messages in self.sqsMsgs.items():
+            OutputManager.putQueueBatches(messages, queue)
@@ -14,6 +14,7 @@ class WorkImporter(AbstractImporter):
         self.source = record.get('source', 'unknown')
         self.data = WorkImporter.parseData(record)
         self.work = None
+        self.prefetched = False
         self.kinesisMsgs = kinesisMsgs
         self.sqsMsgs = sqsMsgs
         self.logger = self.createLogger()
@@ -30,13 +31,19 @@ class WorkImporter(AbstractImporter):
     def identifier(self):
         return self.work.uuid.hex
 
+    def setExistingWork(self, work):
+        """Set the result of a lookup made for a batch of records"""
+        self.work = work
+        self.prefetched = True
+
     def lookupRecord(self):
         primaryID = self.data.pop('primary_identifier', None)
-        self.work = Work.lookupWork(
-            self.session,
-            self.data.get('identifiers', []),
-            primaryID
-        )
+        if not self.prefetched:
+            self.work = Work.lookupWork(
+                self.session,
+                self.data.get('identifiers', []),
+                primaryID
+            )
         if self.work is not None:
             self.logger.info(
                 'Found existing work {}. Sending to update stream'.format(
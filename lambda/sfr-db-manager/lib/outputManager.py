@@ -3,6 +3,8 @@ import os
 import redis
 from datetime import datetime, timedelta
 
+from sfrCore import OutputWriter
+
 from helpers.errorHelpers import OutputError
 from helpers.logHelpers import createLog
 from helpers.clientHelpers import createAWSClient
@@ -72,16 +74,19 @@ class OutputManager():
             for r in records
         ]
 
+        writer = OutputWriter(kinesisClient=cls.KINESIS_CLIENT)
         try:
-            cls.KINESIS_CLIENT.put_records(
-                Records=streamRecords,
-                StreamName=stream
-            )
+            failed = writer.putRecords(stream, streamRecords)
         except Exception as err:
             logger.error('Kinesis Batch write error')
             logger.debug(err)
             raise OutputError('Failed to write batch to Kinesis')
 
+        if len(failed) > 0:
+            raise OutputError('Failed to write {} of {} records to {}'.format(
+                len(failed), len(streamRecords), stream
+            ))
+
     @classmethod
     def putQueue(cls, data, outQueue):
         """This puts record identifiers into an SQS queue that is read for
@@ -104,28 +109,22 @@ class OutputManager():
 
     @classmethod
     def putQueueBatches(cls, messages, outQueue):
-        while len(messages) > 0:
-            jsonMessages = []
-            for i in range(10):
-                try:
-                    jsonMessages.append({
-                        'MessageBody': OutputManager._convertToJSON(
-                            messages.pop()
-                        ),
-                        'Id': str(i)
-                    })
-                except IndexError:
-                    break
-
-            try:
-                cls.SQS_CLIENT.send_message_batch(
-                    QueueUrl=outQueue,
-                    Entries=jsonMessages
-                )
-            except Exception as err:
-                logger.error('Failed to write messages to queue')
-                logger.debug(err)
-                raise OutputError('Failed to write results to queue')
+        jsonMessages = [
+            OutputManager._convertToJSON(message) for message in messages
+        ]
+
+        writer = OutputWriter(sqsClient=cls.SQS_CLIENT)
+        try:
+            failed = writer.sendMessages(outQueue, jsonMessages)
+        except Exception as err:
+            logger.error('Failed to write messages to queue')
+            logger.debug(err)
+            raise OutputError('Failed to write results to queue')
+
+        if len(failed) > 0:
+            raise OutputError('Failed to write {} of {} messages to {}'.format(
+                len(failed), len(jsonMessages), outQueue
+            ))
 
     @classmethod
     def checkRecentQueries(cls, queryString):
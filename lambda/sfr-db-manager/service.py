@@ -26,6 +26,8 @@ until AWS decides to regenerate the container
 MANAGER = SessionManager()
 MANAGER.generateEngine()
 
+AGGREGATE_PREFIX = b'{"status": 200, "type": "aggregate"'
+
 
 def handler(event, context):
     """Central handler invoked by Lambda trigger. Begins processing of kinesis
@@ -59,9 +61,13 @@ def parseRecords(records):
     session = MANAGER.createSession(autoflush=True)
     dbManager = DBManager(session)
     parseResults = []
+    records = expandRecords(records)
     try:
-        for r in records:
-            parseResults.append(parseRecord(r, dbManager))
+        if os.environ.get('BATCH_MODE', 'false').lower() == 'true':
+            parseResults = parseBatch(records, dbManager)
+        else:
+            for r in records:
+                parseResults.append(parseRecord(r, dbManager))
         logger.debug('Parsed {} records. Committing results'.format(
             str(len(parseResults))
         ))
@@ -75,12 +81,89 @@ def parseRecords(records):
     return parseResults
 
 
+def expandRecords(records):
+    """Records from the reader functions may be aggregates of several works,
+    which are listed in their "records" field. These are split into separate
+    records, encoded in the same way as those received from the stream, so
+    that each work is imported on its own. All other records, including any
+    that cannot be decoded, are passed through unchanged.
+    """
+    expanded = []
+    for encodedRec in records:
+        try:
+            recData = base64.b64decode(encodedRec['kinesis']['data'])
+        except (KeyError, TypeError, ValueError):
+            expanded.append(encodedRec)
+            continue
+
+        # Aggregates are always written with this prefix, so other records
+        # do not need to be parsed here
+        if not recData.startswith(AGGREGATE_PREFIX):
+            expanded.append(encodedRec)
+            continue
+
+        aggregated = json.loads(recData)['records']
+        logger.debug('Expanding aggregate of {} records'.format(
+            len(aggregated)
+        ))
+        expanded.extend(
+            {'kinesis': {'data': base64.b64encode(
+                json.dumps(subRec).encode('utf-8')
+            )}}
+            for subRec in aggregated
+        )
+
+    return expanded
+
+
+def parseBatch(records, manager):
+    """Decodes all records in the batch and imports them in a single
+    transaction, resolving existing works, agents and subjects for the whole
+    batch in bulk. Records that cannot be decoded are skipped. If any record
+    cannot be imported, or the transaction cannot be committed, the batch is
+    rolled back and each record is imported individually so that only the
+    records that caused the error are lost
+    """
+    validRecords = []
+    decodedRecords = []
+    for encodedRec in records:
+        try:
+            decodedRecords.append(decodeRecord(encodedRec))
+            validRecords.append(encodedRec)
+        except (NoRecordsReceived, DataError) as err:
+            logger.warning('Skipping record that could not be decoded')
+            logger.debug(err)
+
+    try:
+        manager.importBatch(decodedRecords)
+        MANAGER.commitChanges()
+        logger.info('Imported batch of {} records'.format(
+            len(decodedRecords)
+        ))
+        return decodedRecords
+    except Exception as err:  # noqa: Q000
+        logger.warning('Unable to import batch, importing records singly')
+        logger.debug(err)
+        logger.debug(traceback.format_exc())
+        MANAGER.session.rollback()
+        manager.clearMessages()
+
+    # Records are decoded again as the failed import may have altered them
+    return [parseRecord(r, manager) for r in validRecords]
+
+
 def parseRecord(encodedRec, manager):
     """Handles each individual record by parsing JSON from the base64 encoded
     string recieved from the Kinesis stream, creating a database session and
     inserting/updating the database to reflect this new data source. It will
     rollback changes if an error is encountered
     """
+    return importRecord(decodeRecord(encodedRec), manager)
+
+
+def decodeRecord(encodedRec):
+    """Parses the JSON block of a base64 encoded record from the Kinesis
+    stream, raising an error if it is invalid or does not contain data"""
     try:
         record = json.loads(base64.b64decode(encodedRec['kinesis']['data']))
         statusCode = record['status']
@@ -104,6 +187,12 @@ def parseRecord(encodedRec, manager):
         logger.debug(b64Err)
         raise DataError('Error in base64 encoding of record')
 
+    return record
+
+
+def importRecord(record, manager):
+    """Imports a decoded record within its own savepoint, which is rolled
+    back if an error is encountered"""
     try:
         MANAGER.startSession()  # Start transaction
         manager.importRecord(record)
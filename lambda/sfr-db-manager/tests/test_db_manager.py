@@ -1,5 +1,5 @@
 import unittest
-from unittest.mock import patch, DEFAULT, call
+from unittest.mock import patch, DEFAULT, MagicMock, call
 
 from lib.dbManager import (
     DBManager,
@@ -7,7 +7,11 @@ from lib.dbManager import (
     InstanceImporter,
     ItemImporter,
     AccessReportImporter,
-    OutputManager
+    OutputManager,
+    Work,
+    Agent,
+    Subject,
+    Language
 )
 
 
@@ -171,3 +175,97 @@ class TestDBManager(unittest.TestCase):
         testManager.sendMessages()
         putKinesisBatch.assert_called_with(['rec1', 'rec2', 'rec3'], 'testStream')
         putQueueBatches.assert_called_with(['msg1', 'msg2', 'msg3'], 'testQueue')
+
+    @patch.multiple(
+        DBManager,
+        prefetchWorks=DEFAULT,
+        runImporter=DEFAULT
+    )
+    def test_importBatch(self, prefetchWorks, runImporter):
+        testRecords = [
+            {'type': 'work', 'data': {'identifiers': [
+                {'type': 'oclc', 'identifier': '1'}
+            ]}},
+            {'type': 'instance', 'data': 'data'},
+            {'type': 'work', 'data': {'identifiers': [
+                {'type': 'oclc', 'identifier': '1'}
+            ]}}
+        ]
+        runImporter.side_effect = ['insert', 'insert', 'update']
+        testManager = DBManager('session')
+        with patch.object(WorkImporter, 'setExistingWork'):
+            results = testManager.importBatch(testRecords)
+
+        self.assertEqual(results, ['insert', 'insert', 'update'])
+        workImporters = prefetchWorks.call_args[0][0]
+        self.assertEqual(len(workImporters), 2)
+        self.assertEqual(runImporter.call_args_list[1][0][0], 'instance')
+
+    @patch.object(DBManager, 'runImporter')
+    def test_importBatch_matches_batch_work(self, runImporter):
+        testRecords = [
+            {'type': 'work', 'data': {'identifiers': [
+                {'type': 'oclc', 'identifier': '1'}
+            ]}},
+            {'type': 'work', 'data': {'identifiers': [
+                {'type': 'oclc', 'identifier': '1'},
+                {'type': 'oclc', 'identifier': '2'}
+            ]}}
+        ]
+        newWork = MagicMock()
+
+        def setWork(recordType, importer):
+            if importer.work is None:
+                importer.work = newWork
+                return 'insert'
+            return 'update'
+
+        runImporter.side_effect = setWork
+        testManager = DBManager('session')
+        with patch.object(DBManager, 'prefetchWorks'):
+            results = testManager.importBatch(testRecords)
+
+        self.assertEqual(results, ['insert', 'update'])
+        self.assertEqual(runImporter.call_args[0][1].work, newWork)
+
+    @patch.object(Language.CACHE, 'preload')
+    @patch.object(Subject, 'prefetchSubjects')
+    @patch.object(Agent, 'prefetchMatches')
+    @patch.object(Work, 'lookupWorks', return_value=['work1', None])
+    def test_prefetchWorks(self, mockLookup, mockAgents, mockSubjects,
+                           mockLanguages):
+        testImporters = [
+            WorkImporter({'data': {
+                'identifiers': ['id1'],
+                'agents': [{'name': 'agent1'}],
+                'subjects': [{'authority': 'test', 'subject': 'subj'}]
+            }}, 'session', {}, {}),
+            WorkImporter({'data': {
+                'primary_identifier': {'type': 'uuid', 'identifier': 'uuid'},
+                'instances': [{'agents': [{'name': 'agent2'}]}]
+            }}, 'session', {}, {})
+        ]
+        testManager = DBManager('session')
+        testManager.prefetchWorks(testImporters)
+
+        mockLookup.assert_called_once_with('session', [
+            (['id1'], None),
+            ([], {'type': 'uuid', 'identifier': 'uuid'})
+        ])
+        self.assertEqual(testImporters[0].work, 'work1')
+        self.assertTrue(testImporters[1].prefetched)
+        mockAgents.assert_called_once_with(
+            'session', [{'name': 'agent1'}, {'name': 'agent2'}]
+        )
+        mockSubjects.assert_called_once_with(
+            'session', [{'authority': 'test', 'subject': 'subj'}]
+        )
+        mockLanguages.assert_called_once_with('session')
+
+    def test_clearMessages(self):
+        testManager = DBManager('session')
+        testManager.kinesisMsgs['testStream'].append('rec1')
+        testManager.sqsMsgs['testQueue'].append('msg1')
+        testManager.clearMessages()
+        self.assertEqual(len(testManager.kinesisMsgs), 0)
+        self.assertEqual(len(testManager.sqsMsgs), 0)
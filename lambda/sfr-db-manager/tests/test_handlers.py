@@ -24,10 +24,14 @@ class TestHandler(unittest.TestCase):
         SessionManager, generateEngine=DEFAULT, decryptEnvVar=DEFAULT
     )
     def setUp(self, generateEngine, decryptEnvVar):
-        from service import handler, parseRecords, parseRecord
+        from service import (
+            handler, parseRecords, parseRecord, parseBatch, expandRecords
+        )
         self.handler = handler
+        self.expandRecords = expandRecords
         self.parseRecords = parseRecords
         self.parseRecord = parseRecord
+        self.parseBatch = parseBatch
 
     @patch('service.parseRecords', return_value=True)
     def test_handler_clean(self, mock_parse):
@@ -184,5 +188,70 @@ class TestHandler(unittest.TestCase):
         mockKinesis.assert_called_once()
 
 
+    @patch.dict('os.environ', {'BATCH_MODE': 'true'})
+    @patch('service.parseBatch', return_value=[1, 2, 3])
+    @patch('service.parseRecord')
+    @patch('service.MANAGER')
+    def test_parse_records_batch_mode(self, mock_manager, mock_parse, mock_batch):
+        res = self.parseRecords([1, 2, 3])
+        self.assertEqual(res, [1, 2, 3])
+        mock_parse.assert_not_called()
+
+    @patch('service.MANAGER')
+    def test_parse_batch_success(self, mockManager):
+        testRecs = [
+            {'kinesis': {'data': base64.b64encode(json.dumps({
+                'status': status,
+                'source': 'test',
+                'data': 'data{}'.format(status)
+            }).encode('utf-8'))}}
+            for status in [200, 204, 200]
+        ]
+        mockDBManager = MagicMock()
+        res = self.parseBatch(testRecs, mockDBManager)
+        self.assertEqual([r['status'] for r in res], [200, 200])
+        mockDBManager.importBatch.assert_called_once_with(res)
+        mockManager.commitChanges.assert_called_once()
+        mockManager.session.rollback.assert_not_called()
+
+    @patch('service.parseRecord', side_effect=['rec1', None])
+    @patch('service.MANAGER')
+    def test_parse_batch_fallback(self, mockManager, mockParse):
+        testRecs = [
+            {'kinesis': {'data': base64.b64encode(json.dumps({
+                'status': 200,
+                'data': 'data{}'.format(i)
+            }).encode('utf-8'))}}
+            for i in range(2)
+        ]
+        mockDBManager = MagicMock()
+        mockManager.commitChanges.side_effect = IntegrityError('', '', None)
+        res = self.parseBatch(testRecs, mockDBManager)
+        self.assertEqual(res, ['rec1', None])
+        mockManager.session.rollback.assert_called_once()
+        mockDBManager.clearMessages.assert_called_once()
+        mockParse.assert_has_calls([
+            unittest.mock.call(testRecs[0], mockDBManager),
+            unittest.mock.call(testRecs[1], mockDBManager)
+        ])
+
+    def test_expand_records(self):
+        plainRec = {'kinesis': {'data': base64.b64encode(json.dumps({
+            'status': 200, 'type': 'work', 'data': 'data0'
+        }).encode('utf-8'))}}
+        aggregateRec = {'kinesis': {'data': base64.b64encode((
+            '{"status": 200, "type": "aggregate", "records": ['
+            '{"status": 200, "type": "work", "data": "data1"}, '
+            '{"status": 200, "type": "work", "data": "data2"}]}'
+        ).encode('utf-8'))}}
+        res = self.expandRecords([plainRec, aggregateRec, 3])
+        self.assertEqual(len(res), 4)
+        self.assertEqual(res[0], plainRec)
+        self.assertEqual(
+            json.loads(base64.b64decode(res[2]['kinesis']['data'])),
+            {'status': 200, 'type': 'work', 'data': 'data2'}
+        )
+        self.assertEqual(res[3], 3)
+
 if __name__ == '__main__':
     unittest.main()
@@ -156,6 +156,45 @@ class OutputTest(unittest.TestCase):
         with self.assertRaises(OutputError):
             testManager.putKinesisBatch([{'data': 'data', 'recType': 'test'}], 'testStream')
 
+    @patch.multiple(OutputManager, _convertToJSON=DEFAULT, _createPartitionKey=DEFAULT)
+    @patch('sfrCore.lib.outputWriter.time.sleep')
+    def test_putKinesisBatch_failed_records(self, mock_sleep, _convertToJSON, _createPartitionKey):
+        _convertToJSON.side_effect = ['json1', 'json2']
+        _createPartitionKey.side_effect = [1, 2]
+        testManager = MockOutputManager()
+        testManager.KINESIS_CLIENT.put_records.side_effect = [
+            {'FailedRecordCount': 1, 'Records': [
+                {'SequenceNumber': '1'}, {'ErrorCode': 'InternalFailure'}
+            ]},
+            {'FailedRecordCount': 0, 'Records': [{'SequenceNumber': '2'}]}
+        ]
+
+        testManager.putKinesisBatch([
+            {'data': 'data1', 'recType': 'test'},
+            {'data': 'data2', 'recType': 'test'}
+        ], 'testStream')
+        testManager.KINESIS_CLIENT.put_records.assert_called_with(
+            Records=[{'Data': 'json2', 'PartitionKey': 2}],
+            StreamName='testStream'
+        )
+        testManager.KINESIS_CLIENT.put_records.side_effect = None
+
+    @patch.multiple(OutputManager, _convertToJSON=DEFAULT, _createPartitionKey=DEFAULT)
+    @patch('sfrCore.lib.outputWriter.time.sleep')
+    def test_putKinesisBatch_retries_exhausted(self, mock_sleep, _convertToJSON, _createPartitionKey):
+        _convertToJSON.return_value = 'jsonDict'
+        _createPartitionKey.return_value = 1
+        testManager = MockOutputManager()
+        testManager.KINESIS_CLIENT.put_records.side_effect = None
+        testManager.KINESIS_CLIENT.put_records.return_value = {
+            'FailedRecordCount': 1,
+            'Records': [{'ErrorCode': 'ProvisionedThroughputExceededException'}]
+        }
+
+        with self.assertRaises(OutputError):
+            testManager.putKinesisBatch([{'data': 'data', 'recType': 'test'}], 'testStream')
+        testManager.KINESIS_CLIENT.put_records.reset_mock(return_value=True)
+
     @patch.multiple(OutputManager, _convertToJSON=DEFAULT)
     def test_putQueueBatches(self, _convertToJSON):
         _convertToJSON.side_effect = ['dict1', 'dict2']
@@ -174,3 +213,16 @@ class OutputTest(unittest.TestCase):
 
         with self.assertRaises(OutputError):
             testManager.putQueueBatches(['msg1'], 'testQueue')
+
+    @patch.multiple(OutputManager, _convertToJSON=DEFAULT)
+    def test_putQueueBatches_rejected(self, _convertToJSON):
+        _convertToJSON.return_value = 'jsonDict'
+        testManager = MockOutputManager()
+        testManager.SQS_CLIENT.send_message_batch.side_effect = None
+        testManager.SQS_CLIENT.send_message_batch.return_value = {
+            'Failed': [{'Id': '0', 'SenderFault': True}]
+        }
+
+        with self.assertRaises(OutputError):
+            testManager.putQueueBatches(['msg1'], 'testQueue')
+        testManager.SQS_CLIENT.send_message_batch.reset_mock(return_value=True)
@@ -71,6 +71,19 @@ class TestWorkImporter(unittest.TestCase):
         mockLookup.assert_called_once_with('session', [], None)
         self.assertEqual(testImporter.kinesisMsgs['test'][0]['data']['primary_identifier']['identifier'], 'testUUID')
 
+    @patch.dict('os.environ', {'UPDATE_STREAM': 'test'})
+    @patch.object(Work, 'lookupWork')
+    def test_lookupRecord_prefetched(self, mockLookup):
+        mockWork = MagicMock()
+        mockWork.uuid.hex = 'testUUID'
+        testImporter = WorkImporter(
+            {'data': {}}, 'session', defaultdict(list), defaultdict(list)
+        )
+        testImporter.setExistingWork(mockWork)
+        testAction = testImporter.lookupRecord()
+        self.assertEqual(testAction, 'update')
+        mockLookup.assert_not_called()
+
     @patch.dict('os.environ', {'CLASSIFY_QUEUE': 'testQueue'})
     @patch.multiple(Work, insert=DEFAULT, uuid=DEFAULT)
     @patch.multiple(WorkImporter, storeCovers=DEFAULT, storeEpubs=DEFAULT)
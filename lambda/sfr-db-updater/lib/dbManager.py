@@ -43,8 +43,8 @@ class DBUpdater:
         return '{} #{}'.format(recordType.upper(), updater.identifier)
 
     def sendMessages(self):
-        for records, stream in self.kinesisMsgs.items():
-            OutputManager.putKinesisBatch(stream, records)
+        for stream, records in self.kinesisMsgs.items():
+            OutputManager.putKinesisBatch(records, stream)
 
-        for messages, queue in self.sqsMsgs.items():
-            OutputManager.putQueueBatches(queue, messages)
+        for queue, messages in self.sqsMsgs.items():
+            OutputManager.putQueueBatches(messages, queue)
@@ -1,39 +1,49 @@
 import json
-import os
-from pprint import pprint
 
 from helpers.errorHelpers import KinesisError
 from helpers.logHelpers import createLog
 from helpers.clientHelpers import createAWSClient
+from lib.kinesisBuffer import KinesisBuffer
 
 logger = createLog('kinesis_write')
 
 
 class KinesisOutput():
-    """Class for managing connections and operations with AWS Kinesis"""
+    """Class for managing connections and operations with AWS Kinesis. Records
+    are buffered and written to their streams in batches, either when a full
+    batch has accumulated or when flush() is called.
+    """
     KINESIS_CLIENT = createAWSClient('kinesis')
+    BUFFER = KinesisBuffer(KINESIS_CLIENT)
 
     def __init__(self):
         pass
 
     @classmethod
     def putRecord(cls, outputObject, stream, doabID):
-        """Put an event into the specific Kinesis stream"""
-        logger.info('Writing results to Kinesis {}'.format(stream))
-
+        """Add an event to the buffer for the specific Kinesis stream"""
         # The default lambda function here converts all objects into dicts
         kinesisStream = json.dumps(
             outputObject,
             ensure_ascii=False,
             default=lambda x: vars(x)
         )
-        
-        try:
-            cls.KINESIS_CLIENT.put_record(
-                StreamName=stream,
-                Data=kinesisStream,
-                PartitionKey=doabID
-            )
-        except:
+
+        failed = cls.BUFFER.add(stream, kinesisStream, doabID)
+        KinesisOutput.checkFailed(failed)
+
+    @classmethod
+    def flush(cls):
+        """Write all buffered events to their streams"""
+        logger.info('Writing results to Kinesis')
+        KinesisOutput.checkFailed(cls.BUFFER.flush())
+
+    @staticmethod
+    def checkFailed(failed):
+        if failed:
             logger.error('Kinesis Write error!')
-            raise KinesisError('Failed to write result to output stream!')
\ No newline at end of file
+            raise KinesisError(
+                'Failed to write {} results to output stream!'.format(
+                    len(failed)
+                )
+            )
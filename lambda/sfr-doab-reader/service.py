@@ -55,6 +55,7 @@ def loadSingleRecord(loader, marcRels, singleURL):
         }
         KinesisOutput.putRecord(outRec, os.environ['OUTPUT_STREAM'], doabID)
 
+    KinesisOutput.flush()
 
 
 def readOAIFeed(loader, marcRels, resToken=None):
@@ -93,6 +94,7 @@ def readOAIFeed(loader, marcRels, resToken=None):
     logger.info('Putting parsed records into {} stream'.format(
         os.environ['OUTPUT_STREAM']
     ))
+    KinesisOutput.flush()
 
 
     logger.info('Processed {} DOAB records'.format(str(processCount)))
@@ -48,6 +48,7 @@ class TestHandler(unittest.TestCase):
         mock_loaders.loadOAIRecord.assert_called_with('test_url')
         mock_oai.assert_called_once()
         mock_marc.assert_called_with('records', 'test_rels')
+        mock_kinesis.flush.assert_called_once()
     
     @patch('service.Loaders')
     @patch('service.readOAIFeed')
@@ -69,6 +70,7 @@ class TestHandler(unittest.TestCase):
             'message': 'Retrieved Gutenberg Metadata'
         }
         mock_kinesis.putRecord.assert_called_with(testOut, 'test_stream', 1)
+        mock_kinesis.flush.assert_called_once()
         mock_feed.assert_not_called()
     
     @patch('service.Loaders')
@@ -0,0 +1,133 @@
+import json
+import unittest
+from unittest.mock import patch, MagicMock
+
+from lib.kinesisBuffer import KinesisBuffer
+
+
+class StubKinesisClient():
+    """Accepts put_records calls, failing each record the number of times
+    given by the "fail" value of its data"""
+    def __init__(self):
+        self.calls = []
+        self.attempts = {}
+
+    def put_records(self, Records, StreamName):
+        self.calls.append(Records)
+        results = []
+        for rec in Records:
+            attempt = self.attempts.get(rec['PartitionKey'], 0)
+            self.attempts[rec['PartitionKey']] = attempt + 1
+            if attempt < json.loads(rec['Data']).get('fail', 0):
+                results.append({
+                    'ErrorCode': 'ProvisionedThroughputExceededException'
+                })
+            else:
+                results.append({'SequenceNumber': '1', 'ShardId': '1'})
+
+        return {
+            'FailedRecordCount': len([r for r in results if 'ErrorCode' in r]),
+            'Records': results
+        }
+
+
+@patch('lib.kinesisBuffer.time.sleep')
+class TestKinesisBuffer(unittest.TestCase):
+    def test_add_no_flush(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub, autoFlush=False)
+        for i in range(600):
+            self.assertEqual(testBuffer.add('testStream', '{}', str(i)), [])
+
+        self.assertEqual(stub.calls, [])
+        self.assertEqual(len(testBuffer.records['testStream']), 600)
+
+    def test_add_auto_flush(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub)
+        for i in range(501):
+            testBuffer.add('testStream', '{}', str(i))
+
+        self.assertEqual([len(call) for call in stub.calls], [500])
+        self.assertEqual(len(testBuffer.records['testStream']), 1)
+
+    def test_flush_chunks(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub, autoFlush=False)
+        for i in range(1201):
+            testBuffer.add('testStream', '{}', str(i))
+
+        self.assertEqual(testBuffer.flush(), [])
+        self.assertEqual([len(call) for call in stub.calls], [500, 500, 201])
+        self.assertEqual(testBuffer.records, {})
+        mock_sleep.assert_not_called()
+
+    def test_chunk_records_bytes(self, mock_sleep):
+        records = [('0' * 1048000, str(i)) for i in range(6)]
+        chunks = list(KinesisBuffer.chunkRecords(records))
+        self.assertEqual([len(chunk) for chunk in chunks], [5, 1])
+
+    def test_flush_retry_failed(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.add('testStream', '{}', '1')
+        testBuffer.add('testStream', '{"fail": 2}', '2')
+
+        self.assertEqual(testBuffer.flush(), [])
+        self.assertEqual(len(stub.calls), 3)
+        self.assertEqual(
+            stub.calls[2], [{'Data': '{"fail": 2}', 'PartitionKey': '2'}]
+        )
+        self.assertEqual(mock_sleep.call_args[0][0], 0.2)
+
+    def test_flush_retries_exhausted(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.maxRetries = 2
+        testBuffer.add('testStream', '{"fail": 5}', '1')
+
+        self.assertEqual(testBuffer.flush(), [('{"fail": 5}', '1')])
+        self.assertEqual(len(stub.calls), 3)
+
+    def test_flush_request_error(self, mock_sleep):
+        mockClient = MagicMock()
+        mockClient.put_records.side_effect = Exception('test')
+        testBuffer = KinesisBuffer(mockClient)
+        testBuffer.add('testStream', '{}', '1')
+
+        self.assertEqual(testBuffer.flush(), [('{}', '1')])
+        self.assertEqual(testBuffer.records, {})
+
+    def test_flush_oversized(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.add('testStream', '0' * 1048576, '1')
+        testBuffer.add('testStream', '{}', '2')
+
+        self.assertEqual(testBuffer.flush(), [('0' * 1048576, '1')])
+        self.assertEqual(stub.calls, [[{'Data': '{}', 'PartitionKey': '2'}]])
+
+    @patch.dict('os.environ', {
+        'KINESIS_AGGREGATE': 'true', 'KINESIS_AGGREGATE_BYTES': '60'
+    })
+    def test_flush_aggregate(self, mock_sleep):
+        stub = StubKinesisClient()
+        testBuffer = KinesisBuffer(stub)
+        testRecords = [
+            '{"data": "%s"}' % i for i in range(5)
+        ] + ['{"data": "%s"}' % ('x' * 60)]
+        for i, record in enumerate(testRecords):
+            testBuffer.add('testStream', record, str(i))
+
+        testBuffer.flush()
+
+        sent = stub.calls[0]
+        self.assertEqual(len(sent), 3)
+        firstAgg = json.loads(sent[0]['Data'])
+        self.assertEqual(firstAgg['type'], 'aggregate')
+        self.assertEqual(firstAgg['records'], [
+            {'data': str(i)} for i in range(4)
+        ])
+        self.assertEqual(sent[0]['PartitionKey'], '0')
+        self.assertEqual(sent[1]['Data'], testRecords[5])
+        self.assertEqual(json.loads(sent[2]['Data']), {'data': '4'})
@@ -0,0 +1,186 @@
+import os
+import time
+
+from elasticsearch.exceptions import TransportError
+from elasticsearch.helpers import BulkIndexError, expand_action
+
+from helpers.logHelpers import createLog
+
+logger = createLog('bulk_indexer')
+
+
+class BulkIndexer():
+    """Manages bulk imports into ElasticSearch. Rather than grouping
+    documents by count, chunks are sized by the volume of serialized data
+    they contain. This target size adapts to the responses received from
+    ElasticSearch, shrinking when requests are rejected or slow and growing
+    again when they complete cleanly. Documents rejected with a 429 status
+    are retried with an exponential backoff.
+
+    Configured with the following (optional) environment variables:
+    ES_BULK_MAX_BYTES -- upper bound on the size of a request (10MB)
+    ES_BULK_MIN_BYTES -- lower bound for the adaptive chunk size (512KB)
+    ES_BULK_MAX_DOCS -- maximum number of documents in a request (500)
+    ES_BULK_LATENCY -- request duration in seconds above which chunks are
+    reduced in size (5)
+    ES_BULK_RETRIES -- number of times rejected documents are retried (3)
+    ES_BULK_BACKOFF -- initial retry wait in seconds, doubled each retry (2)
+    """
+    MAX_BACKOFF = 60
+
+    def __init__(self, client):
+        self.client = client
+
+        self.maxBytes = int(os.environ.get('ES_BULK_MAX_BYTES', 10485760))
+        self.minBytes = int(os.environ.get('ES_BULK_MIN_BYTES', 524288))
+        self.maxDocs = int(os.environ.get('ES_BULK_MAX_DOCS', 500))
+        self.maxLatency = float(os.environ.get('ES_BULK_LATENCY', 5))
+        self.maxRetries = int(os.environ.get('ES_BULK_RETRIES', 3))
+        self.backoff = float(os.environ.get('ES_BULK_BACKOFF', 2))
+
+        self.chunkBytes = self.maxBytes
+
+    def streamingBulk(self, actions, raiseOnError=True):
+        """Import the provided actions, yielding an (ok, item) tuple for each
+        as with the elasticsearch-py streaming_bulk helper. If raiseOnError
+        is set a BulkIndexError is raised for any chunk containing documents
+        that could not be imported.
+        """
+        for chunk in self.chunkActions(actions):
+            results, errors = self.sendChunk(chunk)
+
+            if errors and raiseOnError:
+                raise BulkIndexError(
+                    '{} document(s) failed to index.'.format(len(errors)),
+                    errors
+                )
+
+            for result in results:
+                yield result
+
+    def chunkActions(self, actions):
+        """Group actions into chunks of serialized lines. Each chunk is
+        closed when adding the next document would exceed the current target
+        size, so documents larger than the target are sent on their own.
+        """
+        chunk = []
+        chunkSize = 0
+
+        for action in actions:
+            lines = self.serializeAction(action)
+            actionSize = sum(len(line.encode('utf-8')) + 1 for line in lines)
+
+            if actionSize > self.maxBytes:
+                logger.warning('Document of {} bytes exceeds limit of {}'.format(
+                    actionSize, self.maxBytes
+                ))
+
+            if chunk and (
+                chunkSize + actionSize > self.chunkBytes
+                or len(chunk) >= self.maxDocs
+            ):
+                yield chunk
+                chunk = []
+                chunkSize = 0
+
+            chunk.append(lines)
+            chunkSize += actionSize
+
+        if chunk:
+            yield chunk
+
+    def serializeAction(self, action):
+        serializer = self.client.transport.serializer
+        actionLine, data = expand_action(action)
+        lines = [serializer.dumps(actionLine)]
+        if data is not None:
+            lines.append(serializer.dumps(data))
+
+        return lines
+
+    def sendChunk(self, chunk):
+        """Send a chunk to the bulk API, retrying any documents rejected with
+        a 429 status until they succeed or the retry limit is reached. The
+        target chunk size is adjusted after each request.
+        """
+        results = []
+        errors = []
+
+        for attempt in range(self.maxRetries + 1):
+            if attempt:
+                time.sleep(min(
+                    BulkIndexer.MAX_BACKOFF,
+                    self.backoff * 2 ** (attempt - 1)
+                ))
+
+            startTime = time.time()
+            try:
+                resp = self.client.bulk(
+                    '\n'.join(line for lines in chunk for line in lines) + '\n'
+                )
+            except TransportError as err:
+                # The entire request can be rejected if the cluster is
+                # overloaded, in which case every document is retried
+                if err.status_code != 429:
+                    raise err
+                resp = {
+                    'items': [self.rejectedItem(lines) for lines in chunk]
+                }
+            duration = time.time() - startTime
+
+            toRetry = []
+            rejected = False
+            for lines, item in zip(chunk, resp['items']):
+                op, info = next(iter(item.items()))
+                ok = 200 <= info.get('status', 500) < 300
+
+                if info.get('status') == 429:
+                    rejected = True
+                    if attempt < self.maxRetries:
+                        toRetry.append(lines)
+                        continue
+
+                results.append((ok, {op: info}))
+                if not ok:
+                    errors.append({op: info})
+
+            self.adjustChunkSize(rejected, duration)
+
+            if not toRetry:
+                break
+
+            logger.info('Retrying {} rejected document(s)'.format(
+                len(toRetry)
+            ))
+            chunk = toRetry
+
+        return results, errors
+
+    def rejectedItem(self, lines):
+        """Build a response item with a 429 status for an action from a
+        rejected request, taking its op type, index and id from the action
+        line as ElasticSearch would have returned them.
+        """
+        actionLine = self.client.transport.serializer.loads(lines[0])
+        op, meta = next(iter(actionLine.items()))
+        item = {
+            key: meta[key] for key in ('_index', '_type', '_id') if key in meta
+        }
+        item['status'] = 429
+        return {op: item}
+
+    def adjustChunkSize(self, rejected, duration):
+        """Halve the target chunk size when ElasticSearch rejects documents
+        or is slow to respond, otherwise grow it by a quarter. The size is
+        kept between ES_BULK_MIN_BYTES and ES_BULK_MAX_BYTES.
+        """
+        if rejected or duration > self.maxLatency:
+            newSize = max(self.minBytes, self.chunkBytes // 2)
+        else:
+            newSize = min(self.maxBytes, int(self.chunkBytes * 1.25))
+
+        if newSize != self.chunkBytes:
+            logger.debug('Adjusting bulk chunk size to {} bytes'.format(
+                newSize
+            ))
+            self.chunkBytes = newSize
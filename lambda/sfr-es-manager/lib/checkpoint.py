@@ -0,0 +1,105 @@
+from datetime import datetime
+import json
+import os
+
+from botocore.exceptions import ClientError
+
+from helpers.clientHelpers import createAWSClient
+from helpers.errorHelpers import DataError
+from helpers.logHelpers import createLog
+
+logger = createLog('checkpoint')
+
+
+class ReindexCheckpoint():
+    """Stores the position of a reindex run so that an interrupted run can be
+    resumed from the last fully indexed page. If REINDEX_CHECKPOINT_BUCKET is
+    set the checkpoint is stored in S3, otherwise it is written to a local
+    file in REINDEX_CHECKPOINT_DIR (defaults to /tmp).
+
+    Along with the position of the run (the id and date_modified of the last
+    indexed work) any other values describing the run can be stored. The
+    arguments the run was started with (its mode and ranges) are stored too,
+    and a checkpoint cannot be resumed by a run with different arguments.
+    """
+    DATE_FIELDS = ['date_modified', 'started']
+    DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+    def __init__(self, name, run=None):
+        self.name = name
+        self.run = run
+        self.bucket = os.environ.get('REINDEX_CHECKPOINT_BUCKET', None)
+        self.key = 'checkpoints/{}.json'.format(name)
+        self.path = os.path.join(
+            os.environ.get('REINDEX_CHECKPOINT_DIR', '/tmp'),
+            '{}.json'.format(name)
+        )
+
+        self.s3Client = createAWSClient('s3') if self.bucket else None
+
+    def load(self):
+        """Return the stored cursor for this run, or None if the run has not
+        been started or was completed.
+        """
+        try:
+            if self.s3Client:
+                checkpointObj = self.s3Client.get_object(
+                    Bucket=self.bucket, Key=self.key
+                )
+                cursor = json.loads(checkpointObj['Body'].read())
+            else:
+                with open(self.path, 'r') as checkpointFile:
+                    cursor = json.load(checkpointFile)
+        except (ClientError, FileNotFoundError):
+            logger.info('No checkpoint found for {}'.format(self.name))
+            return None
+
+        storedRun = cursor.pop('run', None)
+        if storedRun != self.run:
+            raise DataError(
+                'Checkpoint {} was started with {}, not {}. Restart the run '
+                'or use a different checkpoint name'.format(
+                    self.name, storedRun, self.run
+                )
+            )
+
+        logger.info('Resuming {} from work {}'.format(
+            self.name, cursor.get('id', None)
+        ))
+        for field in ReindexCheckpoint.DATE_FIELDS:
+            if cursor.get(field, None) is not None:
+                cursor[field] = datetime.strptime(
+                    cursor[field], ReindexCheckpoint.DATE_FORMAT
+                )
+
+        return cursor
+
+    def save(self, cursor):
+        logger.debug('Storing checkpoint for {} at work {}'.format(
+            self.name, cursor.get('id', None)
+        ))
+        checkpointData = {
+            field: value.strftime(ReindexCheckpoint.DATE_FORMAT)
+            if isinstance(value, datetime) else value
+            for field, value in cursor.items()
+        }
+        if self.run is not None:
+            checkpointData['run'] = self.run
+        checkpointJSON = json.dumps(checkpointData)
+
+        if self.s3Client:
+            self.s3Client.put_object(
+                Bucket=self.bucket, Key=self.key, Body=checkpointJSON
+            )
+        else:
+            with open(self.path, 'w') as checkpointFile:
+                checkpointFile.write(checkpointJSON)
+
+    def clear(self):
+        logger.info('Clearing checkpoint for {}'.format(self.name))
+        if self.s3Client:
+            self.s3Client.delete_object(Bucket=self.bucket, Key=self.key)
+        else:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
@@ -1,7 +1,10 @@
 import os
 from datetime import datetime, timedelta
 
-from sfrCore import Work
+from sqlalchemy import tuple_
+from sqlalchemy.orm import configure_mappers, selectinload
+
+from sfrCore import Work, Instance, Item, Identifier, Agent, Rights
 
 from helpers.logHelpers import createLog
 from helpers.errorHelpers import DBError
@@ -23,3 +26,126 @@ def retrieveRecords(session):
         .filter(Work.date_modified >= fetchPeriod)\
         .all():
         yield workID
+
+
+def retrieveWorks(session, workIDs):
+    """Load a batch of works by id along with every related record used to
+    build their ElasticSearch documents. Relationships are eagerly loaded in
+    a fixed number of queries per batch, rather than lazily per work.
+    """
+    logger.debug('Loading batch of {} works'.format(len(workIDs)))
+    return session.query(Work)\
+        .filter(Work.id.in_(workIDs))\
+        .options(*loadOptions())\
+        .all()
+
+
+def loadOptions():
+    """Generate the loader options that cover the relationships traversed
+    by ESDoc. The backref relationships (dates, rights, etc.) only exist once
+    the mappers have been configured, so this must happen first.
+    """
+    configure_mappers()
+
+    return [
+        selectinload(Work.dates),
+        selectinload(Work.alt_titles),
+        selectinload(Work.subjects),
+        selectinload(Work.measurements),
+        selectinload(Work.links),
+        selectinload(Work.language),
+        *agentOptions(selectinload(Work.agent_works)),
+        *identifierOptions(selectinload(Work.identifiers)),
+        selectinload(Work.instances).selectinload(Instance.dates),
+        selectinload(Work.instances).selectinload(Instance.language),
+        selectinload(Work.instances).selectinload(Instance.links),
+        selectinload(Work.instances)
+            .selectinload(Instance.rights)
+            .selectinload(Rights.dates),
+        *agentOptions(
+            selectinload(Work.instances)
+                .selectinload(Instance.agent_instances)
+        ),
+        selectinload(Work.instances)
+            .selectinload(Instance.items)
+            .selectinload(Item.links),
+        *identifierOptions(
+            selectinload(Work.instances)
+                .selectinload(Instance.items)
+                .selectinload(Item.identifiers)
+        )
+    ]
+
+
+def agentOptions(relLoad):
+    """Extend a loader for an agent association table to its agents and
+    their aliases and dates.
+    """
+    return [
+        relLoad.joinedload('agent').selectinload(Agent.aliases),
+        relLoad.joinedload('agent').selectinload(Agent.dates)
+    ]
+
+
+def identifierOptions(relLoad):
+    """Extend a loader for an identifier relationship to each of the
+    type-specific identifier tables.
+    """
+    return [
+        relLoad.selectinload(getattr(Identifier, idType or 'generic'))
+        for idType in Identifier.identifierTypes.keys()
+    ]
+
+
+def retrievePages(session, pageSize, cursor=None, startID=None, endID=None,
+                  startDate=None, endDate=None):
+    """Walk the works table using keyset pagination, yielding pages of
+    (id, date_modified) rows. If a date range is provided works are walked in
+    (date_modified, id) order, otherwise they are walked by id. Each page is
+    fetched with a single bounded query, so the full set of ids is never held
+    in memory.
+
+    Arguments:
+    session -- database session
+    pageSize -- maximum number of rows to include in a page
+    cursor -- dict with the id and date_modified of the last row processed,
+    paging will resume from the row after this one
+    startID/endID -- optional inclusive bounds on the work id
+    startDate/endDate -- optional inclusive bounds on date_modified
+    """
+    byDate = startDate is not None or endDate is not None
+
+    while True:
+        query = session.query(Work.id, Work.date_modified)
+
+        if startID is not None:
+            query = query.filter(Work.id >= startID)
+        if endID is not None:
+            query = query.filter(Work.id <= endID)
+        if startDate is not None:
+            query = query.filter(Work.date_modified >= startDate)
+        if endDate is not None:
+            query = query.filter(Work.date_modified <= endDate)
+
+        if byDate:
+            if cursor is not None:
+                query = query.filter(
+                    tuple_(Work.date_modified, Work.id)
+                    > tuple_(cursor['date_modified'], cursor['id'])
+                )
+            query = query.order_by(Work.date_modified, Work.id)
+        else:
+            if cursor is not None:
+                query = query.filter(Work.id > cursor['id'])
+            query = query.order_by(Work.id)
+
+        page = query.limit(pageSize).all()
+        if len(page) < 1:
+            break
+
+        logger.debug('Loaded page of {} works from {}'.format(
+            len(page), page[0][0]
+        ))
+        yield page
+
+        cursor = {'id': page[-1][0], 'date_modified': page[-1][1]}
@@ -1,7 +1,11 @@
+from datetime import datetime
+from math import ceil
+from multiprocessing import Process, Pipe
+from multiprocessing.connection import wait
 import os
 import time
 import json
-from elasticsearch.helpers import bulk, BulkIndexError, streaming_bulk
+from elasticsearch.helpers import bulk, BulkIndexError
 from elasticsearch import Elasticsearch
 from elasticsearch.exceptions import (
     ConnectionError,
@@ -14,7 +18,7 @@ from elasticsearch_dsl.wrappers import Range
 
 from sqlalchemy.orm import configure_mappers
 
-from sfrCore import Work as DBWork
+from sfrCore import Work as DBWork, SessionManager
 
 from model.elasticDocs import (
     Language,
@@ -30,7 +34,9 @@ from model.elasticDocs import (
     Rights
 )
 
-from lib.dbManager import retrieveRecords
+from lib.dbManager import retrieveRecords, retrieveWorks, retrievePages
+from lib.bulkIndexer import BulkIndexer
+from lib.indexDiffer import IndexDiffer
 
 from helpers.logHelpers import createLog
 from helpers.errorHelpers import ESError
@@ -43,10 +49,16 @@ class ESConnection():
         self.client = None
         self.tries = 0
         self.batch = []
+        self.batchSize = int(os.environ.get('INDEX_BATCH_SIZE', 100))
+        self.workers = int(os.environ.get('INDEX_WORKERS', 1))
+        self.pageSize = int(os.environ.get('REINDEX_PAGE_SIZE', 1000))
+        self.indexCreated = False
 
         self.createElasticConnection()
         self.createIndex()
 
+        self.indexer = BulkIndexer(self.client)
+
         configure_mappers()
 
     def createElasticConnection(self):
@@ -69,6 +81,7 @@ class ESConnection():
                 self.index
             ))
             Work.init()
+            self.indexCreated = True
         else:
             logger.info('ElasticSearch index {} already exists'.format(
                 self.index
@@ -80,11 +93,202 @@ class ESConnection():
         provided size. If a record in the batch errors that is reported and
         logged but it does not prevent the other records in the batch from
         being imported.
+
+        Documents are compared to the hashes of their last indexed versions,
+        and only new or changed documents are sent to ElasticSearch.
+        """
+        if self.workers > 1:
+            records = self.processParallel(session)
+        else:
+            records = self.process(session)
+
+        self.clearCreatedHashes(session)
+        differ = IndexDiffer(session)
+        self.bulkIndex(differ.diffDocuments(records), differ=differ)
+
+    def clearCreatedHashes(self, session):
+        """Stored hashes describe documents in the previous index, so these
+        are cleared if the index was created by this connection.
+        """
+        if self.indexCreated:
+            IndexDiffer(session).clearAll()
+            self.indexCreated = False
+
+    def reindexRecords(self, session, checkpoint, **ranges):
+        """Rebuild the documents for all works, or for those in the provided
+        id or date_modified ranges. Works are walked by keyset pagination and
+        each page is fully imported before the checkpoint is advanced, so
+        that an interrupted run can be restarted from the last complete page.
+        As reindexing generally follows a mapping change, all documents are
+        indexed in full whether or not they have changed.
+        """
+        self.clearCreatedHashes(session)
+        self.indexPages(session, checkpoint, checkpoint.load(), **ranges)
+        checkpoint.clear()
+
+    def indexPages(self, session, checkpoint, cursor, state=None, **ranges):
+        """Index the pages of works following the cursor, saving the position
+        of the run to the checkpoint after each page. Any values in state are
+        stored in the checkpoint alongside this position. A cursor without a
+        position, as saved before a rebuild starts loading, starts from the
+        first work.
+        """
+        if cursor is not None and cursor.get('id', None) is None:
+            cursor = None
+
+        differ = IndexDiffer(session, force=True)
+
+        for page in retrievePages(
+            session, self.pageSize, cursor=cursor, **ranges
+        ):
+            self.indexPage(session, page, differ)
+
+            checkpoint.save(dict(
+                state or {},
+                id=page[-1][0],
+                date_modified=page[-1][1]
+            ))
+
+    def rebuildIndex(self, session, checkpoint, deleteOld=False):
+        """Rebuild the index without interrupting searches against it. All
+        works are loaded into a new, timestamped, index which then replaces
+        the current index behind an alias with the configured ES_INDEX name.
+        Works updated while the rebuild was running are reindexed before the
+        alias is swapped. If deleteOld is set the replaced index is deleted.
+        An index (rather than an alias) with the ES_INDEX name can only be
+        replaced if deleteOld is set, as the two cannot coexist.
+
+        Refreshes and replicas are disabled on the new index while it is
+        loaded. The new index name and its original settings are stored in
+        the checkpoint before loading begins, so an interrupted rebuild
+        resumes loading the same index and still restores its settings
+        before it goes live. The checkpoint is only cleared once the alias
+        has been moved.
+        """
+        alias = self.index
+        if not deleteOld and self.isConcreteIndex(alias):
+            raise ESError(
+                'Index {} would be deleted by the rebuild, set deleteOld to '
+                'replace it'.format(alias)
+            )
+
+        cursor = checkpoint.load() or {}
+        newIndex = cursor.get('index', None) or '{}_{}'.format(
+            alias, datetime.utcnow().strftime('%Y%m%d%H%M%S')
+        )
+        started = cursor.get('started', None) or datetime.utcnow()
+
+        if self.client.indices.exists(index=newIndex) is False:
+            logger.info('Creating index {} for rebuild of {}'.format(
+                newIndex, alias
+            ))
+            Work.init(index=newIndex)
+
+        state = {
+            'index': newIndex,
+            'started': started,
+            'settings': cursor.get('settings', None)
+            or self.refreshSettings(newIndex)
+        }
+        checkpoint.save(dict(cursor, **state))
+        self.disableRefresh(newIndex)
+
+        self.index = newIndex
+        try:
+            self.indexPages(session, checkpoint, cursor, state=state)
+
+            logger.info('Indexing works updated since {}'.format(started))
+            differ = IndexDiffer(session, force=True)
+            for page in retrievePages(
+                session, self.pageSize, startDate=started
+            ):
+                self.indexPage(session, page, differ)
+        finally:
+            self.index = alias
+
+        self.restoreSettings(newIndex, state['settings'])
+        self.swapAlias(alias, newIndex, deleteOld)
+        checkpoint.clear()
+
+    def isConcreteIndex(self, name):
+        return (
+            not self.client.indices.exists_alias(name=name)
+            and self.client.indices.exists(index=name)
+        )
+
+    def swapAlias(self, alias, newIndex, deleteOld):
+        """Point the alias at the new index in a single atomic update. If an
+        index (rather than an alias) currently exists with the alias name it
+        is removed in the same update, as the two cannot coexist, which is
+        only done if deleteOld is set.
+        """
+        actions = [{'add': {'index': newIndex, 'alias': alias}}]
+        oldIndexes = []
+
+        if self.client.indices.exists_alias(name=alias):
+            oldIndexes = [
+                index
+                for index in self.client.indices.get_alias(name=alias).keys()
+                if index != newIndex
+            ]
+            actions = [
+                {'remove': {'index': index, 'alias': alias}}
+                for index in oldIndexes
+            ] + actions
+        elif self.client.indices.exists(index=alias):
+            if not deleteOld:
+                raise ESError(
+                    'Index {} would be deleted by the alias, set deleteOld '
+                    'to replace it'.format(alias)
+                )
+            logger.warning('Replacing index {} with alias'.format(alias))
+            actions.insert(0, {'remove_index': {'index': alias}})
+
+        logger.info('Moving alias {} to {}'.format(alias, newIndex))
+        self.client.indices.update_aliases(body={'actions': actions})
+
+        if deleteOld:
+            for index in oldIndexes:
+                logger.info('Deleting replaced index {}'.format(index))
+                self.client.indices.delete(index=index)
+
+    def indexPage(self, session, page, differ):
+        self.bulkIndex(
+            differ.diffDocuments(self.processPage(session, page)),
+            differ=differ
+        )
+
+    def refreshSettings(self, index):
+        """Return the refresh and replica settings of an index, so that they
+        can be restored by restoreSettings after a bulk load.
         """
+        settingsResp = self.client.indices.get_settings(index=index)
+        indexSettings = next(iter(settingsResp.values()))['settings']['index']
+        return {
+            'refresh_interval': indexSettings.get('refresh_interval', '1s'),
+            'number_of_replicas': indexSettings.get('number_of_replicas', 1)
+        }
+
+    def disableRefresh(self, index):
+        logger.info('Disabling refresh and replicas on {}'.format(index))
+        self.client.indices.put_settings(
+            index=index,
+            body={'index': {'refresh_interval': '-1', 'number_of_replicas': 0}}
+        )
+
+    def restoreSettings(self, index, settings):
+        logger.info('Restoring settings {} on {}'.format(settings, index))
+        self.client.indices.put_settings(index=index, body={'index': settings})
+
+    def bulkIndex(self, records, differ=None):
         success, failure = 0, 0
         errors = []
+
         try:
-            for status, work in streaming_bulk(self.client, self.process(session)):
+            for status, work in self.indexer.streamingBulk(records):
+                if differ:
+                    differ.recordResult(status, work)
+
                 if not status:
                     errors.append(work)
                     failure += 1
@@ -95,24 +299,192 @@ class ESConnection():
         except BulkIndexError as err:
             logger.info('One or more records in the chunk failed to import')
             logger.debug(err)
+            if differ:
+                differ.clearFailed(err.errors)
             raise ESError('Not all records processed smoothly, check logs')
 
+        if differ:
+            differ.saveHashes()
 
     def process(self, session):
-        for workID in retrieveRecords(session):
-            esWork = ESDoc(workID, session)
+        """Generate ES documents for the works to be indexed. Works are
+        loaded from the database in batches (set by INDEX_BATCH_SIZE), with
+        all of their related records, so that each batch requires a fixed
+        number of queries.
+        """
+        for workBatch in ESConnection.batchRecords(
+            retrieveRecords(session), self.batchSize
+        ):
+            yield from ESConnection.buildDocuments(session, workBatch)
+
+    def processPage(self, session, page):
+        """Generate ES documents for a page of works. These are directed to
+        the current index, which may differ from the one set in the document
+        model if the index is being rebuilt.
+        """
+        for workBatch in ESConnection.batchRecords(page, self.batchSize):
+            for doc in ESConnection.buildDocuments(session, workBatch):
+                doc['_index'] = self.index
+                yield doc
+
+    def processParallel(self, session):
+        """Generate ES documents with a pool of worker processes (set by
+        INDEX_WORKERS). The works to be indexed are sorted and split into
+        disjoint ranges of ids, each of which is built by a worker with its
+        own database connection. Completed batches are returned through a
+        Pipe, which blocks the workers if the bulk import falls behind.
+
+        If any worker fails, or exits without completing its range, an
+        ESError is raised once the other workers have finished. If the
+        generator is closed, or the consumer raises, the workers are
+        terminated.
+        """
+        workIDs = sorted(retrieveRecords(session))
+        if len(workIDs) < 1:
+            return
+
+        processes = []
+        conns = []
+        rangeSize = int(ceil(len(workIDs) / self.workers))
+
+        for i in range(0, len(workIDs), rangeSize):
+            logger.info('Starting worker for works {} to {}'.format(
+                workIDs[i][0], workIDs[min(i + rangeSize, len(workIDs)) - 1][0]
+            ))
+            pConn, cConn = Pipe(duplex=False)
+
+            proc = Process(
+                target=processRange,
+                args=(workIDs[i:i + rangeSize], self.batchSize, cConn)
+            )
+            proc.start()
+
+            processes.append(proc)
+            conns.append(pConn)
+            cConn.close()
+
+        failures = []
+        completed = False
+        try:
+            while conns:
+                for c in wait(conns):
+                    try:
+                        out = c.recv()
+                    except EOFError:
+                        # The worker exited without reporting that it had
+                        # completed its range
+                        failures.append('Worker exited unexpectedly')
+                        conns.remove(c)
+                        continue
+
+                    if out == 'DONE':
+                        conns.remove(c)
+                    elif out[0] == 'ERROR':
+                        failures.append(out[1])
+                        conns.remove(c)
+                    else:
+                        yield from out
+
+            completed = True
+        finally:
+            # If the consumer raised or closed the generator, the workers may
+            # be blocked sending batches that will never be read
+            if not completed:
+                logger.warning('Stopping workers before completion')
+                for c in conns:
+                    c.close()
+                for proc in processes:
+                    proc.terminate()
+
+            for proc in processes:
+                proc.join()
+
+        for proc in processes:
+            if proc.exitcode != 0:
+                failures.append('Worker exited with code {}'.format(
+                    proc.exitcode
+                ))
+
+        if failures:
+            logger.error('Workers failed to build documents: {}'.format(
+                failures
+            ))
+            raise ESError('Unable to build all documents, check logs')
+
+    @staticmethod
+    def buildDocuments(session, workBatch):
+        """Load a batch of works and generate their ES documents"""
+        dbWorks = {
+            work.id: work
+            for work in retrieveWorks(session, [w[0] for w in workBatch])
+        }
+
+        for workID in workBatch:
+            dbRec = dbWorks.get(workID[0], None)
+            if dbRec is None:
+                logger.warning('Unable to load work {}'.format(workID[0]))
+                continue
+
+            esWork = ESDoc(workID, session, dbRec=dbRec)
             esWork.indexWork()
             yield esWork.work.to_dict(True)
 
+        # Release the loaded batch so that the session does not hold the
+        # entire set of indexed records in memory
+        session.expunge_all()
+
+    @staticmethod
+    def batchRecords(workIDs, batchSize):
+        batch = []
+        for workID in workIDs:
+            batch.append(workID)
+            if len(batch) >= batchSize:
+                yield batch
+                batch = []
+
+        if len(batch) > 0:
+            yield batch
+
+
+def processRange(workIDs, batchSize, cConn):
+    """Invoked by a worker Process, this builds ES documents for the provided
+    range of works and returns them, a batch at a time, through the pipe.
+    Sends "DONE" once the range is complete, or an ("ERROR", message) tuple
+    if it could not be completed.
+
+    Arguments:
+    @workIDs -- array of work id rows to be processed
+    @batchSize -- number of works to load from the database at once
+    @cConn -- a multiprocessing.Pipe object that returns the generated docs
+    """
+    manager = SessionManager()
+    manager.generateEngine()
+    session = manager.createSession()
+
+    try:
+        for workBatch in ESConnection.batchRecords(workIDs, batchSize):
+            cConn.send(list(ESConnection.buildDocuments(session, workBatch)))
+        cConn.send('DONE')
+    except Exception as err:
+        logger.error('Unable to build documents in worker process')
+        logger.debug(err)
+        # The parent must not treat the rest of the range as complete
+        cConn.send(('ERROR', repr(err)))
+    finally:
+        cConn.close()
+        manager.closeConnection()
+
+
 class ESDoc():
-    def __init__(self, workID, session):
+    def __init__(self, workID, session, dbRec=None):
         self.workID = workID[0]
         self.session = session
-        self.dbRec = None
+        self.dbRec = dbRec
         self.work = self.createWork()
     
     def createWork(self):
-        self.dbRec = self.session.query(DBWork).get(self.workID)
+        if self.dbRec is None:
+            self.dbRec = self.session.query(DBWork).get(self.workID)
         logger.debug('Creating ES record for {}'.format(self.dbRec))
 
         workData = {
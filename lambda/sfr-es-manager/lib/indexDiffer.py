@@ -0,0 +1,149 @@
+from hashlib import sha256
+import json
+
+from sfrCore import IndexHash
+
+from helpers.logHelpers import createLog
+
+logger = createLog('index_differ')
+
+
+class IndexDiffer():
+    """Compares generated ES documents against hashes of the documents last
+    indexed for each work. Unchanged documents are dropped, documents where
+    only some top-level fields have changed are converted to partial updates
+    and all others are passed through to be fully indexed. Hashes are only
+    stored once ElasticSearch has confirmed that a document was imported.
+    """
+    BATCH_SIZE = 100
+
+    def __init__(self, session, force=False):
+        self.session = session
+        self.force = force
+        self.pending = {}
+        self.indexed = {}
+        self.skipped = 0
+
+    def diffDocuments(self, docs):
+        """Generate the actions required to bring the index up to date for
+        the provided documents. If force is set every document is indexed in
+        full, though its hashes are still recorded.
+        """
+        batch = []
+        for doc in docs:
+            batch.append(doc)
+            if len(batch) >= IndexDiffer.BATCH_SIZE:
+                yield from self.diffBatch(batch)
+                batch = []
+
+        if len(batch) > 0:
+            yield from self.diffBatch(batch)
+
+        logger.info('Skipped {} unchanged documents'.format(self.skipped))
+
+    def diffBatch(self, batch):
+        # Stored hashes are not read when forced, so every document is new
+        existing = {} if self.force else IndexHash.lookupHashes(
+            self.session, [doc['_id'] for doc in batch]
+        )
+
+        for doc in batch:
+            docID = str(doc['_id'])
+            docHash, fieldHashes = IndexDiffer.hashDocument(doc['_source'])
+            current = existing.get(docID, None)
+
+            if current is not None and current[0] == docHash:
+                self.skipped += 1
+                continue
+
+            self.pending[docID] = (docHash, fieldHashes)
+
+            if current is None:
+                yield doc
+                continue
+
+            yield IndexDiffer.createAction(doc, fieldHashes, current[1])
+
+    @staticmethod
+    def createAction(doc, fieldHashes, currentHashes):
+        """Return a partial update containing only the changed fields of a
+        document. Changes to object fields, or removed fields, cannot be
+        safely merged into the existing document, so in these cases the full
+        document is returned.
+        """
+        changed = [
+            field for field, fieldHash in fieldHashes.items()
+            if currentHashes.get(field, None) != fieldHash
+        ]
+        removed = set(currentHashes.keys()) - set(fieldHashes.keys())
+
+        if removed or any(
+            isinstance(doc['_source'][field], dict) for field in changed
+        ):
+            return doc
+
+        logger.debug('Updating fields {} for {}'.format(changed, doc['_id']))
+        return {
+            '_op_type': 'update',
+            '_index': doc['_index'],
+            '_type': doc['_type'],
+            '_id': doc['_id'],
+            'doc': {field: doc['_source'][field] for field in changed}
+        }
+
+    @staticmethod
+    def hashDocument(source):
+        fieldHashes = {
+            field: IndexDiffer.hashValue(value)
+            for field, value in source.items()
+        }
+
+        return IndexDiffer.hashValue(fieldHashes), fieldHashes
+
+    @staticmethod
+    def hashValue(value):
+        return sha256(
+            json.dumps(value, sort_keys=True, default=str).encode('utf-8')
+        ).hexdigest()
+
+    def recordResult(self, status, item):
+        """Move the hashes of a successfully imported document out of the
+        pending set, to be stored with the next call to saveHashes.
+        """
+        if not status:
+            return
+
+        docID = str(next(iter(item.values()))['_id'])
+        if docID in self.pending:
+            self.indexed[docID] = self.pending.pop(docID)
+
+    def saveHashes(self):
+        IndexHash.upsertHashes(self.session, self.indexed)
+        self.session.commit()
+        self.indexed = {}
+
+    def clearAll(self):
+        """Remove the stored hashes of every document, so that all documents
+        are fully indexed into a newly created index.
+        """
+        logger.info('Clearing stored hashes for new index')
+        IndexHash.clearHashes(self.session)
+        self.session.commit()
+
+    def clearFailed(self, errors):
+        """Remove the stored hashes for documents that failed to import, so
+        that they are fully reindexed on their next update. This includes
+        partial updates of documents missing from the index.
+        """
+        failedIDs = []
+        for err in errors:
+            info = next(iter(err.values()))
+            if info.get('_id', None) is None:
+                logger.warning('Unable to clear hash for failed item {}'.format(
+                    err
+                ))
+                continue
+            failedIDs.append(str(info['_id']))
+
+        IndexHash.deleteHashes(self.session, failedIDs)
+        self.session.commit()
@@ -1,3 +1,4 @@
+from datetime import datetime, timedelta
 import json
 import traceback
 
@@ -6,6 +7,7 @@ from sfrCore import SessionManager
 from helpers.errorHelpers import NoRecordsReceived, DataError, DBError, ESError
 from helpers.logHelpers import createLog
 from lib.esManager import ESConnection
+from lib.checkpoint import ReindexCheckpoint
 
 """Logger can be passed name of current module
 Can also be instantiated on a class/method basis using dot notation
@@ -28,10 +30,17 @@ def handler(event, context):
     """
     logger.debug('Starting Lambda Execution')
 
-    # Process recently updated records in the database. This is adjustable, 
-    # looks back N seconds to retrieve records. Frequency of runs should be
-    # determined based of experience, does not need to be live
-    indexRecords()
+    if event.get('source', None) == 'reindex':
+        # Rebuild the documents for all works in the database, or those
+        # within a range of ids or modified dates. These runs are resumable
+        # and will pick up from their last checkpoint if re-invoked
+        reindexRecords(event)
+    else:
+        # Process recently updated records in the database. This is
+        # adjustable, looks back N seconds to retrieve records. Frequency of
+        # runs should be determined based of experience, does not need to be
+        # live
+        indexRecords()
 
     logger.info('Successfully invoked lambda')
 
@@ -57,3 +66,72 @@ def indexRecords():
 
     logger.info('Close postgresql session')
     MANAGER.closeConnection()
+
+
+def reindexRecords(event):
+    """Reindexes all records, or those within the id or date range specified
+    in the event. Progress is stored in a checkpoint named by the event (or
+    "reindex") so that an interrupted run resumes from the last indexed page.
+    Setting "restart" in the event discards any existing checkpoint. Both
+    dates are inclusive, so the range ends at the end of the endDate.
+
+    If "rebuild" is set in the event all records are instead loaded into a
+    new index, which replaces the current one behind an alias once complete.
+    Setting "deleteOld" deletes the replaced index.
+    """
+    rebuild = event.get('rebuild', False) is True
+    run = {
+        field: event.get(field, None)
+        for field in ['startID', 'endID', 'startDate', 'endDate']
+    }
+    run['rebuild'] = rebuild
+
+    checkpoint = ReindexCheckpoint(
+        event.get('checkpoint', 'reindex'), run=run
+    )
+    if event.get('restart', False) is True:
+        checkpoint.clear()
+
+    ranges = {
+        'startID': run['startID'],
+        'endID': run['endID'],
+        'startDate': parseDate(run['startDate']),
+        'endDate': parseDate(run['endDate'], endOfDay=True)
+    }
+
+    logger.info('Creating connection to ElasticSearch index')
+    es = ESConnection()
+
+    logger.info('Creating postgresql session')
+    session = MANAGER.createSession()
+
+    if rebuild:
+        logger.info('Rebuilding index')
+        es.rebuildIndex(
+            session, checkpoint, deleteOld=event.get('deleteOld', False)
+        )
+    else:
+        logger.info('Reindexing records')
+        es.reindexRecords(session, checkpoint, **ranges)
+
+    logger.info('Close postgresql session')
+    MANAGER.closeConnection()
+
+
+def parseDate(dateStr, endOfDay=False):
+    """Parse a YYYY-MM-DD date. If endOfDay is set the last moment of that
+    day is returned, so that it can be used as an inclusive upper bound."""
+    if dateStr is None:
+        return None
+
+    try:
+        date = datetime.strptime(dateStr, '%Y-%m-%d')
+    except ValueError:
+        raise DataError('Invalid reindex date {}, must be YYYY-MM-DD'.format(
+            dateStr
+        ))
+
+    if endOfDay:
+        return date + timedelta(days=1) - timedelta(microseconds=1)
+
+    return date
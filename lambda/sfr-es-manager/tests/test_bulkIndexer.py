@@ -0,0 +1,176 @@
+import pytest
+from unittest.mock import patch, MagicMock
+from elasticsearch.exceptions import TransportError
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch.serializer import JSONSerializer
+
+from lib.bulkIndexer import BulkIndexer
+
+
+@patch.dict('os.environ', {
+    'ES_BULK_MAX_BYTES': '1000',
+    'ES_BULK_MIN_BYTES': '100',
+    'ES_BULK_MAX_DOCS': '3'
+})
+class TestBulkIndexer:
+    @pytest.fixture
+    def mockClient(self):
+        client = MagicMock()
+        client.transport.serializer = JSONSerializer()
+        return client
+
+    @staticmethod
+    def createDoc(docID, size=10):
+        return {
+            '_index': 'test',
+            '_type': 'doc',
+            '_id': docID,
+            '_source': {'title': 'x' * size}
+        }
+
+    @staticmethod
+    def bulkResponse(*statuses):
+        return {
+            'items': [{'index': {'status': status}} for status in statuses]
+        }
+
+    def test_create(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        assert indexer.maxBytes == 1000
+        assert indexer.chunkBytes == 1000
+        assert indexer.maxDocs == 3
+
+    def test_chunk_by_docs(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        docs = [TestBulkIndexer.createDoc(i) for i in range(5)]
+        chunks = list(indexer.chunkActions(docs))
+        assert [len(c) for c in chunks] == [3, 2]
+
+    def test_chunk_by_bytes(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        docs = [TestBulkIndexer.createDoc(i, size=400) for i in range(3)]
+        chunks = list(indexer.chunkActions(docs))
+        assert [len(c) for c in chunks] == [2, 1]
+
+    def test_chunk_oversize_doc(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        docs = [
+            TestBulkIndexer.createDoc(1),
+            TestBulkIndexer.createDoc(2, size=2000),
+            TestBulkIndexer.createDoc(3)
+        ]
+        chunks = list(indexer.chunkActions(docs))
+        assert [len(c) for c in chunks] == [1, 1, 1]
+
+    def test_serialize_action(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        lines = indexer.serializeAction(TestBulkIndexer.createDoc(1, size=1))
+        assert lines == [
+            '{"index":{"_index":"test","_type":"doc","_id":1}}',
+            '{"title":"x"}'
+        ]
+
+    def test_streaming_bulk_success(self, mockClient):
+        mockClient.bulk.return_value = TestBulkIndexer.bulkResponse(201, 200)
+        indexer = BulkIndexer(mockClient)
+        docs = [TestBulkIndexer.createDoc(i) for i in range(2)]
+        res = list(indexer.streamingBulk(docs))
+        assert res == [
+            (True, {'index': {'status': 201}}),
+            (True, {'index': {'status': 200}})
+        ]
+        mockClient.bulk.assert_called_once()
+
+    def test_streaming_bulk_error(self, mockClient):
+        mockClient.bulk.return_value = TestBulkIndexer.bulkResponse(201, 400)
+        indexer = BulkIndexer(mockClient)
+        docs = [TestBulkIndexer.createDoc(i) for i in range(2)]
+        with pytest.raises(BulkIndexError):
+            list(indexer.streamingBulk(docs))
+
+    def test_streaming_bulk_error_no_raise(self, mockClient):
+        mockClient.bulk.return_value = TestBulkIndexer.bulkResponse(400)
+        indexer = BulkIndexer(mockClient)
+        docs = [TestBulkIndexer.createDoc(1)]
+        res = list(indexer.streamingBulk(docs, raiseOnError=False))
+        assert res == [(False, {'index': {'status': 400}})]
+
+    @patch('lib.bulkIndexer.time.sleep')
+    def test_send_chunk_retry(self, mock_sleep, mockClient):
+        mockClient.bulk.side_effect = [
+            TestBulkIndexer.bulkResponse(201, 429),
+            TestBulkIndexer.bulkResponse(201)
+        ]
+        indexer = BulkIndexer(mockClient)
+        chunk = list(indexer.chunkActions(
+            [TestBulkIndexer.createDoc(i) for i in range(2)]
+        ))[0]
+        results, errors = indexer.sendChunk(chunk)
+        assert len(results) == 2
+        assert errors == []
+        mock_sleep.assert_called_once_with(2)
+        assert indexer.chunkBytes == 625
+        retryBody = mockClient.bulk.call_args[0][0]
+        assert '"_id":1' in retryBody and '"_id":0' not in retryBody
+
+    @patch('lib.bulkIndexer.time.sleep')
+    def test_send_chunk_retries_exhausted(self, mock_sleep, mockClient):
+        mockClient.bulk.return_value = TestBulkIndexer.bulkResponse(429)
+        indexer = BulkIndexer(mockClient)
+        chunk = list(indexer.chunkActions([TestBulkIndexer.createDoc(1)]))[0]
+        results, errors = indexer.sendChunk(chunk)
+        assert mockClient.bulk.call_count == 4
+        assert results == [(False, {'index': {'status': 429}})]
+        assert len(errors) == 1
+        assert indexer.chunkBytes == 100
+
+    @patch('lib.bulkIndexer.time.sleep')
+    def test_send_chunk_request_rejected(self, mock_sleep, mockClient):
+        mockClient.bulk.side_effect = [
+            TransportError(429, 'es_rejected_execution_exception'),
+            TestBulkIndexer.bulkResponse(201, 201)
+        ]
+        indexer = BulkIndexer(mockClient)
+        chunk = list(indexer.chunkActions(
+            [TestBulkIndexer.createDoc(i) for i in range(2)]
+        ))[0]
+        results, errors = indexer.sendChunk(chunk)
+        assert len(results) == 2
+        assert errors == []
+        assert mockClient.bulk.call_count == 2
+
+    @patch('lib.bulkIndexer.time.sleep')
+    def test_send_chunk_request_rejected_exhausted(self, mock_sleep, mockClient):
+        mockClient.bulk.side_effect = TransportError(
+            429, 'es_rejected_execution_exception'
+        )
+        indexer = BulkIndexer(mockClient)
+        chunk = list(indexer.chunkActions([TestBulkIndexer.createDoc(1)]))[0]
+        results, errors = indexer.sendChunk(chunk)
+        item = {'index': {
+            '_index': 'test', '_type': 'doc', '_id': 1, 'status': 429
+        }}
+        assert results == [(False, item)]
+        assert errors == [item]
+
+    def test_send_chunk_request_error(self, mockClient):
+        mockClient.bulk.side_effect = TransportError(400, 'bad request')
+        indexer = BulkIndexer(mockClient)
+        chunk = list(indexer.chunkActions([TestBulkIndexer.createDoc(1)]))[0]
+        with pytest.raises(TransportError):
+            indexer.sendChunk(chunk)
+
+    def test_adjust_chunk_size(self, mockClient):
+        indexer = BulkIndexer(mockClient)
+        indexer.adjustChunkSize(True, 0)
+        assert indexer.chunkBytes == 500
+        indexer.adjustChunkSize(False, 10)
+        assert indexer.chunkBytes == 250
+        indexer.adjustChunkSize(False, 1)
+        assert indexer.chunkBytes == 312
+        indexer.chunkBytes = 150
+        indexer.adjustChunkSize(True, 1)
+        assert indexer.chunkBytes == 100
+        indexer.chunkBytes = 900
+        indexer.adjustChunkSize(False, 1)
+        assert indexer.chunkBytes == 1000
@@ -0,0 +1,106 @@
+from datetime import datetime
+import json
+import os
+import pytest
+from unittest.mock import patch, MagicMock
+
+from botocore.exceptions import ClientError
+
+from helpers.errorHelpers import DataError
+from lib.checkpoint import ReindexCheckpoint
+
+
+class TestCheckpoint:
+    def test_local_round_trip(self, tmp_path):
+        with patch.dict(os.environ, {'REINDEX_CHECKPOINT_DIR': str(tmp_path)}):
+            checkpoint = ReindexCheckpoint('test')
+            assert checkpoint.load() is None
+
+            checkpoint.save({
+                'id': 10, 'date_modified': datetime(2020, 1, 1, 12, 0, 0)
+            })
+            assert checkpoint.load() == {
+                'id': 10, 'date_modified': datetime(2020, 1, 1, 12, 0, 0)
+            }
+
+            checkpoint.clear()
+            assert checkpoint.load() is None
+
+    def test_local_no_date(self, tmp_path):
+        with patch.dict(os.environ, {'REINDEX_CHECKPOINT_DIR': str(tmp_path)}):
+            checkpoint = ReindexCheckpoint('test')
+            checkpoint.save({'id': 10, 'date_modified': None})
+            assert checkpoint.load() == {'id': 10, 'date_modified': None}
+
+    def test_local_state(self, tmp_path):
+        with patch.dict(os.environ, {'REINDEX_CHECKPOINT_DIR': str(tmp_path)}):
+            checkpoint = ReindexCheckpoint('test')
+            checkpoint.save({
+                'id': 10,
+                'date_modified': None,
+                'index': 'test_index',
+                'started': datetime(2020, 1, 1)
+            })
+            assert checkpoint.load() == {
+                'id': 10,
+                'date_modified': None,
+                'index': 'test_index',
+                'started': datetime(2020, 1, 1)
+            }
+
+    def test_local_run_match(self, tmp_path):
+        with patch.dict(os.environ, {'REINDEX_CHECKPOINT_DIR': str(tmp_path)}):
+            checkpoint = ReindexCheckpoint('test', run={'startID': 1})
+            checkpoint.save({'id': 10, 'date_modified': None})
+            assert checkpoint.load() == {'id': 10, 'date_modified': None}
+
+    def test_local_run_mismatch(self, tmp_path):
+        with patch.dict(os.environ, {'REINDEX_CHECKPOINT_DIR': str(tmp_path)}):
+            checkpoint = ReindexCheckpoint('test', run={'startID': 1})
+            checkpoint.save({'id': 10, 'date_modified': None})
+
+            resumed = ReindexCheckpoint('test', run={'startID': 5})
+            with pytest.raises(DataError):
+                resumed.load()
+
+    @patch.dict(os.environ, {'REINDEX_CHECKPOINT_BUCKET': 'test_bucket'})
+    @patch('lib.checkpoint.createAWSClient')
+    def test_s3_save(self, mock_client):
+        checkpoint = ReindexCheckpoint('test')
+        checkpoint.save({'id': 10, 'date_modified': None})
+        mock_client.return_value.put_object.assert_called_once_with(
+            Bucket='test_bucket',
+            Key='checkpoints/test.json',
+            Body=json.dumps({'id': 10, 'date_modified': None})
+        )
+
+    @patch.dict(os.environ, {'REINDEX_CHECKPOINT_BUCKET': 'test_bucket'})
+    @patch('lib.checkpoint.createAWSClient')
+    def test_s3_load(self, mock_client):
+        mock_body = MagicMock()
+        mock_body.read.return_value = json.dumps({
+            'id': 10, 'date_modified': '2020-01-01T00:00:00.000000'
+        })
+        mock_client.return_value.get_object.return_value = {'Body': mock_body}
+        checkpoint = ReindexCheckpoint('test')
+        assert checkpoint.load() == {
+            'id': 10, 'date_modified': datetime(2020, 1, 1)
+        }
+
+    @patch.dict(os.environ, {'REINDEX_CHECKPOINT_BUCKET': 'test_bucket'})
+    @patch('lib.checkpoint.createAWSClient')
+    def test_s3_load_missing(self, mock_client):
+        mock_client.return_value.get_object.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchKey'}}, 'get_object'
+        )
+        checkpoint = ReindexCheckpoint('test')
+        assert checkpoint.load() is None
+
+    @patch.dict(os.environ, {'REINDEX_CHECKPOINT_BUCKET': 'test_bucket'})
+    @patch('lib.checkpoint.createAWSClient')
+    def test_s3_clear(self, mock_client):
+        checkpoint = ReindexCheckpoint('test')
+        checkpoint.clear()
+        mock_client.return_value.delete_object.assert_called_once_with(
+            Bucket='test_bucket', Key='checkpoints/test.json'
+        )
@@ -10,7 +10,9 @@ os.environ['DB_HOST'] = 'test'
 os.environ['DB_PORT'] = 'test'
 os.environ['DB_NAME'] = 'test'
 
-from lib.dbManager import retrieveRecords
+from datetime import datetime
+
+from lib.dbManager import retrieveRecords, retrieveWorks, retrievePages
 
 
 class TestDBManager:
@@ -23,3 +25,41 @@ class TestDBManager:
         ]
         res = list(retrieveRecords(mockSession))
         assert res == ['work1', 'work2']
+
+    def test_get_works(self):
+        mockSession = MagicMock()
+        mockSession.query.return_value.filter.return_value.options.return_value.all.return_value = [
+            'work1',
+            'work2'
+        ]
+        res = retrieveWorks(mockSession, [1, 2])
+        assert res == ['work1', 'work2']
+
+    def test_get_pages_by_id(self):
+        mockSession = MagicMock()
+        mockQuery = mockSession.query.return_value
+        mockQuery.filter.return_value = mockQuery
+        mockQuery.order_by.return_value = mockQuery
+        mockQuery.limit.return_value.all.side_effect = [
+            [(1, None), (2, None)],
+            [(3, None)],
+            []
+        ]
+        res = list(retrievePages(mockSession, 2, startID=1))
+        assert res == [[(1, None), (2, None)], [(3, None)]]
+        assert mockQuery.filter.call_count == 5
+        assert mockQuery.limit.call_count == 3
+
+    def test_get_pages_by_date_resume(self):
+        mockSession = MagicMock()
+        mockQuery = mockSession.query.return_value
+        mockQuery.filter.return_value = mockQuery
+        mockQuery.order_by.return_value = mockQuery
+        mockQuery.limit.return_value.all.side_effect = [[]]
+        cursor = {'id': 5, 'date_modified': datetime(2020, 1, 1)}
+        res = list(retrievePages(
+            mockSession, 2, cursor=cursor,
+            startDate=datetime(2019, 1, 1), endDate=datetime(2021, 1, 1)
+        ))
+        assert res == []
+        assert mockQuery.filter.call_count == 3
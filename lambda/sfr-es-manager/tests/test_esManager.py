@@ -4,13 +4,15 @@ import pytest
 from unittest.mock import patch, MagicMock, call
 from elasticsearch.exceptions import ConnectionError, TransportError, ConflictError
 from elasticsearch.helpers import BulkIndexError
+from elasticsearch.serializer import JSONSerializer
 from elasticsearch_dsl import DateRange
 
 from helpers.errorHelpers import ESError
 
 os.environ['ES_INDEX'] = 'test'
 
-from lib.esManager import ESConnection, ESDoc
+from lib.esManager import ESConnection, ESDoc, processRange
+from lib.indexDiffer import IndexDiffer
 from helpers.errorHelpers import ESError
 
 @patch.dict('os.environ', {'ES_HOST': 'test', 'ES_PORT': '9200', 'ES_TIMEOUT': '60'})
@@ -60,42 +62,654 @@ class TestESManager:
         assert isinstance(inst.client, MagicMock)
         mock_work.init.assert_not_called()
     
-    @patch('lib.esManager.streaming_bulk', return_value=iter([(True, 1)]))
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.BulkIndexer')
     @patch('lib.esManager.ESConnection.process', side_effect=[1])
     @patch('lib.esManager.Elasticsearch', return_value=client_mock)
-    def test_generate_success(self, mock_elastic, mock_process, mock_stream):
+    def test_generate_success(self, mock_elastic, mock_process, mock_indexer, mock_differ):
+        mock_stream = mock_indexer.return_value.streamingBulk
+        mock_stream.return_value = iter([(True, 1)])
         inst = ESConnection()
         inst.generateRecords('session')
-        mock_stream.assert_has_calls([call(TestESManager.client_mock, 1)])
+        mock_indexer.assert_called_once_with(TestESManager.client_mock)
+        mock_differ.assert_called_once_with('session')
+        mock_differ.return_value.diffDocuments.assert_called_once_with(1)
+        mock_stream.assert_has_calls([
+            call(mock_differ.return_value.diffDocuments.return_value)
+        ])
+        mock_differ.return_value.recordResult.assert_called_once_with(True, 1)
+        mock_differ.return_value.saveHashes.assert_called_once()
+        mock_differ.return_value.clearAll.assert_not_called()
     
-    @patch('lib.esManager.streaming_bulk', return_value=iter([(False, 1)]))
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.BulkIndexer')
+    @patch('lib.esManager.ESConnection.process', side_effect=[1])
+    @patch('lib.esManager.Elasticsearch')
+    def test_generate_new_index(self, mock_elastic, mock_process, mock_indexer, mock_differ, mock_work):
+        mock_client = MagicMock()
+        mock_client.indices.exists.return_value = False
+        mock_elastic.return_value = mock_client
+        mock_indexer.return_value.streamingBulk.return_value = iter([])
+        inst = ESConnection()
+        assert inst.indexCreated is True
+        inst.generateRecords('session')
+        mock_differ.return_value.clearAll.assert_called_once()
+        assert inst.indexCreated is False
+
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.BulkIndexer')
     @patch('lib.esManager.ESConnection.process', side_effect=[1])
     @patch('lib.esManager.Elasticsearch', return_value=client_mock)
-    def test_generate_failure(self, mock_elastic, mock_process, mock_stream):
+    def test_generate_failure(self, mock_elastic, mock_process, mock_indexer, mock_differ):
+        mock_stream = mock_indexer.return_value.streamingBulk
+        mock_stream.return_value = iter([(False, 1)])
         inst = ESConnection()
         inst.generateRecords('session')
-        mock_stream.assert_has_calls([call(TestESManager.client_mock, 1)])
+        mock_differ.return_value.recordResult.assert_called_once_with(False, 1)
     
-    @patch('lib.esManager.streaming_bulk', side_effect=BulkIndexError)
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.BulkIndexer')
     @patch('lib.esManager.ESConnection.process', side_effect=[1])
     @patch('lib.esManager.Elasticsearch', return_value=client_mock)
-    def test_generate_error(self, mock_elastic, mock_process, mock_stream):
+    def test_generate_error(self, mock_elastic, mock_process, mock_indexer, mock_differ):
+        mock_indexer.return_value.streamingBulk.side_effect = BulkIndexError(
+            'test', ['error1']
+        )
         inst = ESConnection()
         with pytest.raises(ESError):
             inst.generateRecords('session')
+        mock_differ.return_value.clearFailed.assert_called_once_with(['error1'])
+        mock_differ.return_value.saveHashes.assert_not_called()
+
+    @patch.dict('os.environ', {'ES_BULK_RETRIES': '1'})
+    @patch('lib.bulkIndexer.time.sleep')
+    @patch('lib.indexDiffer.IndexHash')
+    @patch('lib.esManager.Elasticsearch')
+    def test_bulk_index_request_rejected(self, mock_elastic, mock_hash, mock_sleep):
+        mock_client = MagicMock()
+        mock_client.transport.serializer = JSONSerializer()
+        mock_client.bulk.side_effect = TransportError(
+            429, 'es_rejected_execution_exception'
+        )
+        mock_elastic.return_value = mock_client
+        mock_session = MagicMock()
+        inst = ESConnection()
+        differ = IndexDiffer(mock_session, force=True)
+        with pytest.raises(ESError):
+            inst.bulkIndex(iter([
+                {'_index': 'test', '_type': 'doc', '_id': 'uuid1', '_source': {}},
+                {
+                    '_op_type': 'update', '_index': 'test', '_type': 'doc',
+                    '_id': 'uuid2', 'doc': {}
+                }
+            ]), differ=differ)
+        assert mock_client.bulk.call_count == 2
+        mock_hash.deleteHashes.assert_called_once_with(
+            mock_session, ['uuid1', 'uuid2']
+        )
 
+    @patch('lib.esManager.retrieveWorks')
     @patch('lib.esManager.retrieveRecords')
     @patch('lib.esManager.ESDoc.indexWork')
     @patch('lib.esManager.Elasticsearch', return_value=client_mock)
-    def test_process(self, mock_elastic, mock_index, mock_retrieve):
-        mock_retrieve.return_value = ['work1', 'work2', 'work3']
+    def test_process(self, mock_elastic, mock_index, mock_retrieve, mock_works):
+        mock_retrieve.return_value = [(1,), (2,), (3,)]
+        mock_works.return_value = [
+            TestDict(id=1), TestDict(id=2), TestDict(id=3)
+        ]
+        mock_session = MagicMock()
         with patch('lib.esManager.ESDoc.createWork') as mock_create:
             mock_dict = MagicMock()
             mock_dict.to_dict.side_effect = ['work1', 'work2', 'work3']
             mock_create.return_value = mock_dict
             inst = ESConnection()
-            res = list(inst.process('session'))
+            res = list(inst.process(mock_session))
             assert res == ['work1', 'work2', 'work3']
+            mock_works.assert_called_once_with(mock_session, [1, 2, 3])
+            mock_session.expunge_all.assert_called_once()
+
+    @patch.dict('os.environ', {'INDEX_BATCH_SIZE': '2'})
+    @patch('lib.esManager.retrieveWorks')
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.ESDoc.indexWork')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_batches(self, mock_elastic, mock_index, mock_retrieve, mock_works):
+        mock_retrieve.return_value = [(1,), (2,), (3,)]
+        mock_works.side_effect = [
+            [TestDict(id=1)], [TestDict(id=3)]
+        ]
+        mock_session = MagicMock()
+        with patch('lib.esManager.ESDoc.createWork') as mock_create:
+            mock_dict = MagicMock()
+            mock_dict.to_dict.side_effect = ['work1', 'work3']
+            mock_create.return_value = mock_dict
+            inst = ESConnection()
+            res = list(inst.process(mock_session))
+            assert res == ['work1', 'work3']
+            mock_works.assert_has_calls([
+                call(mock_session, [1, 2]),
+                call(mock_session, [3])
+            ])
+            assert mock_session.expunge_all.call_count == 2
+
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.retrievePages')
+    @patch('lib.esManager.ESConnection.bulkIndex')
+    @patch('lib.esManager.ESConnection.processPage')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_reindex_records(self, mock_elastic, mock_page, mock_bulk, mock_pages, mock_differ):
+        mock_pages.return_value = iter([
+            [(1, 'date1'), (2, 'date2')], [(3, 'date3')]
+        ])
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = {'id': 0, 'date_modified': None}
+        inst = ESConnection()
+        inst.reindexRecords('session', mock_checkpoint, startID=1)
+        mock_pages.assert_called_once_with(
+            'session', 1000, cursor={'id': 0, 'date_modified': None},
+            startID=1
+        )
+        assert mock_bulk.call_count == 2
+        mock_checkpoint.save.assert_has_calls([
+            call({'id': 2, 'date_modified': 'date2'}),
+            call({'id': 3, 'date_modified': 'date3'})
+        ])
+        mock_checkpoint.clear.assert_called_once()
+        mock_differ.assert_called_once_with('session', force=True)
+        mock_bulk.assert_called_with(
+            mock_differ.return_value.diffDocuments.return_value,
+            differ=mock_differ.return_value
+        )
+
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.retrievePages')
+    @patch('lib.esManager.ESConnection.bulkIndex', side_effect=ESError('test'))
+    @patch('lib.esManager.ESConnection.processPage')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_reindex_records_error(self, mock_elastic, mock_page, mock_bulk, mock_pages, mock_differ):
+        mock_pages.return_value = iter([[(1, 'date1')]])
+        mock_checkpoint = MagicMock()
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            inst.reindexRecords('session', mock_checkpoint)
+        mock_checkpoint.save.assert_not_called()
+        mock_checkpoint.clear.assert_not_called()
+
+    @patch('lib.esManager.ESConnection.buildDocuments')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_page(self, mock_elastic, mock_build):
+        mock_build.side_effect = [iter([
+            {'_id': 1, '_index': 'test'}, {'_id': 2, '_index': 'test'}
+        ])]
+        inst = ESConnection()
+        inst.index = 'test_new'
+        res = list(inst.processPage('session', [(1, 'date1'), (2, 'date2')]))
+        assert res == [
+            {'_id': 1, '_index': 'test_new'}, {'_id': 2, '_index': 'test_new'}
+        ]
+        mock_build.assert_called_once_with(
+            'session', [(1, 'date1'), (2, 'date2')]
+        )
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_refresh_settings(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_client.indices.get_settings.return_value = {
+            'test_new': {'settings': {'index': {
+                'refresh_interval': '30s', 'number_of_replicas': '2'
+            }}}
+        }
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        res = inst.refreshSettings('test_new')
+        assert res == {'refresh_interval': '30s', 'number_of_replicas': '2'}
+        mock_client.indices.get_settings.assert_called_once_with(
+            index='test_new'
+        )
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_refresh_settings_defaults(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_client.indices.get_settings.return_value = {
+            'test_new': {'settings': {'index': {}}}
+        }
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        res = inst.refreshSettings('test_new')
+        assert res == {'refresh_interval': '1s', 'number_of_replicas': 1}
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_disable_refresh(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        inst.disableRefresh('test_new')
+        mock_client.indices.put_settings.assert_called_once_with(
+            index='test_new',
+            body={'index': {
+                'refresh_interval': '-1', 'number_of_replicas': 0
+            }}
+        )
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_restore_settings(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        inst.restoreSettings('test_new', {'refresh_interval': '30s'})
+        mock_client.indices.put_settings.assert_called_once_with(
+            index='test_new', body={'index': {'refresh_interval': '30s'}}
+        )
+
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.retrievePages')
+    @patch('lib.esManager.ESConnection.indexPage')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_index_pages_no_position(self, mock_elastic, mock_index, mock_pages, mock_differ):
+        mock_pages.return_value = iter([[(1, 'date1')]])
+        mock_checkpoint = MagicMock()
+        inst = ESConnection()
+        inst.indexPages(
+            'session', mock_checkpoint, {'index': 'test_new'},
+            state={'index': 'test_new'}
+        )
+        mock_pages.assert_called_once_with('session', 1000, cursor=None)
+        mock_checkpoint.save.assert_called_once_with(
+            {'index': 'test_new', 'id': 1, 'date_modified': 'date1'}
+        )
+        mock_checkpoint.clear.assert_not_called()
+
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.retrievePages')
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.ESConnection.restoreSettings')
+    @patch('lib.esManager.ESConnection.disableRefresh')
+    @patch('lib.esManager.ESConnection.refreshSettings')
+    @patch('lib.esManager.ESConnection.swapAlias')
+    @patch('lib.esManager.ESConnection.indexPage')
+    @patch('lib.esManager.ESConnection.indexPages')
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index(self, mock_elastic, mock_load, mock_index, mock_swap, mock_settings, mock_disable, mock_restore, mock_work, mock_pages, mock_differ):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = True
+        mock_client.indices.exists.side_effect = [True, False]
+        mock_elastic.return_value = mock_client
+        mock_pages.return_value = iter(['page1'])
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = None
+
+        inst = ESConnection()
+        indexes = []
+        mock_load.side_effect = lambda *args, **kwargs: indexes.append(
+            inst.index
+        )
+        inst.rebuildIndex('session', mock_checkpoint, deleteOld=True)
+
+        newIndex = indexes[0]
+        assert newIndex.startswith('test_')
+        assert inst.index == 'test'
+        mock_work.init.assert_called_once_with(index=newIndex)
+        mock_settings.assert_called_once_with(newIndex)
+        mock_disable.assert_called_once_with(newIndex)
+        state = mock_load.call_args[1]['state']
+        assert state['index'] == newIndex
+        assert state['settings'] == mock_settings.return_value
+        mock_checkpoint.save.assert_called_once_with(state)
+        mock_load.assert_called_once_with(
+            'session', mock_checkpoint, {}, state=state
+        )
+        mock_pages.assert_called_once_with(
+            'session', 1000, startDate=state['started']
+        )
+        mock_index.assert_called_once_with(
+            'session', 'page1', mock_differ.return_value
+        )
+        mock_restore.assert_called_once_with(
+            newIndex, mock_settings.return_value
+        )
+        mock_swap.assert_called_once_with('test', newIndex, True)
+        mock_checkpoint.clear.assert_called_once()
+
+    @patch('lib.esManager.retrievePages', return_value=iter([]))
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.ESConnection.restoreSettings')
+    @patch('lib.esManager.ESConnection.disableRefresh')
+    @patch('lib.esManager.ESConnection.refreshSettings')
+    @patch('lib.esManager.ESConnection.swapAlias')
+    @patch('lib.esManager.ESConnection.indexPages')
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index_resume(self, mock_elastic, mock_load, mock_swap, mock_settings, mock_disable, mock_restore, mock_work, mock_pages):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = True
+        mock_client.indices.exists.return_value = True
+        mock_elastic.return_value = mock_client
+        settings = {'refresh_interval': '30s', 'number_of_replicas': '2'}
+        cursor = {
+            'id': 10, 'date_modified': None,
+            'index': 'test_existing', 'started': 'startDate',
+            'settings': settings
+        }
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = cursor
+
+        inst = ESConnection()
+        inst.rebuildIndex('session', mock_checkpoint)
+
+        mock_work.init.assert_not_called()
+        mock_settings.assert_not_called()
+        mock_disable.assert_called_once_with('test_existing')
+        mock_checkpoint.save.assert_called_once_with(cursor)
+        mock_load.assert_called_once_with(
+            'session', mock_checkpoint, cursor, state={
+                'index': 'test_existing', 'started': 'startDate',
+                'settings': settings
+            }
+        )
+        mock_restore.assert_called_once_with('test_existing', settings)
+        mock_swap.assert_called_once_with('test', 'test_existing', False)
+        mock_checkpoint.clear.assert_called_once()
+
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.ESConnection.restoreSettings')
+    @patch('lib.esManager.ESConnection.disableRefresh')
+    @patch('lib.esManager.ESConnection.refreshSettings')
+    @patch('lib.esManager.ESConnection.swapAlias')
+    @patch('lib.esManager.ESConnection.indexPages', side_effect=ESError('test'))
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index_error(self, mock_elastic, mock_load, mock_swap, mock_settings, mock_disable, mock_restore, mock_work):
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = None
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            inst.rebuildIndex('session', mock_checkpoint)
+        assert inst.index == 'test'
+        mock_checkpoint.save.assert_called_once()
+        mock_restore.assert_not_called()
+        mock_swap.assert_not_called()
+        mock_checkpoint.clear.assert_not_called()
+
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.ESConnection.swapAlias', side_effect=ESError('test'))
+    @patch('lib.esManager.retrievePages', return_value=iter([]))
+    @patch('lib.esManager.ESConnection.restoreSettings')
+    @patch('lib.esManager.ESConnection.disableRefresh')
+    @patch('lib.esManager.ESConnection.refreshSettings')
+    @patch('lib.esManager.ESConnection.indexPages')
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index_swap_error(self, mock_elastic, mock_load, mock_settings, mock_disable, mock_restore, mock_pages, mock_swap, mock_work):
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = None
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            inst.rebuildIndex('session', mock_checkpoint)
+        mock_checkpoint.clear.assert_not_called()
+
+    @patch('lib.indexDiffer.IndexHash')
+    @patch('lib.esManager.retrievePages')
+    @patch('lib.esManager.Work')
+    @patch('lib.esManager.ESConnection.restoreSettings')
+    @patch('lib.esManager.ESConnection.disableRefresh')
+    @patch('lib.esManager.ESConnection.refreshSettings')
+    @patch('lib.esManager.ESConnection.swapAlias')
+    @patch('lib.esManager.ESConnection.bulkIndex')
+    @patch('lib.esManager.ESConnection.processPage')
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index_sends_unchanged(self, mock_elastic, mock_page, mock_bulk, mock_swap, mock_settings, mock_disable, mock_restore, mock_work, mock_pages, mock_hash):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = True
+        mock_elastic.return_value = mock_client
+        doc = {
+            '_index': 'test_new', '_type': 'doc', '_id': 'uuid1',
+            '_source': {'title': 'Test'}
+        }
+        mock_hash.lookupHashes.return_value = {
+            'uuid1': IndexDiffer.hashDocument(doc['_source'])
+        }
+        mock_pages.side_effect = [iter([[(1, 'date1')]]), iter([])]
+        mock_page.return_value = iter([doc])
+
+        events = []
+        mock_bulk.side_effect = lambda records, differ: events.append(
+            ('bulk', list(records))
+        )
+        mock_swap.side_effect = lambda *args: events.append(('swap',))
+        mock_checkpoint = MagicMock()
+        mock_checkpoint.load.return_value = None
+
+        inst = ESConnection()
+        inst.rebuildIndex('session', mock_checkpoint)
+
+        assert events == [('bulk', [doc]), ('swap',)]
+        mock_hash.lookupHashes.assert_not_called()
+
+    @patch('lib.esManager.ESConnection.indexPages')
+    @patch('lib.esManager.Elasticsearch')
+    def test_rebuild_index_existing_index(self, mock_elastic, mock_load):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = False
+        mock_client.indices.exists.return_value = True
+        mock_elastic.return_value = mock_client
+        mock_checkpoint = MagicMock()
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            inst.rebuildIndex('session', mock_checkpoint)
+        mock_checkpoint.load.assert_not_called()
+        mock_load.assert_not_called()
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_swap_alias_existing_alias(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = True
+        mock_client.indices.get_alias.return_value = {
+            'test_old': {'aliases': {'test': {}}}
+        }
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        inst.swapAlias('test', 'test_new', True)
+        mock_client.indices.update_aliases.assert_called_once_with(body={
+            'actions': [
+                {'remove': {'index': 'test_old', 'alias': 'test'}},
+                {'add': {'index': 'test_new', 'alias': 'test'}}
+            ]
+        })
+        mock_client.indices.delete.assert_called_once_with(index='test_old')
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_swap_alias_existing_index(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = False
+        mock_client.indices.exists.return_value = True
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        inst.swapAlias('test', 'test_new', True)
+        mock_client.indices.update_aliases.assert_called_once_with(body={
+            'actions': [
+                {'remove_index': {'index': 'test'}},
+                {'add': {'index': 'test_new', 'alias': 'test'}}
+            ]
+        })
+        mock_client.indices.delete.assert_not_called()
+
+    @patch('lib.esManager.Elasticsearch')
+    def test_swap_alias_existing_index_kept(self, mock_elastic):
+        mock_client = MagicMock()
+        mock_client.indices.exists_alias.return_value = False
+        mock_client.indices.exists.return_value = True
+        mock_elastic.return_value = mock_client
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            inst.swapAlias('test', 'test_new', False)
+        mock_client.indices.update_aliases.assert_not_called()
+
+    @patch('lib.esManager.ESConnection.bulkIndex')
+    @patch('lib.esManager.ESConnection.processPage')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_index_page(self, mock_elastic, mock_process, mock_bulk):
+        mock_differ = MagicMock()
+        inst = ESConnection()
+        inst.indexPage('session', 'page', mock_differ)
+        mock_process.assert_called_once_with('session', 'page')
+        mock_differ.diffDocuments.assert_called_once_with(
+            mock_process.return_value
+        )
+        mock_bulk.assert_called_once_with(
+            mock_differ.diffDocuments.return_value, differ=mock_differ
+        )
+
+    def test_batch_records(self):
+        batches = list(ESConnection.batchRecords(iter([1, 2, 3, 4, 5]), 2))
+        assert batches == [[1, 2], [3, 4], [5]]
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.IndexDiffer')
+    @patch('lib.esManager.BulkIndexer')
+    @patch('lib.esManager.ESConnection.processParallel', side_effect=[1])
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_generate_parallel(self, mock_elastic, mock_parallel, mock_indexer, mock_differ):
+        mock_stream = mock_indexer.return_value.streamingBulk
+        mock_stream.return_value = iter([(True, 1)])
+        inst = ESConnection()
+        inst.generateRecords('session')
+        mock_parallel.assert_called_once_with('session')
+        mock_differ.return_value.diffDocuments.assert_called_once_with(1)
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Pipe')
+    @patch('lib.esManager.wait')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel(self, mock_elastic, mock_wait, mock_pipe, mock_process, mock_retrieve):
+        mock_retrieve.return_value = [(3,), (1,), (2,)]
+        mock_process.return_value.exitcode = 0
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [
+            ['work1', 'work2'], 'DONE', ['work3'], 'DONE'
+        ]
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+
+        inst = ESConnection()
+        res = list(inst.processParallel('session'))
+
+        assert res == ['work1', 'work2', 'work3']
+        assert mock_process.call_count == 2
+        assert mock_process.call_args_list[0][1]['args'][0] == [(1,), (2,)]
+        assert mock_process.call_args_list[1][1]['args'][0] == [(3,)]
+        assert mock_process.return_value.join.call_count == 2
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Pipe')
+    @patch('lib.esManager.wait')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel_worker_error(self, mock_elastic, mock_wait, mock_pipe, mock_process, mock_retrieve):
+        mock_retrieve.return_value = [(1,), (2,)]
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [
+            ['work1'], ('ERROR', 'Exception()'), ['work2'], 'DONE'
+        ]
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+        mock_process.return_value.exitcode = 0
+
+        inst = ESConnection()
+        res = []
+        with pytest.raises(ESError):
+            for doc in inst.processParallel('session'):
+                res.append(doc)
+
+        assert res == ['work1', 'work2']
+        assert mock_process.return_value.join.call_count == 2
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Pipe')
+    @patch('lib.esManager.wait')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel_worker_killed(self, mock_elastic, mock_wait, mock_pipe, mock_process, mock_retrieve):
+        mock_retrieve.return_value = [(1,), (2,)]
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [['work1'], 'DONE', EOFError]
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+        mock_process.return_value.exitcode = -9
+
+        inst = ESConnection()
+        with pytest.raises(ESError):
+            list(inst.processParallel('session'))
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Pipe')
+    @patch('lib.esManager.wait')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel_closed(self, mock_elastic, mock_wait, mock_pipe, mock_process, mock_retrieve):
+        mock_retrieve.return_value = [(1,), (2,)]
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [['work1', 'work2']]
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+
+        inst = ESConnection()
+        docs = inst.processParallel('session')
+        assert next(docs) == 'work1'
+        docs.close()
+
+        assert mock_parent.close.call_count == 2
+        assert mock_process.return_value.terminate.call_count == 2
+        assert mock_process.return_value.join.call_count == 2
+
+    @patch.dict('os.environ', {'INDEX_WORKERS': '2'})
+    @patch('lib.esManager.retrieveRecords')
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Pipe')
+    @patch('lib.esManager.wait')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel_completed(self, mock_elastic, mock_wait, mock_pipe, mock_process, mock_retrieve):
+        mock_retrieve.return_value = [(1,)]
+        mock_process.return_value.exitcode = 0
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [['work1'], 'DONE']
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+
+        inst = ESConnection()
+        assert list(inst.processParallel('session')) == ['work1']
+        mock_process.return_value.terminate.assert_not_called()
+        mock_process.return_value.join.assert_called_once()
+
+    @patch('lib.esManager.retrieveRecords', return_value=[])
+    @patch('lib.esManager.Process')
+    @patch('lib.esManager.Elasticsearch', return_value=client_mock)
+    def test_process_parallel_empty(self, mock_elastic, mock_process, mock_retrieve):
+        inst = ESConnection()
+        res = list(inst.processParallel('session'))
+        assert res == []
+        mock_process.assert_not_called()
+
+    @patch('lib.esManager.SessionManager')
+    @patch('lib.esManager.ESConnection.buildDocuments')
+    def test_process_range(self, mock_build, mock_manager):
+        mock_build.side_effect = [iter(['work1', 'work2']), iter(['work3'])]
+        mock_conn = MagicMock()
+        processRange([(1,), (2,), (3,)], 2, mock_conn)
+        mock_conn.send.assert_has_calls([
+            call(['work1', 'work2']), call(['work3']), call('DONE')
+        ])
+        mock_manager.return_value.closeConnection.assert_called_once()
+
+    @patch('lib.esManager.SessionManager')
+    @patch('lib.esManager.ESConnection.buildDocuments', side_effect=Exception)
+    def test_process_range_error(self, mock_build, mock_manager):
+        mock_conn = MagicMock()
+        processRange([(1,)], 2, mock_conn)
+        mock_conn.send.assert_called_once_with(('ERROR', 'Exception()'))
+        mock_manager.return_value.closeConnection.assert_called_once()
     
     @patch('lib.esManager.ESDoc.createWork', return_value='testWork')
     def test_init_esdoc(self, mock_create):
@@ -114,6 +728,14 @@ class TestESManager:
         assert testDoc.dbRec.uuid == 0
         assert newWork == {'title': 'test', 'uuid': '000'}
 
+    @patch('lib.esManager.Work', return_value={'title': 'test', 'uuid': '000'})
+    def test_create_es_work_preloaded(self, mock_work):
+        mock_session = MagicMock()
+        testDoc = ESDoc(('1',), mock_session, dbRec=TestDict(uuid=1))
+        assert testDoc.dbRec.uuid == 1
+        assert testDoc.work == {'title': 'test', 'uuid': '000'}
+        mock_session.query.assert_not_called()
+
     def test_add_identifier(self):
         testID = TestDict(**{
             'type': None,
@@ -1,3 +1,4 @@
+from datetime import datetime
 import unittest
 from unittest.mock import patch, call, MagicMock, DEFAULT
 import os
@@ -43,3 +44,68 @@ class TestHandler:
         with patch('service.ESConnection', return_value=mock_es) as mock_conn:
             mockHandler[1]()
             mock_es.generateRecords.assert_called_once()
+
+    def test_handler_reindex(self, mocker, mockHandler):
+        mockIndex = mocker.patch('service.indexRecords')
+        mockReindex = mocker.patch('service.reindexRecords')
+        testRec = {'source': 'reindex', 'startID': 1}
+        resp = mockHandler[0](testRec, None)
+        mockReindex.assert_called_once_with(testRec)
+        mockIndex.assert_not_called()
+        assert resp == True
+
+    def test_reindex_records(self, mocker, mockHandler):
+        from service import reindexRecords
+        mock_es = MagicMock()
+        mockCheckpoint = mocker.patch('service.ReindexCheckpoint')
+        with patch('service.ESConnection', return_value=mock_es):
+            reindexRecords({
+                'source': 'reindex',
+                'checkpoint': 'test',
+                'restart': True,
+                'startDate': '2020-01-01',
+                'endDate': '2020-01-31'
+            })
+            mockCheckpoint.assert_called_once_with('test', run={
+                'startID': None,
+                'endID': None,
+                'startDate': '2020-01-01',
+                'endDate': '2020-01-31',
+                'rebuild': False
+            })
+            mockCheckpoint.return_value.clear.assert_called_once()
+            mock_es.reindexRecords.assert_called_once()
+            callKwargs = mock_es.reindexRecords.call_args[1]
+            assert callKwargs['startDate'].year == 2020
+            assert callKwargs['startID'] is None
+            assert callKwargs['endDate'] == datetime(
+                2020, 1, 31, 23, 59, 59, 999999
+            )
+
+    def test_parse_date(self, mockHandler):
+        from service import parseDate
+        assert parseDate('2020-01-31') == datetime(2020, 1, 31)
+        assert parseDate('2020-01-31', endOfDay=True) > datetime(
+            2020, 1, 31, 23, 59, 59
+        )
+        assert parseDate(None) is None
+
+    def test_parse_date_invalid(self, mockHandler):
+        from service import parseDate
+        from helpers.errorHelpers import DataError
+        with pytest.raises(DataError):
+            parseDate('01/01/2020')
+
+    def test_reindex_records_rebuild(self, mocker, mockHandler):
+        from service import reindexRecords
+        mock_es = MagicMock()
+        mocker.patch('service.ReindexCheckpoint')
+        with patch('service.ESConnection', return_value=mock_es):
+            reindexRecords({
+                'source': 'reindex',
+                'rebuild': True,
+                'deleteOld': True
+            })
+            mock_es.rebuildIndex.assert_called_once()
+            assert mock_es.rebuildIndex.call_args[1]['deleteOld'] is True
+            mock_es.reindexRecords.assert_not_called()
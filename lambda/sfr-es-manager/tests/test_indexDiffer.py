@@ -0,0 +1,173 @@
+from unittest.mock import patch, MagicMock
+
+from lib.indexDiffer import IndexDiffer
+
+
+class TestIndexDiffer:
+    @staticmethod
+    def createDoc(docID, **source):
+        return {
+            '_index': 'test',
+            '_type': 'doc',
+            '_id': docID,
+            '_source': source
+        }
+
+    def test_hash_document(self):
+        docHash, fieldHashes = IndexDiffer.hashDocument({
+            'title': 'Test', 'instances': [{'title': 'Test'}]
+        })
+        assert len(docHash) == 64
+        assert set(fieldHashes.keys()) == set(['title', 'instances'])
+
+        sameHash, _ = IndexDiffer.hashDocument({
+            'instances': [{'title': 'Test'}], 'title': 'Test'
+        })
+        assert sameHash == docHash
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_new_document(self, mock_hash):
+        mock_hash.lookupHashes.return_value = {}
+        differ = IndexDiffer('session')
+        doc = TestIndexDiffer.createDoc('uuid1', title='Test')
+        res = list(differ.diffDocuments([doc]))
+        assert res == [doc]
+        assert 'uuid1' in differ.pending
+        mock_hash.lookupHashes.assert_called_once_with('session', ['uuid1'])
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_unchanged_document(self, mock_hash):
+        doc = TestIndexDiffer.createDoc('uuid1', title='Test')
+        mock_hash.lookupHashes.return_value = {
+            'uuid1': IndexDiffer.hashDocument(doc['_source'])
+        }
+        differ = IndexDiffer('session')
+        res = list(differ.diffDocuments([doc]))
+        assert res == []
+        assert differ.skipped == 1
+        assert differ.pending == {}
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_partial_update(self, mock_hash):
+        oldDoc = TestIndexDiffer.createDoc(
+            'uuid1', title='Test', subjects=['a']
+        )
+        mock_hash.lookupHashes.return_value = {
+            'uuid1': IndexDiffer.hashDocument(oldDoc['_source'])
+        }
+        newDoc = TestIndexDiffer.createDoc(
+            'uuid1', title='Test', subjects=['a', 'b']
+        )
+        differ = IndexDiffer('session')
+        res = list(differ.diffDocuments([newDoc]))
+        assert res == [{
+            '_op_type': 'update',
+            '_index': 'test',
+            '_type': 'doc',
+            '_id': 'uuid1',
+            'doc': {'subjects': ['a', 'b']}
+        }]
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_forced(self, mock_hash):
+        oldDoc = TestIndexDiffer.createDoc('uuid1', title='Test')
+        mock_hash.lookupHashes.return_value = {
+            'uuid1': IndexDiffer.hashDocument(oldDoc['_source'])
+        }
+        newDoc = TestIndexDiffer.createDoc('uuid1', title='New')
+        differ = IndexDiffer('session', force=True)
+        res = list(differ.diffDocuments([newDoc]))
+        assert res == [newDoc]
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_forced_unchanged(self, mock_hash):
+        doc = TestIndexDiffer.createDoc('uuid1', title='Test')
+        mock_hash.lookupHashes.return_value = {
+            'uuid1': IndexDiffer.hashDocument(doc['_source'])
+        }
+        differ = IndexDiffer('session', force=True)
+        res = list(differ.diffDocuments([doc]))
+        assert res == [doc]
+        assert differ.skipped == 0
+        assert differ.pending['uuid1'] == IndexDiffer.hashDocument(
+            doc['_source']
+        )
+        mock_hash.lookupHashes.assert_not_called()
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_diff_batches(self, mock_hash):
+        mock_hash.lookupHashes.return_value = {}
+        docs = [
+            TestIndexDiffer.createDoc('uuid{}'.format(i), title='Test')
+            for i in range(150)
+        ]
+        differ = IndexDiffer('session')
+        res = list(differ.diffDocuments(docs))
+        assert len(res) == 150
+        assert mock_hash.lookupHashes.call_count == 2
+
+    def test_create_action_object_field(self):
+        oldSource = {'title': 'Test', 'issued': {'gte': '1900'}}
+        newDoc = TestIndexDiffer.createDoc(
+            'uuid1', title='Test', issued={'gte': '1901'}
+        )
+        _, newHashes = IndexDiffer.hashDocument(newDoc['_source'])
+        _, oldHashes = IndexDiffer.hashDocument(oldSource)
+        assert IndexDiffer.createAction(newDoc, newHashes, oldHashes) == newDoc
+
+    def test_create_action_removed_field(self):
+        oldSource = {'title': 'Test', 'series': 'Series'}
+        newDoc = TestIndexDiffer.createDoc('uuid1', title='Test')
+        _, newHashes = IndexDiffer.hashDocument(newDoc['_source'])
+        _, oldHashes = IndexDiffer.hashDocument(oldSource)
+        assert IndexDiffer.createAction(newDoc, newHashes, oldHashes) == newDoc
+
+    def test_record_result(self):
+        differ = IndexDiffer('session')
+        differ.pending = {'uuid1': 'hash1', 'uuid2': 'hash2'}
+        differ.recordResult(True, {'index': {'_id': 'uuid1', 'status': 201}})
+        differ.recordResult(False, {'update': {'_id': 'uuid2', 'status': 404}})
+        assert differ.indexed == {'uuid1': 'hash1'}
+        assert differ.pending == {'uuid2': 'hash2'}
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_save_hashes(self, mock_hash):
+        mock_session = MagicMock()
+        differ = IndexDiffer(mock_session)
+        differ.indexed = {'uuid1': 'hash1'}
+        differ.saveHashes()
+        mock_hash.upsertHashes.assert_called_once_with(
+            mock_session, {'uuid1': 'hash1'}
+        )
+        mock_session.commit.assert_called_once()
+        assert differ.indexed == {}
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_clear_all(self, mock_hash):
+        mock_session = MagicMock()
+        differ = IndexDiffer(mock_session)
+        differ.clearAll()
+        mock_hash.clearHashes.assert_called_once_with(mock_session)
+        mock_session.commit.assert_called_once()
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_clear_failed(self, mock_hash):
+        mock_session = MagicMock()
+        differ = IndexDiffer(mock_session)
+        differ.clearFailed([{'update': {'_id': 'uuid1', 'status': 404}}])
+        mock_hash.deleteHashes.assert_called_once_with(
+            mock_session, ['uuid1']
+        )
+        mock_session.commit.assert_called_once()
+
+    @patch('lib.indexDiffer.IndexHash')
+    def test_clear_failed_missing_id(self, mock_hash):
+        mock_session = MagicMock()
+        differ = IndexDiffer(mock_session)
+        differ.clearFailed([
+            {'index': {'status': 429}},
+            {'index': {'_id': 'uuid1', 'status': 429}}
+        ])
+        mock_hash.deleteHashes.assert_called_once_with(
+            mock_session, ['uuid1']
+        )
@@ -0,0 +1,48 @@
+from botocore.exceptions import ClientError
+import os
+
+from helpers.clientHelpers import createAWSClient
+from helpers.logHelpers import createLog
+
+logger = createLog('storageHelpers')
+
+
+def readStoredFile(location):
+    """Read a file either from local disk or from S3, if the location is given
+    in the form s3://bucket/key. Returns None if the file does not exist."""
+    if location.startswith('s3://'):
+        bucket, key = parseS3Location(location)
+        try:
+            s3Obj = createAWSClient('s3').get_object(Bucket=bucket, Key=key)
+            return s3Obj['Body'].read()
+        except ClientError as err:
+            if err.response['Error']['Code'] != 'NoSuchKey':
+                raise err
+            return None
+
+    try:
+        with open(location, 'rb') as storedFile:
+            return storedFile.read()
+    except FileNotFoundError:
+        return None
+
+
+def writeStoredFile(location, data):
+    """Write a file either to local disk or to S3, if the location is given in
+    the form s3://bucket/key."""
+    if location.startswith('s3://'):
+        bucket, key = parseS3Location(location)
+        createAWSClient('s3').put_object(Bucket=bucket, Key=key, Body=data)
+        return
+
+    # Write to a temporary file first so that an interrupted write cannot
+    # leave a partial file in place
+    tmpLocation = '{}.tmp'.format(location)
+    with open(tmpLocation, 'wb') as storedFile:
+        storedFile.write(data)
+    os.replace(tmpLocation, location)
+
+
+def parseS3Location(location):
+    bucket, _, key = location[5:].partition('/')
+    return bucket, key
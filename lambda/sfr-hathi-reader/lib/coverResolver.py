@@ -0,0 +1,146 @@
+from concurrent.futures import ThreadPoolExecutor
+import gzip
+import json
+import os
+import time
+
+from helpers.errorHelpers import URLFetchError
+from helpers.logHelpers import createLog
+from helpers.storageHelpers import readStoredFile, writeStoredFile
+from lib.hathiCover import HathiCover
+
+logger = createLog('coverResolver')
+
+
+class CoverResolver():
+    """Finds cover images for HathiTrust volumes, fetching the METS files for
+    a set of volumes concurrently from a pool of threads. This is done before
+    the rows for these volumes are parsed, so that parsing never waits on a
+    request.
+
+    Results are cached by htid, including those for volumes where no cover
+    could be found, and are reused until they are older than
+    HATHI_COVER_TTL. Requests that time out or fail with any status other
+    than a 404 are not cached, so that they are retried. Results fetched
+    since the cache was last read are kept in fetched, so that worker
+    processes can report them back to the parent. The cache can be saved
+    to, and loaded from, a local file or S3 location so that it persists
+    between runs.
+
+    Configured with the following (optional) environment variables:
+    HATHI_COVER_WORKERS -- number of METS files requested concurrently (8)
+    HATHI_COVER_TTL -- seconds for which a cached result is used (2592000)
+    HATHI_COVER_CACHE_SIZE -- maximum number of cached results (500000)
+    """
+    def __init__(self):
+        self.workers = int(os.environ.get('HATHI_COVER_WORKERS', 8))
+        self.ttl = int(os.environ.get('HATHI_COVER_TTL', 2592000))
+        self.maxSize = int(os.environ.get('HATHI_COVER_CACHE_SIZE', 500000))
+
+        self.cache = {}
+        self.fetched = {}
+
+    def resolve(self, htids):
+        """Returns a dict of the cover URL, or None, for each htid"""
+        now = time.time()
+        covers = {}
+        missing = []
+
+        for htid in set(htids):
+            cached = self.cache.get(htid)
+            if cached is not None and now - cached[1] < self.ttl:
+                covers[htid] = cached[0]
+            else:
+                missing.append(htid)
+
+        if not missing:
+            return covers
+
+        logger.info('Fetching covers for {} volumes ({} cached)'.format(
+            len(missing), len(covers)
+        ))
+        with ThreadPoolExecutor(
+            max_workers=min(self.workers, len(missing))
+        ) as executor:
+            results = executor.map(CoverResolver.fetchCover, missing)
+
+            fetched = {}
+            for htid, (pageURL, cacheable) in zip(missing, results):
+                covers[htid] = pageURL
+                if cacheable:
+                    fetched[htid] = (pageURL, now)
+
+        self.update(fetched)
+        self.fetched.update(fetched)
+
+        return covers
+
+    def update(self, entries):
+        """Add results to the cache, dropping the oldest if it is full"""
+        for htid, entry in entries.items():
+            self.cache.pop(htid, None)
+            self.cache[htid] = tuple(entry)
+
+        while len(self.cache) > self.maxSize:
+            del self.cache[next(iter(self.cache))]
+
+    def popFetched(self):
+        fetched = self.fetched
+        self.fetched = {}
+        return fetched
+
+    def load(self, location):
+        data = readStoredFile(location)
+        if data is None:
+            return
+
+        now = time.time()
+        self.update({
+            htid: entry for htid, entry in json.loads(gzip.decompress(data))
+            if now - entry[1] < self.ttl
+        })
+        logger.info('Loaded {} cached covers from {}'.format(
+            len(self.cache), location
+        ))
+
+    def save(self, location):
+        now = time.time()
+        entries = [
+            [htid, entry] for htid, entry in self.cache.items()
+            if now - entry[1] < self.ttl
+        ]
+
+        logger.info('Saving {} cached covers to {}'.format(
+            len(entries), location
+        ))
+        writeStoredFile(
+            location, gzip.compress(json.dumps(entries).encode('utf-8'))
+        )
+
+    @staticmethod
+    def fetchCover(htid):
+        """Fetch the cover URL for a volume. Returns a tuple of the URL, or
+        None if no cover was found, and whether this result can be cached.
+        """
+        coverFetch = HathiCover(htid)
+        try:
+            structResp = coverFetch.getResponse(coverFetch.getStructureURL())
+        except URLFetchError:
+            logger.warning('Request for {} structure timed out'.format(htid))
+            return None, False
+        except Exception as err:
+            logger.warning('Unable to fetch structure for {}'.format(htid))
+            logger.debug(err)
+            return None, False
+
+        if structResp.status_code != 200:
+            # Only a missing volume is certain to give the same result later,
+            # access and server errors may succeed if retried
+            return None, structResp.status_code == 404
+
+        try:
+            return coverFetch.parseMETS(structResp.json()), True
+        except Exception as err:
+            logger.error('Unable to load cover for {}'.format(htid))
+            logger.debug(err)
+            return None, True
@@ -0,0 +1,97 @@
+from array import array
+from bisect import bisect_left
+from hashlib import blake2b
+from heapq import merge
+import sys
+
+from helpers.logHelpers import createLog
+from helpers.storageHelpers import readStoredFile, writeStoredFile
+
+logger = createLog('fingerprintStore')
+
+
+class FingerprintStore():
+    """Stores a fingerprint of each HathiTrust row that has been ingested, so
+    that rows that have not changed since a previous run can be skipped. Each
+    fingerprint is a 64-bit hash of a full row (including its htid), and these
+    are kept as a sorted array, using 8 bytes per row. This array is persisted
+    as a file of little-endian integers, either on local disk or in S3 if the
+    location is given in the form s3://bucket/key.
+
+    Daily update files only contain changed rows, so by default the
+    fingerprints of new rows are added to those already stored. When a full
+    file is processed the store can instead be replaced with the fingerprints
+    of that file, which drops those of rows that have since changed.
+    """
+    def __init__(self, location):
+        self.location = location
+        self.previous = array('Q')
+        self.seen = bytearray()
+        self.new = array('Q')
+        self.unprocessed = set()
+        self.skipped = 0
+
+    def load(self):
+        data = self.readFile()
+        self.previous = array('Q')
+        if data is not None:
+            self.previous.frombytes(data)
+            if sys.byteorder != 'little':
+                self.previous.byteswap()
+
+        self.seen = bytearray(len(self.previous))
+        logger.info('Loaded {} fingerprints from {}'.format(
+            len(self.previous), self.location
+        ))
+
+    def filterRows(self, rows):
+        """Generator that yields only the rows that do not match a stored
+        fingerprint, recording the fingerprints of all rows it receives.
+        """
+        for row in rows:
+            fingerprint = FingerprintStore.fingerprint(row)
+            pos = bisect_left(self.previous, fingerprint)
+            if pos < len(self.previous) and self.previous[pos] == fingerprint:
+                self.seen[pos] = 1
+                self.skipped += 1
+                continue
+
+            self.new.append(fingerprint)
+            yield row
+
+    def discard(self, fingerprints):
+        """Exclude rows that could not be processed from the saved store, so
+        that they will be retried in the next run.
+        """
+        self.unprocessed.update(fingerprints)
+
+    def save(self, replace=False):
+        logger.info('Skipped {} unchanged rows'.format(self.skipped))
+
+        kept = (
+            fingerprint for pos, fingerprint in enumerate(self.previous)
+            if not replace or self.seen[pos]
+        )
+        added = sorted(set(self.new) - self.unprocessed)
+
+        fingerprints = array('Q', merge(kept, added))
+        if sys.byteorder != 'little':
+            fingerprints.byteswap()
+
+        logger.info('Saving {} fingerprints to {}'.format(
+            len(fingerprints), self.location
+        ))
+        self.writeFile(fingerprints.tobytes())
+
+    def readFile(self):
+        return readStoredFile(self.location)
+
+    def writeFile(self, data):
+        writeStoredFile(self.location, data)
+
+    @staticmethod
+    def fingerprint(row):
+        return int.from_bytes(
+            blake2b('\t'.join(row).encode('utf-8'), digest_size=8).digest(),
+            'little'
+        )
@@ -55,12 +55,8 @@ class HathiCover():
             [uri] -- URI to the page to be used as a cover image
         """
         self.logger.debug('Querying {} for cover image'.format(self.htid))
-        structURL = '{}/structure/{}?format=json&v=2'.format(
-            self.HATHI_BASE_API,
-            self.htid
-        )
         try:
-            structResp = self.getResponse(structURL)
+            structResp = self.getResponse(self.getStructureURL())
             if structResp.status_code == 200:
                 return self.parseMETS(structResp.json())
         except URLFetchError:
@@ -68,6 +64,12 @@ class HathiCover():
 
         return None
 
+    def getStructureURL(self):
+        return '{}/structure/{}?format=json&v=2'.format(
+            self.HATHI_BASE_API,
+            self.htid
+        )
+
     def parseMETS(self, metsJson):
         """Parser that handles the METS file, parsing the first 25 pages into
         HathiPage objects that contain a score and position. Once parsed it
@@ -3,7 +3,6 @@ import re
 import requests
 from urllib.parse import quote_plus
 
-from lib.hathiCover import HathiCover
 from lib.dataModel import (
     WorkRecord,
     Identifier,
@@ -422,7 +421,7 @@ class HathiRecord():
     def __repr__(self):
         return '<Hathi(title={})>'.format(self.work.title)
 
-    def buildDataModel(self, countryCodes):
+    def buildDataModel(self, countryCodes, coverURL=None):
         logger.debug('Generating work record for bib record {}'.format(
             self.ingest['bib_key']
         ))
@@ -442,7 +441,7 @@ class HathiRecord():
         logger.debug('Generating instance record for hathi record {}'.format(
             self.ingest['htid']
         ))
-        self.buildInstance(countryCodes)
+        self.buildInstance(countryCodes, coverURL)
 
         logger.debug('Generating an item record for hathi record {}'.format(
             self.ingest['htid']
@@ -467,6 +466,47 @@ class HathiRecord():
                 for agent in item.agents:
                     self.getVIAF(agent)
 
+    def mergeRecord(self, hathiRec):
+        """Merge a HathiRecord built from another row with the same bib_key
+        into this record, so that all rows for a bib record are output as a
+        single work. Rows for a volume that is already present (generally
+        multiple copies of the same volume) are added as items of the existing
+        instance, while rows for new volumes are added as new instances. Any
+        new identifiers, agents or rights statements are added to the work.
+        """
+        logger.debug('Merging record {} into work for bib record {}'.format(
+            hathiRec.ingest['htid'], self.ingest['bib_key']
+        ))
+
+        volumes = {inst.volume: inst for inst in self.work.instances}
+        for instance in hathiRec.work.instances:
+            if instance.volume in volumes:
+                volumes[instance.volume].formats.extend(instance.formats)
+            else:
+                self.work.instances.append(instance)
+                volumes[instance.volume] = instance
+
+        HathiRecord.mergeItems(
+            self.work.identifiers, hathiRec.work.identifiers,
+            lambda iden: (iden.type, iden.identifier)
+        )
+        HathiRecord.mergeItems(
+            self.work.agents, hathiRec.work.agents,
+            lambda agent: agent.name
+        )
+        HathiRecord.mergeItems(
+            self.work.rights, hathiRec.work.rights,
+            lambda rights: (rights.license, rights.rights_statement)
+        )
+
+    @staticmethod
+    def mergeItems(current, new, keyFunc):
+        currentKeys = set(keyFunc(item) for item in current)
+        for item in new:
+            if keyFunc(item) not in currentKeys:
+                current.append(item)
+                currentKeys.add(keyFunc(item))
+
     def buildWork(self):
         """Construct the SFR Work object from the Hathi data"""
         self.work.title = self.ingest['title']
@@ -506,7 +546,7 @@ class HathiRecord():
                 self.work
             ))
 
-    def buildInstance(self, countryCodes):
+    def buildInstance(self, countryCodes, coverURL=None):
         """Constrict an instance record from the Hathi data provided. As
         structured Hathi trust data will always correspond to a single
         instance. A wok in Hathi can have multiple items, and this relationship
@@ -514,6 +554,9 @@ class HathiRecord():
 
         We do not attempt to merge records at this phase, but will associated
         works and instances related by identifiers when stored in the database.
+
+        The cover image is found beforehand by the CoverResolver, so that
+        building the record does not require any requests.
         """
         self.instance.title = self.ingest['title']
         self.instance.language = self.ingest['language']
@@ -536,22 +579,16 @@ class HathiRecord():
             self.ingest['copyright_date']
         ))
 
-        try:
-            coverFetch = HathiCover(self.ingest['htid'])
-            pageURL = coverFetch.getPageFromMETS()
-            if pageURL is not None:
-                logger.debug('Add cover image {} to instance'.format(pageURL))
-                self.instance.addClassItem('links', Link, **{
-                    'url': pageURL,
-                    'media_type': 'image/jpeg',
-                    'flags': {
-                        'cover': True,
-                        'temporary': True,
-                    }
-                })
-        except Exception as err:
-            logger.error('Unable to load cover for {}'.format(self.ingest['htid']))
-            logger.debug(err)
+        if coverURL is not None:
+            logger.debug('Add cover image {} to instance'.format(coverURL))
+            self.instance.addClassItem('links', Link, **{
+                'url': coverURL,
+                'media_type': 'image/jpeg',
+                'flags': {
+                    'cover': True,
+                    'temporary': True,
+                }
+            })
 
         self.parsePubInfo(self.ingest['publisher_pub_date'])
 
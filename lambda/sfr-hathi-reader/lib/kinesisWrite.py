@@ -1,37 +1,44 @@
 import json
-import os
 
 from helpers.errorHelpers import KinesisError
 from helpers.logHelpers import createLog
 from helpers.clientHelpers import createAWSClient
+from lib.kinesisBuffer import KinesisBuffer
 
 logger = createLog('kinesis_write')
 
 
 class KinesisOutput():
-    """Class for managing connections and operations with AWS Kinesis"""
+    """Class for managing connections and operations with AWS Kinesis. Records
+    are buffered and only written to their streams when flush() is called, so
+    that they can be sent in batches.
+    """
     KINESIS_CLIENT = createAWSClient('kinesis')
+    BUFFER = KinesisBuffer(KINESIS_CLIENT, autoFlush=False)
 
     def __init__(self):
         pass
 
     @classmethod
     def putRecord(cls, outputObject, stream, partKey):
-        """Put an event into the specific Kinesis stream"""
-        logger.info('Writing results to Kinesis')
-
+        """Add an event to the buffer for the specific Kinesis stream"""
         # The default lambda function here converts all objects into dicts
         kinesisStream = json.dumps(
             outputObject,
             ensure_ascii=False,
             default=lambda x: vars(x)
         )
-        try:
-            cls.KINESIS_CLIENT.put_record(
-                StreamName=stream,
-                Data=kinesisStream,
-                PartitionKey=partKey
+        cls.BUFFER.add(stream, kinesisStream, partKey)
+
+    @classmethod
+    def flush(cls):
+        """Write all buffered events to their streams. This raises an error if
+        any could not be written, after which the buffer is empty."""
+        logger.info('Writing results to Kinesis')
+        failed = cls.BUFFER.flush()
+        if failed:
+            raise KinesisError(
+                'Failed to write {} results to output stream!'.format(
+                    len(failed)
+                )
             )
-        except:  # noqa: E722
-            logger.error('Kinesis Write error!')
-            raise KinesisError('Failed to write result to output stream!')
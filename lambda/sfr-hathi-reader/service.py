@@ -1,6 +1,8 @@
+from collections import Counter, OrderedDict
 import csv
 import gzip
-from itertools import islice
+import io
+from itertools import groupby, islice
 import os
 from math import ceil
 import sys
@@ -16,11 +18,21 @@ from helpers.logHelpers import createLog
 from lib.hathiRecord import HathiRecord
 from lib.countryParser import loadCountryCodes
 from lib.kinesisWrite import KinesisOutput
+from lib.fingerprintStore import FingerprintStore
+from lib.coverResolver import CoverResolver
 
 # Logger can be passed name of current module
 # Can also be instantiated on a class/method basis using dot notation
 logger = createLog('handler')
 
+# At present we aren't downloading in-copyright works, so skip anything
+# that has these rights codes
+RIGHTS_SKIPS = ['ic', 'icus', 'ic-world', 'und']
+
+# Cover results are cached here so that they are retained between invocations
+# while the Lambda container is warm
+COVER_RESOLVER = CoverResolver()
+
 
 def handler(event, context):
     """This method is invoked by the lambda trigger and governs overall
@@ -74,9 +86,48 @@ def handler(event, context):
             'access_profile',
             'author'
         ]
+    streaming = (
+        os.environ.get('HATHI_STREAM', 'false').lower() == 'true'
+        or event.get('full', False)
+    )
+
+    # Rows unchanged since a previous run are skipped if a store of
+    # fingerprints for these rows is configured
+    store = None
+    if (
+        event['source'] != 'local.file'
+        and os.environ.get('HATHI_FINGERPRINTS', None) is not None
+    ):
+        store = FingerprintStore(os.environ['HATHI_FINGERPRINTS'])
+        store.load()
+
+    coverCache = os.environ.get('HATHI_COVER_CACHE', None)
+    if coverCache is not None:
+        COVER_RESOLVER.load(coverCache)
+
     if event['source'] == 'local.file':
         logger.info('Loading records from local file')
         csvFile = loadLocalCSV(event['localFile'], event['start'], event['size'])
+    elif streaming:
+        logger.info('Streaming records from HathiTrust TSV file')
+        fileURL = findHathiFile(full=event.get('full', False))
+        if fileURL is None:
+            logger.info('No HathiTrust file found. No actions to take')
+            return [('empty', 'no updated records in retrieval period')]
+
+        rows = streamHathiTSV(fileURL)
+        if store is not None:
+            rows = store.filterRows(rows)
+
+        output = streamParser(rows, columns, store)
+        if store is not None:
+            store.save(replace=event.get('full', False))
+        if coverCache is not None:
+            COVER_RESOLVER.save(coverCache)
+
+        logger.info('Successfully invoked lambda')
+        logger.debug('Processed Rows {}'.format(output))
+        return output
     else:
         logger.info('Checking for updates from HathiTrust TSV files')
 
@@ -88,6 +139,12 @@ def handler(event, context):
             logger.info('No daily update from HathiTrust. No actions to take')
             return [('empty', 'no updated records in retrieval period')]
 
+        if store is not None:
+            csvFile = list(store.filterRows(csvFile))
+            if len(csvFile) < 1:
+                logger.info('No changed rows in HathiTrust update file')
+                return [('empty', 'no updated records in retrieval period')]
+
     # This return will be reflected in the CloudWatch logs
     # but doesn't actually do anything
 
@@ -95,7 +152,11 @@ def handler(event, context):
 
     output = None
     try:
-        output = fileParser(csvFile, columns)
+        output = fileParser(csvFile, columns, store)
+        if store is not None:
+            store.save()
+        if coverCache is not None:
+            COVER_RESOLVER.save(coverCache)
     except Exception as err:
         logger.debug('Got weird error')
         logger.error(err)
@@ -103,7 +164,7 @@ def handler(event, context):
         traceback.print_exc()
 
     logger.info('Successfully invoked lambda')
-    logger.debug('Processed Rows {}'.format(len(output)))
+    logger.debug('Processed Rows {}'.format(len(output or [])))
     return output
 
 
@@ -127,21 +188,22 @@ def loadLocalCSV(localFile, readStart, readSize):
         raise ProcessingError('loadLocalCSV', 'Could not open local CSV file')
 
     with hathiFile:
-        rightsSkips = ['ic', 'icus', 'ic-world', 'und']
         hathiReader = csv.reader(hathiFile)
         rows = [
             r for r in islice(hathiReader, readStart, (readStart + readSize))
-            if r[2] not in rightsSkips and r[0] != 'htid'
+            if r[2] not in RIGHTS_SKIPS and r[0] != 'htid'
         ]
     logger.debug('Loaded {} rows from {}'.format(str(len(rows)), localFile))
     return rows
 
 
-def fetchHathiCSV():
-    logger.info('Fetching most recent update file from HathiTrust')
+def findHathiFile(full=False):
+    """Return the URL of the most recent HathiTrust TSV file, either a daily
+    update file or, if full is set, a monthly full file.
+    """
     fileList = requests.get(os.environ['HATHI_DATAFILES'])
     if fileList.status_code != 200:
-        raise ProcessingError('Unable to load data files')
+        raise ProcessingError('findHathiFile', 'Unable to load data files')
 
     logger.debug('Loaded JSON list of HathiFiles')
     fileJSON = fileList.json()
@@ -155,32 +217,73 @@ def fetchHathiCSV():
         reverse=True
     )
     for hathiFile in fileJSON:
-        if hathiFile['full'] is False:
+        if hathiFile['full'] is full:
             logger.info('Found most recent file {} updated on {}'.format(
                 hathiFile['url'],
                 hathiFile['created']
             ))
-            with open('/tmp/tmp_hathi.txt.gz', 'wb') as hathiTSV:
-                logger.debug(
-                    'Storing Downloaded HathiFile in /tmp/tmp_hathi.txt.gz'
-                )
-                hathiReq = requests.get(hathiFile['url'])
-                hathiTSV.write(hathiReq.content)
-            break
+            return hathiFile['url']
+
+    return None
 
-    # At present we aren't downloading in-copyright works, so skip anything
-    # that has these rights codes
-    rightsSkips = ['ic', 'icus', 'ic-world', 'und']
+
+def fetchHathiCSV():
+    logger.info('Fetching most recent update file from HathiTrust')
+    fileURL = findHathiFile()
+
+    if fileURL is not None:
+        with open('/tmp/tmp_hathi.txt.gz', 'wb') as hathiTSV:
+            logger.debug(
+                'Storing Downloaded HathiFile in /tmp/tmp_hathi.txt.gz'
+            )
+            hathiReq = requests.get(fileURL)
+            hathiTSV.write(hathiReq.content)
 
     with gzip.open('/tmp/tmp_hathi.txt.gz', 'rt') as unzipTSV:
         logger.debug('Parsing txt.gz file downloaded into TSV file')
         hathiTSV = csv.reader(unzipTSV, delimiter='\t')
 
         logger.debug('Parse for all rows to return')
-        return [r for r in hathiTSV if r[2] not in rightsSkips]
+        return [r for r in hathiTSV if r[2] not in RIGHTS_SKIPS]
+
+
+def streamHathiTSV(fileURL):
+    """Generator that yields rows from a gzipped HathiTrust TSV file as it is
+    downloaded. The response is read in chunks of HATHI_CHUNK_SIZE bytes and
+    decompressed as it is read, so that the full file is never held in memory
+    or written to disk.
 
+    Arguments:
+    fileURL -- URL of a .txt.gz HathiTrust file
+
+    Output:
+    Yields each row that does not have an in-copyright rights code
+    """
+    chunkSize = int(os.environ.get('HATHI_CHUNK_SIZE', 1048576))
+
+    with requests.get(fileURL, stream=True) as hathiReq:
+        if hathiReq.status_code != 200:
+            raise ProcessingError(
+                'streamHathiTSV', 'Unable to download {}'.format(fileURL)
+            )
+
+        # Undo any transfer encoding applied to the gzipped file itself
+        hathiReq.raw.decode_content = True
+        rawStream = io.BufferedReader(hathiReq.raw, buffer_size=chunkSize)
 
-def fileParser(fileRows, columns):
+        with gzip.open(
+            rawStream, 'rt', encoding='utf-8', newline=''
+        ) as unzipTSV:
+            for row in csv.reader(unzipTSV, delimiter='\t'):
+                if len(row) < 3:
+                    logger.warning('Skipping malformed row {}'.format(row))
+                    continue
+
+                if row[2] not in RIGHTS_SKIPS:
+                    yield row
+
+
+def fileParser(fileRows, columns, store=None):
     """Iterates through parsed CSV rows to return a list of records formatted
     to comply with the SFR data format. As a requirement of this a dict of
     country codes/country names is generated here for use as a lookup table.
@@ -188,6 +291,8 @@ def fileParser(fileRows, columns):
     Arguments:
     fileRows -- list of parsed CSV rows
     columns -- list of column names that correspond to the CSV file
+    store -- optional FingerprintStore, from which the fingerprints of any
+    rows that could not be processed are discarded
 
     Output:
     outcomes -- list of processing result tuples from the rowParser() function.
@@ -205,9 +310,14 @@ def fileParser(fileRows, columns):
     outcomes = []
     processes = []
     conns = []
-    chunkSize = int(ceil(len(fileRows) / 6))
+    bibGroups = hashRows(fileRows, columns)
+    if len(bibGroups) < 1:
+        logger.info('No rows to parse')
+        return [('empty', 'no records to process')]
 
-    for chunk in generateChunks(fileRows, chunkSize):
+    chunkSize = int(ceil(len(bibGroups) / 6))
+
+    for chunk in generateChunks(bibGroups, chunkSize):
         logger.info('Starting child Process')
 
         # Create pipe connections for sending results
@@ -225,19 +335,25 @@ def fileParser(fileRows, columns):
         conns.append(pConn)
         cConn.close()
 
+    lost = 0
     while conns:
         for c in wait(conns):
             try:
                 out = c.recv()
                 if out == 'DONE':
                     conns.remove(c)
+                elif out[0] == 'unprocessed':
+                    if store is not None:
+                        store.discard(out[1])
+                elif out[0] == 'covers':
+                    COVER_RESOLVER.update(out[1])
                 else:
                     outcomes.append(out)
             except EOFError:
                 conns.remove(c)
+                lost += 1
 
-    for proc in processes:
-        proc.join()
+    joinWorkers(processes, lost, 'fileParser')
 
     return outcomes
 
@@ -261,84 +377,401 @@ def generateChunks(rows, size):
 
 def processChunk(chunk, columns, countryCodes, cConn):
     """Invoked by the Process method, this method iterates over the provided
-    chunk of rows and returns the received outcomes from the rowParser.
+    chunk of grouped rows in batches of HATHI_BATCH_SIZE and returns the
+    received outcomes from the parseBatch method.
 
     Arguments:
-    @chunk -- array of rows to be processed
+    @chunk -- array of lists of rows, grouped by bib_key, to be processed
     @columns -- array of column names to be assigned to each row
     @countryCodes -- dict of country codes for translation to full text
     @cConn -- a multiprocessing.Pipe object that returns the output of method
     """
 
-    for row in chunk:
+    batchSize = int(os.environ.get('HATHI_BATCH_SIZE', 100))
+
+    for batch in generateBatches(chunk, batchSize):
+        outcomes, unprocessed = parseBatch(batch, columns, countryCodes)
+        for outcome in outcomes:
+            if outcome[0] != 'error':
+                cConn.send(outcome)
+
+        if unprocessed:
+            cConn.send(('unprocessed', unprocessed))
+
+        sendCovers(cConn)
+
+    cConn.send('DONE')
+    cConn.close()
+
+
+def streamParser(rows, columns, store=None):
+    """Parses rows from an iterator with a set of worker processes, without
+    loading all of the rows into memory. Consecutive rows with the same
+    bib_key are grouped and these groups are read in batches of
+    HATHI_BATCH_SIZE. A batch is only read from the iterator when a worker
+    requests one. At most one batch per worker is in memory at a time,
+    however large the source file.
+
+    The workers communicate through Pipes, as Lambda does not provide the
+    shared memory needed by multiprocessing.Queue. HATHI_WORKERS sets the
+    number of workers (default 6).
+
+    Arguments:
+    rows -- iterator of parsed CSV/TSV rows
+    columns -- list of column names that correspond to the rows
+    store -- optional FingerprintStore, from which the fingerprints of any
+    rows that could not be processed are discarded
+
+    Output:
+    outcomes -- list of tuples of each outcome from the recordParser()
+    function (success/failure/error) and the number of works with that outcome
+    """
+    logger.info('Parsing rows streamed from source file')
+
+    logger.debug('Loading country codes from XML file')
+    countryCodes = loadCountryCodes()
+
+    workers = int(os.environ.get('HATHI_WORKERS', 6))
+    batchSize = int(os.environ.get('HATHI_BATCH_SIZE', 100))
+    batches = generateBatches(groupRows(rows, columns), batchSize)
+
+    outcomes = Counter()
+    processes = []
+    conns = []
+
+    for _ in range(workers):
+        logger.info('Starting child Process')
+        pConn, cConn = Pipe()
+
+        proc = Process(
+            target=processStream,
+            args=(columns, countryCodes, cConn)
+        )
+        proc.start()
+
+        processes.append(proc)
+        conns.append(pConn)
+        cConn.close()
+
+    # The batch most recently sent to each worker, which is complete once
+    # the worker requests another
+    inFlight = {}
+    lost = 0
+
+    while conns:
+        for c in wait(conns):
+            try:
+                out = c.recv()
+            except EOFError:
+                # The works in the batch may not have been written to Kinesis
+                conns.remove(c)
+                lost += 1
+                batch = inFlight.pop(c, None)
+                if batch and store is not None:
+                    store.discard(
+                        FingerprintStore.fingerprint(row)
+                        for bibRows in batch for row in bibRows
+                    )
+                continue
+
+            if out == 'READY':
+                # None signals that there are no further rows to process
+                inFlight[c] = next(batches, None)
+                c.send(inFlight[c])
+            elif out == 'DONE':
+                conns.remove(c)
+            elif out[0] == 'covers':
+                COVER_RESOLVER.update(out[1])
+            elif out[0] == 'unprocessed':
+                if store is not None:
+                    store.discard(out[1])
+            else:
+                outcomes.update(out[1])
+
+    joinWorkers(processes, lost, 'streamParser')
+
+    return list(outcomes.items())
+
+
+def joinWorkers(processes, lost, source):
+    """Wait for each worker process to exit. If any worker failed to
+    complete, a ProcessingError is raised so that the fingerprint store is
+    not saved, as some rows may have been skipped without being recorded as
+    unprocessed.
+
+    Arguments:
+    @processes -- list of worker Process objects
+    @lost -- number of workers whose pipe closed before they were done
+    @source -- name of the calling function, for the error raised
+    """
+    for proc in processes:
+        proc.join()
+
+    failed = max(
+        lost, len([proc for proc in processes if proc.exitcode != 0])
+    )
+    if failed:
+        logger.error('{} worker process(es) exited unexpectedly'.format(
+            failed
+        ))
+        raise ProcessingError(
+            source, '{} worker(s) did not complete'.format(failed)
+        )
+
+
+def groupRows(rows, columns):
+    """Generator that groups consecutive rows with the same bib_key, so that
+    each bib record can be output as a single work. Groups are limited to
+    HATHI_MAX_GROUP rows (default 50) to keep records within the size limit
+    of a Kinesis record.
+
+    Arguments:
+    @rows -- iterator of rows from input file
+    @columns -- list of column names that correspond to the rows
+
+    Output:
+    Yields lists of rows that share a bib_key
+    """
+    bibIndex = columns.index('bib_key')
+    maxSize = int(os.environ.get('HATHI_MAX_GROUP', 50))
+
+    # Malformed rows are keyed on their htid so that they are not grouped
+    def bibKey(row):
+        return row[bibIndex] if len(row) > bibIndex else row[0]
+
+    for _, bibRows in groupby(rows, key=bibKey):
+        yield from generateBatches(bibRows, maxSize)
+
+
+def hashRows(rows, columns):
+    """Group all rows with the same bib_key, whether or not they are
+    consecutive, in the order that each bib_key first appears. Groups are
+    limited to HATHI_MAX_GROUP rows as in groupRows.
+
+    Arguments:
+    @rows -- full array of rows from input file
+    @columns -- list of column names that correspond to the rows
+
+    Output:
+    bibGroups -- list of lists of rows that share a bib_key
+    """
+    bibIndex = columns.index('bib_key')
+    maxSize = int(os.environ.get('HATHI_MAX_GROUP', 50))
+
+    bibRows = OrderedDict()
+    for row in rows:
+        key = row[bibIndex] if len(row) > bibIndex else row[0]
+        bibRows.setdefault(key, []).append(row)
+
+    return [
+        group
+        for keyRows in bibRows.values()
+        for group in generateBatches(keyRows, maxSize)
+    ]
+
+
+def generateBatches(rows, size):
+    """Group rows from an iterator into lists of up to the specified size
+
+    Arguments:
+    @rows -- iterator of rows from input file
+    @size -- maximum number of rows in each batch
+
+    Output:
+    Yields each batch of rows as it is read from the iterator
+    """
+    rowIter = iter(rows)
+    while True:
+        batch = list(islice(rowIter, size))
+        if len(batch) < 1:
+            break
+
+        yield batch
+
+
+def processStream(columns, countryCodes, cConn):
+    """Invoked by the Process method, this requests batches of grouped rows
+    from the parent process until it receives None, parsing each with the
+    parseBatch method. Only a count of the outcomes is returned for each
+    batch, to keep memory use constant, along with the fingerprints of any
+    rows that could not be processed. These are sent before the next batch
+    is requested.
+
+    Arguments:
+    @columns -- array of column names to be assigned to each row
+    @countryCodes -- dict of country codes for translation to full text
+    @cConn -- a duplex multiprocessing.Pipe connection to the parent process
+    """
+    while True:
+        cConn.send('READY')
+        batch = cConn.recv()
+        if batch is None:
+            break
+
+        outcomes, unprocessed = parseBatch(batch, columns, countryCodes)
+        cConn.send((
+            'outcomes', dict(Counter(outcome[0] for outcome in outcomes))
+        ))
+
+        if unprocessed:
+            cConn.send(('unprocessed', unprocessed))
+
+        sendCovers(cConn)
+
+    cConn.send('DONE')
+    cConn.close()
+
+
+def parseBatch(batch, columns, countryCodes):
+    """Parse each group of rows in a batch with the recordParser and write the
+    resulting works to Kinesis in as few requests as possible. The covers
+    for all volumes in the batch are found concurrently before any rows are
+    parsed. If the works cannot all be written, every group in the batch that
+    was parsed is treated as a failure, as it is not known which of their
+    works were written.
+
+    Arguments:
+    @batch -- list of lists of rows, grouped by bib_key
+    @columns -- array of column names to be assigned to each row
+    @countryCodes -- dict of country codes for translation to full text
+
+    Output:
+    A tuple of a list of outcomes, one for each group, and a list of the
+    fingerprints of rows that could not be processed
+    """
+    outcomes = []
+    unprocessed = []
+    parsed = []
+
+    covers = COVER_RESOLVER.resolve(
+        row[0] for bibRows in batch for row in bibRows if row
+    )
+
+    for bibRows in batch:
         try:
-            parsedRec = rowParser(row, columns, countryCodes)
-            cConn.send(parsedRec)
+            outcomes.append(
+                recordParser(bibRows, columns, countryCodes, covers)
+            )
+            parsed.append(bibRows)
+            continue
         except ProcessingError as err:
-            cConn.send(('failure', err.source, err.message))
+            logger.warning('Failed to process {}: {}'.format(
+                bibRows[0][0], err.message
+            ))
+            outcomes.append(('failure', err.source, err.message))
         except Exception as err:
             logger.debug('======ERROR======')
             logger.error(err)
+            outcomes.append(('error', 'Exception', str(err)))
 
-    cConn.send('DONE')
-    cConn.close()
+        unprocessed.extend(
+            FingerprintStore.fingerprint(row) for row in bibRows
+        )
+
+    try:
+        KinesisOutput.flush()
+    except KinesisError as err:
+        logger.error('Unable to output batch of {} works to Kinesis'.format(
+            len(parsed)
+        ))
+        logger.debug(err.message)
+        outcomes = [
+            ('failure', 'KinesisError', err.message)
+            if outcome[0] == 'success' else outcome
+            for outcome in outcomes
+        ]
+        unprocessed.extend(
+            FingerprintStore.fingerprint(row)
+            for bibRows in parsed for row in bibRows
+        )
+
+    return outcomes, unprocessed
+
+
+def sendCovers(cConn):
+    """Send the covers fetched by a worker process to the parent, so that
+    they can be added to its cache"""
+    fetched = COVER_RESOLVER.popFetched()
+    if fetched:
+        cConn.send(('covers', fetched))
 
 
 def rowParser(row, columns, countryCodes):
-    """Parse single HathiTrust item entry (corresponding to an item-level
-    record in the SFR model) into the SFR data model and pass the resulting
-    object to Kinesis for introduction into the SFR data pipeline.
+    """Parse a single HathiTrust row into a work record and output it to
+    Kinesis. See recordParser.
+    """
+    return recordParser([row], columns, countryCodes)
+
+
+def recordParser(rows, columns, countryCodes, covers=None):
+    """Parse a set of HathiTrust item entries that share a bib_key
+    (corresponding to item-level records in the SFR model) into a single work
+    in the SFR data model and pass the resulting object to Kinesis for
+    introduction into the SFR data pipeline.
 
     This method is a manager that handles methods around a HathiRecord object.
     Each method creates/enhances a part of the SFR metadata object, allowing
     for the object to both be built up and its components easily treated
-    as seperate components if necessary
+    as seperate components if necessary. The records built from each row are
+    then merged into the first.
 
     Arguments:
-    row -- list of fields from the HathiTrust source CSV file
+    rows -- list of rows of fields from the HathiTrust source CSV file
     columns -- list of columns that corresponds to the source row
     countryCodes -- dict of country code and name translations
+    covers -- optional dict of cover URLs for each htid, from the
+    CoverResolver
 
-    Output: None, writes resulting work record to a Kinesis stream
+    Output: A success tuple. The resulting work record is added to the
+    Kinesis buffer, which is only written by KinesisOutput.flush(), so any
+    write failures are raised from there rather than from this method
     """
+    hathiRec = None
+    errMessage = None
+    for row in rows:
+        logger.info('Reading entry for HathiTrust item {}'.format(row[0]))
+
+        logger.debug('Generating source dict from row and column names')
+        # This quickly builds a dictionary with column names that can be used
+        # to retrieve specific values
+        hathiDict = dict(zip(columns, row))
+        # Generate a hathi record object with the source dict
+        rowRec = HathiRecord(hathiDict)
 
-    logger.info('Reading entry for HathiTrust item {}'.format(row[0]))
-
-    logger.debug('Generating source dict from row and column names')
-    # This quickly builds a dictionary with column names that can be used to
-    # retrieve specific values
-    hathiDict = dict(zip(columns, row))
-    # Generate a hathi record object with the source dict
-    hathiRec = HathiRecord(hathiDict)
-
-    try:
-        # Generate an SFR-compliant object
-        hathiRec.buildDataModel(countryCodes)
-    except DataError as err:
-        logger.error('Unable to process record {}'.format(
-            hathiRec.ingest['htid']
-        ))
-        logger.debug(err.message)
-        raise ProcessingError('DataError', err.message)
-
-    try:
-        logger.debug('Writing hathi record {} to kinesis for ingest'.format(
-            hathiRec.work.primary_identifier.identifier
-        ))
-        KinesisOutput.putRecord({
-            'status': 200,
-            'type': 'work',
-            'method': 'insert',
-            'data': hathiRec.work,
-            'source': 'hathitrust'
-        }, os.environ['OUTPUT_STREAM'], hathiRec.ingest['bib_key'])
-    except KinesisError as err:
-        logger.error('Unable to output record {} to Kinesis'.format(
-            hathiRec.ingest['htid']
-        ))
-        logger.debug(err.message)
-        raise ProcessingError('KinesisError', err.message)
+        try:
+            # Generate an SFR-compliant object
+            rowRec.buildDataModel(
+                countryCodes, (covers or {}).get(rowRec.ingest['htid'])
+            )
+        except DataError as err:
+            logger.error('Unable to process record {}'.format(
+                rowRec.ingest['htid']
+            ))
+            logger.debug(err.message)
+            errMessage = err.message
+            continue
+
+        if hathiRec is None:
+            hathiRec = rowRec
+        else:
+            hathiRec.mergeRecord(rowRec)
+
+    if hathiRec is None:
+        raise ProcessingError('DataError', errMessage)
+
+    logger.debug('Adding hathi record {} to kinesis buffer for ingest'.format(
+        hathiRec.work.primary_identifier.identifier
+    ))
+    KinesisOutput.putRecord({
+        'status': 200,
+        'type': 'work',
+        'method': 'insert',
+        'data': hathiRec.work,
+        'source': 'hathitrust'
+    }, os.environ['OUTPUT_STREAM'], hathiRec.ingest['bib_key'])
 
     # On success, return tuple containg status and identifier, verifies record
     # was passed to next step in the data pipeline
-    return ('success', 'HathiTrust Item {}'.format(hathiRec.ingest['htid']))
+    return ('success', 'HathiTrust Work {} ({} items)'.format(
+        hathiRec.ingest['bib_key'], len(rows)
+    ))
@@ -0,0 +1,111 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from helpers.errorHelpers import URLFetchError
+from lib.coverResolver import CoverResolver
+from lib.hathiCover import HathiCover
+
+
+class TestCoverResolver(unittest.TestCase):
+    @patch.object(CoverResolver, 'fetchCover')
+    def test_resolve_fetch_and_cache(self, mock_fetch):
+        mock_fetch.side_effect = lambda htid: {
+            'test.1': ('url1', True),
+            'test.2': (None, True),
+            'test.3': (None, False)
+        }[htid]
+        testResolver = CoverResolver()
+
+        covers = testResolver.resolve(['test.1', 'test.2', 'test.3'])
+        self.assertEqual(
+            covers, {'test.1': 'url1', 'test.2': None, 'test.3': None}
+        )
+        self.assertEqual(
+            sorted(testResolver.cache.keys()), ['test.1', 'test.2']
+        )
+        self.assertEqual(
+            sorted(testResolver.popFetched().keys()), ['test.1', 'test.2']
+        )
+        self.assertEqual(testResolver.fetched, {})
+
+        mock_fetch.reset_mock()
+        covers = testResolver.resolve(['test.1', 'test.2', 'test.3'])
+        mock_fetch.assert_called_once_with('test.3')
+        self.assertEqual(covers['test.1'], 'url1')
+
+    @patch.object(CoverResolver, 'fetchCover', return_value=('url2', True))
+    def test_resolve_expired(self, mock_fetch):
+        testResolver = CoverResolver()
+        testResolver.cache['test.1'] = ('url1', time.time() - 3000000)
+
+        covers = testResolver.resolve(['test.1'])
+        self.assertEqual(covers, {'test.1': 'url2'})
+        self.assertEqual(testResolver.cache['test.1'][0], 'url2')
+
+    @patch.dict('os.environ', {'HATHI_COVER_CACHE_SIZE': '2'})
+    def test_update_max_size(self):
+        testResolver = CoverResolver()
+        testResolver.update({
+            'test.1': ('url1', 1), 'test.2': ('url2', 2), 'test.3': (None, 3)
+        })
+        self.assertEqual(list(testResolver.cache.keys()), ['test.2', 'test.3'])
+
+    def test_save_load(self):
+        now = time.time()
+        testResolver = CoverResolver()
+        testResolver.update({
+            'test.1': ('url1', now),
+            'test.2': (None, now),
+            'test.3': ('url3', now - 3000000)
+        })
+
+        with tempfile.TemporaryDirectory() as tmpDir:
+            location = os.path.join(tmpDir, 'covers.json.gz')
+            testResolver.save(location)
+
+            with open(location, 'rb') as cacheFile:
+                saved = json.loads(gzip.decompress(cacheFile.read()))
+            self.assertEqual(len(saved), 2)
+
+            loadResolver = CoverResolver()
+            loadResolver.load(location)
+
+        self.assertEqual(loadResolver.cache['test.1'], ('url1', now))
+        self.assertEqual(loadResolver.cache['test.2'], (None, now))
+        self.assertNotIn('test.3', loadResolver.cache)
+
+    def test_load_missing(self):
+        testResolver = CoverResolver()
+        testResolver.load('/tmp/missing/covers.json.gz')
+        self.assertEqual(testResolver.cache, {})
+
+    @patch.multiple(HathiCover, getResponse=MagicMock(), parseMETS=MagicMock())
+    def test_fetchCover_success(self):
+        HathiCover.getResponse.return_value.status_code = 200
+        HathiCover.parseMETS.return_value = 'url1'
+        self.assertEqual(CoverResolver.fetchCover('test.1'), ('url1', True))
+
+    @patch.object(HathiCover, 'getResponse')
+    def test_fetchCover_not_found(self, mock_resp):
+        mock_resp.return_value.status_code = 404
+        self.assertEqual(CoverResolver.fetchCover('test.1'), (None, True))
+
+    @patch.object(HathiCover, 'getResponse')
+    def test_fetchCover_forbidden(self, mock_resp):
+        mock_resp.return_value.status_code = 403
+        self.assertEqual(CoverResolver.fetchCover('test.1'), (None, False))
+
+    @patch.object(HathiCover, 'getResponse')
+    def test_fetchCover_server_error(self, mock_resp):
+        mock_resp.return_value.status_code = 503
+        self.assertEqual(CoverResolver.fetchCover('test.1'), (None, False))
+
+    @patch.object(HathiCover, 'getResponse')
+    def test_fetchCover_timeout(self, mock_resp):
+        mock_resp.side_effect = URLFetchError('timeout', 504, 'test_url')
+        self.assertEqual(CoverResolver.fetchCover('test.1'), (None, False))
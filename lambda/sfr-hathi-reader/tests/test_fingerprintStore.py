@@ -0,0 +1,110 @@
+from array import array
+from botocore.exceptions import ClientError
+import os
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from lib.fingerprintStore import FingerprintStore
+
+
+class TestFingerprintStore(unittest.TestCase):
+    def setUp(self):
+        self.tmpDir = tempfile.TemporaryDirectory()
+        self.location = os.path.join(self.tmpDir.name, 'hathi.fingerprints')
+
+    def tearDown(self):
+        self.tmpDir.cleanup()
+
+    def test_fingerprint(self):
+        self.assertEqual(
+            FingerprintStore.fingerprint(['htid1', 'full', 'pd']),
+            FingerprintStore.fingerprint(['htid1', 'full', 'pd'])
+        )
+        self.assertNotEqual(
+            FingerprintStore.fingerprint(['htid1', 'full', 'pd']),
+            FingerprintStore.fingerprint(['htid1', 'full', 'pdus'])
+        )
+
+    def test_load_missing(self):
+        testStore = FingerprintStore(self.location)
+        testStore.load()
+        self.assertEqual(len(testStore.previous), 0)
+
+    def test_filter_and_save(self):
+        firstRows = [['htid1', 'pd'], ['htid2', 'pd'], ['htid3', 'pd']]
+        firstStore = FingerprintStore(self.location)
+        firstStore.load()
+        self.assertEqual(list(firstStore.filterRows(firstRows)), firstRows)
+        firstStore.discard([FingerprintStore.fingerprint(['htid3', 'pd'])])
+        firstStore.save()
+
+        secondRows = [['htid1', 'pd'], ['htid2', 'pdus'], ['htid3', 'pd']]
+        secondStore = FingerprintStore(self.location)
+        secondStore.load()
+        self.assertEqual(len(secondStore.previous), 2)
+        self.assertEqual(
+            list(secondStore.filterRows(secondRows)),
+            [['htid2', 'pdus'], ['htid3', 'pd']]
+        )
+        self.assertEqual(secondStore.skipped, 1)
+        secondStore.save()
+
+        thirdStore = FingerprintStore(self.location)
+        thirdStore.load()
+        self.assertEqual(len(thirdStore.previous), 4)
+        self.assertEqual(
+            list(thirdStore.previous), sorted(thirdStore.previous)
+        )
+
+    def test_save_replace(self):
+        with open(self.location, 'wb') as printFile:
+            printFile.write(array('Q', sorted([
+                FingerprintStore.fingerprint(['htid1', 'pd']),
+                FingerprintStore.fingerprint(['htid2', 'pd'])
+            ])).tobytes())
+
+        testStore = FingerprintStore(self.location)
+        testStore.load()
+        list(testStore.filterRows([['htid1', 'pd'], ['htid2', 'pdus']]))
+        testStore.save(replace=True)
+
+        testStore.load()
+        self.assertEqual(
+            sorted(testStore.previous),
+            sorted([
+                FingerprintStore.fingerprint(['htid1', 'pd']),
+                FingerprintStore.fingerprint(['htid2', 'pdus'])
+            ])
+        )
+
+    @patch('helpers.storageHelpers.createAWSClient')
+    def test_s3_read(self, mock_client):
+        mock_body = MagicMock()
+        mock_body.read.return_value = array('Q', [1, 2]).tobytes()
+        mock_client.return_value.get_object.return_value = {'Body': mock_body}
+
+        testStore = FingerprintStore('s3://bucket/path/key')
+        testStore.load()
+        mock_client.return_value.get_object.assert_called_once_with(
+            Bucket='bucket', Key='path/key'
+        )
+        self.assertEqual(list(testStore.previous), [1, 2])
+
+    @patch('helpers.storageHelpers.createAWSClient')
+    def test_s3_missing(self, mock_client):
+        mock_client.return_value.get_object.side_effect = ClientError(
+            {'Error': {'Code': 'NoSuchKey'}}, 'get_object'
+        )
+
+        testStore = FingerprintStore('s3://bucket/key')
+        testStore.load()
+        self.assertEqual(len(testStore.previous), 0)
+
+    @patch('helpers.storageHelpers.createAWSClient')
+    def test_s3_write(self, mock_client):
+        testStore = FingerprintStore('s3://bucket/key')
+        testStore.writeFile(b'data')
+        mock_client.return_value.put_object.assert_called_once_with(
+            Bucket='bucket', Key='key', Body=b'data'
+        )
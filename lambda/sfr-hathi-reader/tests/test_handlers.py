@@ -1,16 +1,28 @@
+import gzip
+from io import BytesIO
 import unittest
-from unittest.mock import patch, mock_open, MagicMock, call
+from unittest.mock import patch, mock_open, MagicMock, call, ANY
 
 from service import (
     handler,
     loadLocalCSV,
+    findHathiFile,
     fetchHathiCSV,
+    streamHathiTSV,
     fileParser,
+    streamParser,
     rowParser,
     processChunk,
-    generateChunks
+    processStream,
+    parseBatch,
+    recordParser,
+    generateChunks,
+    generateBatches,
+    groupRows,
+    hashRows
 )
 from helpers.errorHelpers import ProcessingError, DataError, KinesisError
+from lib.fingerprintStore import FingerprintStore
 
 
 class TestHandler(unittest.TestCase):
@@ -53,6 +65,78 @@ class TestHandler(unittest.TestCase):
         mock_fetch.assert_called_once()
         self.assertEqual(resp, [])
 
+    @patch.dict('os.environ', {'HATHI_FINGERPRINTS': 's3://bucket/key'})
+    @patch('service.FingerprintStore')
+    @patch('service.fetchHathiCSV', return_value=['row1', 'row2'])
+    @patch('service.fileParser')
+    def test_handler_all_filtered(self, mock_parser, mock_fetch, mock_store):
+        mock_store.return_value.filterRows.return_value = iter([])
+        resp = handler({'source': 'Kinesis'}, None)
+        mock_parser.assert_not_called()
+        self.assertEqual(
+            resp, [('empty', 'no updated records in retrieval period')]
+        )
+
+    @patch.dict('os.environ', {'HATHI_STREAM': 'true'})
+    @patch('service.findHathiFile', return_value='hathi_url')
+    @patch('service.streamHathiTSV', return_value='rowGenerator')
+    @patch('service.streamParser', return_value=[('success', 2)])
+    def test_handler_streaming(self, mock_parser, mock_stream, mock_find):
+        resp = handler({'source': 'Kinesis'}, None)
+        mock_find.assert_called_once_with(full=False)
+        mock_stream.assert_called_once_with('hathi_url')
+        mock_parser.assert_called_once()
+        self.assertEqual(mock_parser.call_args[0][0], 'rowGenerator')
+        self.assertEqual(resp, [('success', 2)])
+
+    @patch.dict('os.environ', {'HATHI_FINGERPRINTS': 's3://bucket/key'})
+    @patch('service.FingerprintStore')
+    @patch('service.findHathiFile', return_value='hathi_full_url')
+    @patch('service.streamHathiTSV', return_value='rowGenerator')
+    @patch('service.streamParser', return_value=[])
+    def test_handler_fingerprints(self, mock_parser, mock_stream, mock_find, mock_store):
+        mock_store.return_value.filterRows.return_value = 'filteredRows'
+        handler({'source': 'Kinesis', 'full': True}, None)
+        mock_store.assert_called_once_with('s3://bucket/key')
+        mock_store.return_value.load.assert_called_once()
+        mock_store.return_value.filterRows.assert_called_once_with(
+            'rowGenerator'
+        )
+        mock_parser.assert_called_once_with(
+            'filteredRows', ANY, mock_store.return_value
+        )
+        mock_store.return_value.save.assert_called_once_with(replace=True)
+
+    @patch.dict('os.environ', {'HATHI_FINGERPRINTS': 's3://bucket/key'})
+    @patch('service.FingerprintStore')
+    @patch('service.findHathiFile', return_value='hathi_full_url')
+    @patch('service.streamHathiTSV', return_value='rowGenerator')
+    @patch('service.streamParser', side_effect=ProcessingError('test', 'test'))
+    def test_handler_fingerprints_worker_failure(self, mock_parser, mock_stream, mock_find, mock_store):
+        with self.assertRaises(ProcessingError):
+            handler({'source': 'Kinesis', 'full': True}, None)
+        mock_store.return_value.save.assert_not_called()
+
+    @patch.dict('os.environ', {'HATHI_COVER_CACHE': 's3://bucket/covers'})
+    @patch('service.COVER_RESOLVER')
+    @patch('service.findHathiFile', return_value='hathi_full_url')
+    @patch('service.streamHathiTSV', return_value='rowGenerator')
+    @patch('service.streamParser', return_value=[])
+    def test_handler_cover_cache(self, mock_parser, mock_stream, mock_find, mock_covers):
+        handler({'source': 'Kinesis', 'full': True}, None)
+        mock_covers.load.assert_called_once_with('s3://bucket/covers')
+        mock_covers.save.assert_called_once_with('s3://bucket/covers')
+
+    @patch('service.findHathiFile', return_value='hathi_full_url')
+    @patch('service.streamHathiTSV')
+    @patch('service.streamParser', return_value=[])
+    @patch('service.fetchHathiCSV')
+    def test_handler_full(self, mock_fetch, mock_parser, mock_stream, mock_find):
+        handler({'source': 'Kinesis', 'full': True}, None)
+        mock_find.assert_called_once_with(full=True)
+        mock_stream.assert_called_once_with('hathi_full_url')
+        mock_fetch.assert_not_called()
+
     def test_local_csv_success(self):
         mOpen = mock_open(read_data='id1,r1.2,pd\nid2,r2.2,pd\n')
         mOpen.return_value.__iter__ = lambda s: s
@@ -102,23 +186,254 @@ class TestHandler(unittest.TestCase):
                 ])
                 mock_gzip.assert_called_once()
 
+    @patch.dict('os.environ', {'HATHI_DATAFILES': 'datafile_url'})
+    def test_find_hathi_full(self):
+        with patch('service.requests') as mock_request:
+            mock_resp = MagicMock()
+            mock_resp.status_code = 200
+            mock_resp.json.return_value = [
+                {
+                    'created': '2019-01-02T12:00:00-0',
+                    'url': 'hathitrust.org/test/update.txt.gz',
+                    'full': False
+                },
+                {
+                    'created': '2019-01-01T12:00:00-0',
+                    'url': 'hathitrust.org/test/full.txt.gz',
+                    'full': True
+                }
+            ]
+            mock_request.get.return_value = mock_resp
+
+            self.assertEqual(
+                findHathiFile(full=True), 'hathitrust.org/test/full.txt.gz'
+            )
+
+    def test_stream_hathi(self):
+        testTSV = 'id1\tfull\tpd\nid2\tfull\tic\nid3\tfull\tpdus\n'
+        mock_resp = MagicMock()
+        mock_resp.status_code = 200
+        mock_resp.raw = BytesIO(gzip.compress(testTSV.encode('utf-8')))
+        mock_resp.__enter__.return_value = mock_resp
+
+        with patch('service.requests') as mock_request:
+            mock_request.get.return_value = mock_resp
+            rows = streamHathiTSV('hathi_url')
+            mock_request.get.assert_not_called()
+
+            self.assertEqual(
+                [row[0] for row in rows], ['id1', 'id3']
+            )
+            mock_request.get.assert_called_once_with('hathi_url', stream=True)
+
+    def test_stream_hathi_error(self):
+        mock_resp = MagicMock()
+        mock_resp.status_code = 404
+        mock_resp.__enter__.return_value = mock_resp
+
+        with patch('service.requests') as mock_request:
+            mock_request.get.return_value = mock_resp
+            with self.assertRaises(ProcessingError):
+                next(streamHathiTSV('hathi_url'))
+
     @patch('service.loadCountryCodes', return_value={})
     @patch('service.Process')
     @patch('service.Pipe')
     @patch('service.wait')
     def test_file_parser(self, mock_wait, mock_pipe, mock_process, mock_codes):
-        testRows = ['a', 'b', 'c', 'd', 'e', 'f', 'g', 'h']
+        testRows = [[htid, 'bib{}'.format(htid)] for htid in 'abcdefgh']
         mock_parent = MagicMock()
         outList = ['success'] * 8 + ['DONE'] * 6
         mock_parent.recv.side_effect = outList
         mock_child = MagicMock()
         mock_pipe.return_value = (mock_parent, mock_child)
         mock_wait.return_value = [mock_parent]
-        res = fileParser(testRows, ['test'])
+        mock_process.return_value.exitcode = 0
+        res = fileParser(testRows, ['htid', 'bib_key'])
         self.assertEqual(len(res), 8)
         self.assertEqual(res[7], 'success')
 
-    def test_chunk_parser(self):
+    @patch('service.loadCountryCodes', return_value={})
+    @patch('service.Process')
+    def test_file_parser_empty(self, mock_process, mock_codes):
+        res = fileParser([], ['htid', 'bib_key'])
+        self.assertEqual(res, [('empty', 'no records to process')])
+        mock_process.assert_not_called()
+
+    @patch('service.loadCountryCodes', return_value={})
+    @patch('service.Process')
+    @patch('service.Pipe')
+    @patch('service.wait')
+    def test_file_parser_worker_failure(self, mock_wait, mock_pipe, mock_process, mock_codes):
+        testRows = [['a', 'bib1']]
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [EOFError]
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+        mock_process.return_value.exitcode = 1
+        with self.assertRaises(ProcessingError):
+            fileParser(testRows, ['htid', 'bib_key'])
+        mock_process.return_value.join.assert_called_once()
+
+    @patch.dict('os.environ', {'HATHI_WORKERS': '1', 'HATHI_BATCH_SIZE': '2'})
+    @patch('service.COVER_RESOLVER')
+    @patch('service.loadCountryCodes', return_value={})
+    @patch('service.Process')
+    @patch('service.Pipe')
+    @patch('service.wait')
+    def test_stream_parser(self, mock_wait, mock_pipe, mock_process, mock_codes,
+                           mock_covers):
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [
+            'READY', ('outcomes', {'success': 2}),
+            ('covers', {'a': ('url', 1)}), 'READY',
+            ('outcomes', {'failure': 1}), ('unprocessed', [123]), 'READY',
+            'DONE'
+        ]
+        mock_store = MagicMock()
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+        mock_process.return_value.exitcode = 0
+
+        testRows = [['a', '1'], ['b', '1'], ['c', '2'], ['d', '3']]
+        res = streamParser(iter(testRows), ['htid', 'bib_key'], mock_store)
+        mock_parent.send.assert_has_calls([
+            call([[['a', '1'], ['b', '1']], [['c', '2']]]),
+            call([[['d', '3']]]),
+            call(None)
+        ])
+        self.assertEqual(sorted(res), [('failure', 1), ('success', 2)])
+        mock_store.discard.assert_called_once_with([123])
+        mock_covers.update.assert_called_once_with({'a': ('url', 1)})
+
+    @patch.dict('os.environ', {'HATHI_WORKERS': '1', 'HATHI_BATCH_SIZE': '1'})
+    @patch('service.COVER_RESOLVER')
+    @patch('service.loadCountryCodes', return_value={})
+    @patch('service.Process')
+    @patch('service.Pipe')
+    @patch('service.wait')
+    def test_stream_parser_worker_failure(self, mock_wait, mock_pipe,
+                                          mock_process, mock_codes,
+                                          mock_covers):
+        mock_parent = MagicMock()
+        mock_parent.recv.side_effect = [
+            'READY', ('outcomes', {'success': 1}), 'READY', EOFError
+        ]
+        mock_store = MagicMock()
+        mock_pipe.return_value = (mock_parent, MagicMock())
+        mock_wait.return_value = [mock_parent]
+        mock_process.return_value.exitcode = -9
+
+        testRows = [['a', '1'], ['b', '2']]
+        with self.assertRaises(ProcessingError):
+            streamParser(iter(testRows), ['htid', 'bib_key'], mock_store)
+
+        mock_store.discard.assert_called_once()
+        self.assertEqual(
+            list(mock_store.discard.call_args[0][0]),
+            [FingerprintStore.fingerprint(['b', '2'])]
+        )
+        mock_process.return_value.join.assert_called_once()
+
+    @patch('service.COVER_RESOLVER')
+    def test_stream_processor(self, mock_covers):
+        mock_covers.popFetched.side_effect = [{'row1': ('url', 1)}, {}]
+        mock_conn = MagicMock()
+        mock_conn.recv.side_effect = [
+            [[['row1'], ['row2']], [['row3']]], [[['row4']]], None
+        ]
+        returnValues = [
+            ('success', 'bib1'),
+            ProcessingError('TestError', 'sample'),
+            ('success', 'bib3')
+        ]
+
+        with patch('service.recordParser', side_effect=returnValues):
+            processStream(['htid'], {}, mock_conn)
+
+        mock_conn.send.assert_has_calls([
+            call('READY'),
+            call(('outcomes', {'success': 1, 'failure': 1})),
+            call(('unprocessed', [FingerprintStore.fingerprint(['row3'])])),
+            call(('covers', {'row1': ('url', 1)})),
+            call('READY'),
+            call(('outcomes', {'success': 1})),
+            call('READY'),
+            call('DONE')
+        ])
+        self.assertEqual(mock_conn.send.call_count, 8)
+
+    @patch('service.COVER_RESOLVER')
+    @patch('service.KinesisOutput')
+    def test_parse_batch(self, mock_kinesis, mock_covers):
+        mock_covers.resolve.return_value = {'row1': 'url'}
+        returnValues = [
+            ('success', 'bib1'),
+            ProcessingError('test', 'Test Error')
+        ]
+
+        with patch('service.recordParser', side_effect=returnValues) as mock_rec:
+            outcomes, unprocessed = parseBatch(
+                [[['row1']], [['row2']]], ['htid'], {}
+            )
+            mock_rec.assert_any_call([['row1']], ['htid'], {}, {'row1': 'url'})
+
+        self.assertEqual(
+            list(mock_covers.resolve.call_args[0][0]), ['row1', 'row2']
+        )
+        mock_kinesis.flush.assert_called_once()
+        self.assertEqual(outcomes[0], ('success', 'bib1'))
+        self.assertEqual(outcomes[1], ('failure', 'test', 'Test Error'))
+        self.assertEqual(unprocessed, [FingerprintStore.fingerprint(['row2'])])
+
+    @patch('service.COVER_RESOLVER')
+    @patch('service.KinesisOutput')
+    def test_parse_batch_flush_error(self, mock_kinesis, mock_covers):
+        mock_kinesis.flush.side_effect = KinesisError('Test Error')
+        returnValues = [
+            ('success', 'bib1'),
+            ProcessingError('test', 'Test Error')
+        ]
+
+        with patch('service.recordParser', side_effect=returnValues):
+            outcomes, unprocessed = parseBatch(
+                [[['row1']], [['row2']]], ['htid'], {}
+            )
+
+        self.assertEqual(outcomes[0], ('failure', 'KinesisError', 'Test Error'))
+        self.assertEqual(
+            sorted(unprocessed),
+            sorted([
+                FingerprintStore.fingerprint(['row1']),
+                FingerprintStore.fingerprint(['row2'])
+            ])
+        )
+
+    @patch.dict('os.environ', {'HATHI_MAX_GROUP': '2'})
+    def test_group_rows(self):
+        testRows = [['a', '1'], ['b', '1'], ['c', '1'], ['d', '2'], ['e', '1']]
+        groups = groupRows(iter(testRows), ['htid', 'bib_key'])
+        self.assertEqual(
+            [[row[0] for row in group] for group in groups],
+            [['a', 'b'], ['c'], ['d'], ['e']]
+        )
+
+    def test_hash_rows(self):
+        testRows = [['a', '1'], ['b', '2'], ['c', '1'], ['malformed']]
+        groups = hashRows(testRows, ['htid', 'bib_key'])
+        self.assertEqual(
+            [[row[0] for row in group] for group in groups],
+            [['a', 'c'], ['b'], ['malformed']]
+        )
+
+    def test_generate_batches(self):
+        batches = generateBatches(iter(['row1', 'row2', 'row3']), 2)
+        self.assertEqual(list(batches), [['row1', 'row2'], ['row3']])
+
+    @patch('service.COVER_RESOLVER')
+    def test_chunk_parser(self, mock_covers):
+        mock_covers.resolve.return_value = {}
+        mock_covers.popFetched.return_value = {}
         returnValues = [
             ('success', 'htid1'),
             ProcessingError('TestError', 'sampe'),
@@ -127,16 +442,16 @@ class TestHandler(unittest.TestCase):
 
         mock_conn = MagicMock()
 
-        with patch('service.rowParser', side_effect=returnValues) as mock_row:
+        with patch('service.recordParser', side_effect=returnValues) as mock_rec:
             processChunk(
-                [['row1'], ['row2'], ['row3']],
+                [[['row1'], ['row2']], [['row3']], [['row4']]],
                 ['htid'],
                 {},
                 mock_conn
             )
-            mock_row.assert_any_call(['row3'], ['htid'], {})
-            mock_row.assert_any_call(['row2'], ['htid'], {})
-            mock_row.assert_any_call(['row1'], ['htid'], {})
+            mock_rec.assert_any_call([['row4']], ['htid'], {}, {})
+            mock_rec.assert_any_call([['row3']], ['htid'], {}, {})
+            mock_rec.assert_any_call([['row1'], ['row2']], ['htid'], {}, {})
 
     def test_yield_chunks(self):
         testRows = ['row1', 'row2', 'row3', 'row4', 'row5', 'row6']
@@ -150,16 +465,30 @@ class TestHandler(unittest.TestCase):
         result = rowParser(['row1'], ['htid'], {})
         self.assertEqual(result[0], 'success')
 
-    @patch('service.HathiRecord')
-    def test_row_parse_data_error(self, mock_hathi):
-        mock_hathi().buildDataModel.side_effect = DataError('Test Error')
-        with self.assertRaises(ProcessingError):
-            rowParser(['row1'], ['htid'], {})
-
     @patch.dict('os.environ', {'OUTPUT_STREAM': 'test-stream'})
     @patch('service.HathiRecord')
     @patch('service.KinesisOutput')
-    def test_row_parse_kinesis_error(self, mock_kinesis, mock_hathi):
-        mock_kinesis.putRecord.side_effect = KinesisError('Test Error')
+    def test_record_parse_merge(self, mock_kinesis, mock_hathi):
+        mock_first = MagicMock()
+        mock_bad = MagicMock()
+        mock_bad.buildDataModel.side_effect = DataError('Test Error')
+        mock_third = MagicMock()
+        mock_hathi.side_effect = [mock_first, mock_bad, mock_third]
+
+        result = recordParser(
+            [['row1', '1'], ['row2', '1'], ['row3', '1']],
+            ['htid', 'bib_key'],
+            {}
+        )
+        self.assertEqual(result[0], 'success')
+        mock_first.mergeRecord.assert_called_once_with(mock_third)
+        mock_kinesis.putRecord.assert_called_once()
+        self.assertEqual(
+            mock_kinesis.putRecord.call_args[0][0]['data'], mock_first.work
+        )
+
+    @patch('service.HathiRecord')
+    def test_row_parse_data_error(self, mock_hathi):
+        mock_hathi().buildDataModel.side_effect = DataError('Test Error')
         with self.assertRaises(ProcessingError):
             rowParser(['row1'], ['htid'], {})
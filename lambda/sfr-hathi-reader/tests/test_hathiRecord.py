@@ -2,7 +2,6 @@ import unittest
 from unittest.mock import MagicMock, patch, call
 from datetime import datetime
 
-from lib.hathiCover import HathiCover
 from lib.hathiRecord import HathiRecord
 from lib.dataModel import (
     WorkRecord,
@@ -77,6 +76,37 @@ class TestHathi(unittest.TestCase):
         workTest.buildDataModel('countryCodes')
         self.assertIsInstance(workTest, HathiRecord)
 
+    def test_merge_record(self):
+        def createRecord(htid, volume, oclc, license):
+            hathiRec = HathiRecord({'htid': htid, 'bib_key': '1'})
+            hathiRec.work.identifiers = [Identifier('oclc', oclc, 1)]
+            hathiRec.work.agents = [Agent(name='Author, Test')]
+            hathiRec.work.rights = [Rights(license=license)]
+            instance = InstanceRecord()
+            instance.volume = volume
+            instance.formats = [Format(source=htid)]
+            hathiRec.work.instances = [instance]
+            return hathiRec
+
+        testRec = createRecord('test.1', 'v. 1', '1', 'pd')
+        testRec.mergeRecord(createRecord('test.2', 'v. 2', '1', 'pd'))
+        testRec.mergeRecord(createRecord('test.3', 'v. 1', '2', 'cc'))
+
+        self.assertEqual(
+            [inst.volume for inst in testRec.work.instances], ['v. 1', 'v. 2']
+        )
+        self.assertEqual(
+            [item.source for item in testRec.work.instances[0].formats],
+            ['test.1', 'test.3']
+        )
+        self.assertEqual(
+            [iden.identifier for iden in testRec.work.identifiers], ['1', '2']
+        )
+        self.assertEqual(len(testRec.work.agents), 1)
+        self.assertEqual(
+            [rights.license for rights in testRec.work.rights], ['pd', 'cc']
+        )
+
     def test_build_work(self):
         testRow = {
             'title': 'Work Test',
@@ -96,9 +126,8 @@ class TestHathi(unittest.TestCase):
         self.assertIsInstance(workTest.work, WorkRecord)
         self.assertEqual(workTest.work.title, 'Work Test')
 
-    @patch.object(HathiCover, 'getPageFromMETS', return_value='test_url')
     @patch.object(InstanceRecord, 'addClassItem')
-    def test_build_instance_cover(self, mockAddItem, mockCover):
+    def test_build_instance_cover(self, mockAddItem):
         testInstanceRow = {
             'htid': 'test.1',
             'title': 'Instance Test',
@@ -113,8 +142,7 @@ class TestHathi(unittest.TestCase):
         instanceTest.parsePubInfo = MagicMock()
         instanceTest.parsePubPlace = MagicMock()
 
-        instanceTest.buildInstance({})
-        mockCover.assert_called_once()
+        instanceTest.buildInstance({}, 'test_url')
         mockAddItem.assert_has_calls([
             call('dates', Date, **{
                 'display_date': '2019',
@@ -130,8 +158,7 @@ class TestHathi(unittest.TestCase):
         self.assertIsInstance(instanceTest.instance, InstanceRecord)
         self.assertEqual(instanceTest.instance.language, 'en')
 
-    @patch.object(HathiCover, 'getPageFromMETS', return_value=None)
-    def test_build_instance_no_cover(self, mockCover):
+    def test_build_instance_no_cover(self):
         testInstanceRow = {
             'htid': 'test.1',
             'title': 'Instance Test',
@@ -147,7 +174,7 @@ class TestHathi(unittest.TestCase):
         instanceTest.parsePubPlace = MagicMock()
 
         instanceTest.buildInstance({})
-        mockCover.assert_called_once_with()
+        self.assertEqual(instanceTest.instance.links, [])
         self.assertIsInstance(instanceTest.instance, InstanceRecord)
         self.assertEqual(instanceTest.instance.language, 'en')
         self.assertEqual(instanceTest.instance.title, 'Instance Test')
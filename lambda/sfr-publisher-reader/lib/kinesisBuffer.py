@@ -0,0 +1,212 @@
+from collections import defaultdict
+import os
+import time
+
+from helpers.logHelpers import createLog
+
+logger = createLog('kinesis_buffer')
+
+
+class KinesisBuffer():
+    """Accumulates serialized records for one or more Kinesis streams and
+    writes them with put_records, in requests of up to 500 records or 5MB.
+    Records that fail within a request are retried on their own with an
+    exponential backoff. If autoFlush is set the records for a stream are
+    sent as soon as a full request has been buffered, otherwise they are
+    only sent by flush().
+
+    Small records can also be packed together into aggregate records, each
+    a JSON object with a type of "aggregate" and a list of the original
+    records in its "records" field. Consumers of the stream must expand
+    these.
+
+    Configured with the following (optional) environment variables:
+    KINESIS_AGGREGATE -- set to "true" to pack small records together (false)
+    KINESIS_AGGREGATE_BYTES -- maximum size of an aggregate record (262144)
+    KINESIS_RETRIES -- number of times failed records are retried (5)
+    KINESIS_BACKOFF -- initial retry wait in seconds, doubled each retry (0.1)
+    """
+    MAX_RECORDS = 500
+    MAX_BYTES = 5242880
+    MAX_RECORD_BYTES = 1048576
+    MAX_BACKOFF = 10
+
+    def __init__(self, client, autoFlush=True):
+        self.client = client
+        self.autoFlush = autoFlush
+
+        self.aggregate = os.environ.get(
+            'KINESIS_AGGREGATE', 'false'
+        ).lower() == 'true'
+        self.aggregateBytes = int(
+            os.environ.get('KINESIS_AGGREGATE_BYTES', 262144)
+        )
+        self.maxRetries = int(os.environ.get('KINESIS_RETRIES', 5))
+        self.backoff = float(os.environ.get('KINESIS_BACKOFF', 0.1))
+
+        self.records = defaultdict(list)
+        self.sizes = defaultdict(int)
+
+    def add(self, stream, data, partKey):
+        """Buffer a serialized record for a stream. Returns a list of any
+        records that could not be written, if this caused the buffer for the
+        stream to be flushed.
+        """
+        self.records[stream].append((data, partKey))
+        self.sizes[stream] += KinesisBuffer.recordSize((data, partKey))
+
+        if self.autoFlush and (
+            len(self.records[stream]) >= KinesisBuffer.MAX_RECORDS
+            or self.sizes[stream] >= KinesisBuffer.MAX_BYTES
+        ):
+            return self.flush(stream)
+
+        return []
+
+    def flush(self, stream=None):
+        """Write the buffered records for a stream, or for all streams if none
+        is given. The buffer is emptied whether or not the writes succeed, and
+        a list of the (data, partition key) tuples that could not be written
+        is returned.
+        """
+        streams = [stream] if stream else list(self.records.keys())
+
+        failed = []
+        for streamName in streams:
+            records = self.records.pop(streamName, [])
+            self.sizes.pop(streamName, None)
+
+            if self.aggregate:
+                records = self.aggregateRecords(records)
+
+            # A single oversized record would cause its whole request to fail
+            valid = []
+            for record in records:
+                recSize = KinesisBuffer.recordSize(record)
+                if recSize > KinesisBuffer.MAX_RECORD_BYTES:
+                    logger.error('Skipping record over {} bytes'.format(
+                        KinesisBuffer.MAX_RECORD_BYTES
+                    ))
+                    failed.append(record)
+                else:
+                    valid.append(record)
+
+            for chunk in KinesisBuffer.chunkRecords(valid):
+                failed.extend(self.putChunk(streamName, chunk))
+
+        return failed
+
+    def aggregateRecords(self, records):
+        aggregated = []
+        packed = []
+        packedSize = 0
+
+        for record in records:
+            recSize = KinesisBuffer.byteLength(record[0])
+            if recSize >= self.aggregateBytes:
+                aggregated.append(record)
+                continue
+
+            if packed and packedSize + recSize > self.aggregateBytes:
+                aggregated.append(KinesisBuffer.packRecords(packed))
+                packed = []
+                packedSize = 0
+
+            packed.append(record)
+            packedSize += recSize + 2
+
+        if packed:
+            aggregated.append(KinesisBuffer.packRecords(packed))
+
+        return aggregated
+
+    @staticmethod
+    def packRecords(packed):
+        if len(packed) == 1:
+            return packed[0]
+
+        # The records are already serialized, so are joined as strings
+        return (
+            '{{"status": 200, "type": "aggregate", "records": [{}]}}'.format(
+                ', '.join(data for data, _ in packed)
+            ),
+            packed[0][1]
+        )
+
+    @staticmethod
+    def chunkRecords(records):
+        chunk = []
+        chunkSize = 0
+
+        for record in records:
+            recSize = KinesisBuffer.recordSize(record)
+            if chunk and (
+                chunkSize + recSize > KinesisBuffer.MAX_BYTES
+                or len(chunk) >= KinesisBuffer.MAX_RECORDS
+            ):
+                yield chunk
+                chunk = []
+                chunkSize = 0
+
+            chunk.append(record)
+            chunkSize += recSize
+
+        if chunk:
+            yield chunk
+
+    def putChunk(self, stream, chunk):
+        """Send a chunk of records, resending those that fail until none
+        remain or the retry limit is reached. Errors for the entire request
+        are retried by the client, so these records are returned as failed.
+        """
+        pending = chunk
+
+        for attempt in range(self.maxRetries + 1):
+            if attempt:
+                logger.info('Retrying {} records for {}'.format(
+                    len(pending), stream
+                ))
+                time.sleep(min(
+                    KinesisBuffer.MAX_BACKOFF,
+                    self.backoff * 2 ** (attempt - 1)
+                ))
+
+            try:
+                resp = self.client.put_records(
+                    Records=[
+                        {'Data': data, 'PartitionKey': partKey}
+                        for data, partKey in pending
+                    ],
+                    StreamName=stream
+                )
+            except Exception as err:
+                logger.error('Kinesis Write error!')
+                logger.debug(err)
+                return pending
+
+            if not resp.get('FailedRecordCount', 0):
+                return []
+
+            pending = [
+                record for record, result in zip(pending, resp['Records'])
+                if 'ErrorCode' in result
+            ]
+
+        logger.error('Failed to write {} records to {}'.format(
+            len(pending), stream
+        ))
+        return pending
+
+    @staticmethod
+    def recordSize(record):
+        return (
+            KinesisBuffer.byteLength(record[0])
+            + KinesisBuffer.byteLength(record[1])
+        )
+
+    @staticmethod
+    def byteLength(value):
+        if isinstance(value, bytes):
+            return len(value)
+
+        return len(str(value).encode('utf-8'))
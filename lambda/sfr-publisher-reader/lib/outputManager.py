@@ -3,6 +3,7 @@ import json
 from helpers.errorHelpers import OutputError
 from helpers.logHelpers import createLog
 from helpers.clientHelpers import createAWSClient
+from .kinesisBuffer import KinesisBuffer
 
 logger = createLog('output_write')
 
@@ -14,6 +15,7 @@ class OutputManager():
     SQS: For queuing and processing by the ElasticSearch manager"""
 
     KINESIS_CLIENT = createAWSClient('kinesis')
+    KINESIS_BUFFER = KinesisBuffer(KINESIS_CLIENT)
 
     def __init__(self):
         pass
@@ -28,16 +30,9 @@ class OutputManager():
         process."""
 
         logger.info('Writing results to Kinesis')
-        outputObject = {
-            'status': 200,
-            'data': data,
-            'type': recType
-        }
-
-        # The default lambda function here converts all objects into dicts
-        kinesisStream = OutputManager._convertToJSON(outputObject)
-
-        partKey = OutputManager._createPartitionKey(data)
+        kinesisStream, partKey = OutputManager._createKinesisRecord(
+            data, recType
+        )
 
         try:
             cls.KINESIS_CLIENT.put_record(
@@ -50,6 +45,51 @@ class OutputManager():
             logger.error('Kinesis Write error!')
             raise OutputError('Failed to write result to output stream!')
 
+    @classmethod
+    def bufferKinesis(cls, data, stream, recType='work'):
+        """Adds a record to a buffer, from which records are written to a
+        Kinesis stream in batches of up to 500. This is written when full, or
+        by flushKinesis, which must be called once all records have been
+        added. Raises an error if any buffered records could not be written.
+        """
+        kinesisStream, partKey = OutputManager._createKinesisRecord(
+            data, recType
+        )
+
+        failed = cls.KINESIS_BUFFER.add(stream, kinesisStream, partKey)
+        OutputManager._checkBufferFailures(failed)
+
+    @classmethod
+    def flushKinesis(cls):
+        """Writes any records remaining in the Kinesis buffer"""
+        logger.info('Writing buffered results to Kinesis')
+        OutputManager._checkBufferFailures(cls.KINESIS_BUFFER.flush())
+
+    @staticmethod
+    def _checkBufferFailures(failed):
+        if failed:
+            logger.error('Kinesis Write error!')
+            raise OutputError(
+                'Failed to write {} results to output stream!'.format(
+                    len(failed)
+                )
+            )
+
+    @staticmethod
+    def _createKinesisRecord(data, recType):
+        outputObject = {
+            'status': 200,
+            'data': data,
+            'type': recType
+        }
+
+        # The default lambda function here converts all objects into dicts
+        kinesisStream = OutputManager._convertToJSON(outputObject)
+
+        partKey = OutputManager._createPartitionKey(data)
+
+        return kinesisStream, partKey
+
     @staticmethod
     def _convertToJSON(obj):
         """Converts an object or dict to a JSON string.
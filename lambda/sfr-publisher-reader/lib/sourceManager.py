@@ -43,15 +43,18 @@ class SourceManager:
 
     def sendWorksToKinesis(self):
         """Takes the manager's list of work objects and sends them to the
-        ingest Kinesis stream, which will place them in the database.
+        ingest Kinesis stream, which will place them in the database. These
+        are written in batches, rather than one request per work.
         """
         kinesisStream = os.environ['KINESIS_INGEST_STREAM']
         for work in self.works:
             logger.info('Placing work {} in ingest stream'.format(
                 work 
             ))
-            self.output.putKinesis(
+            self.output.bufferKinesis(
                 vars(work),
                 kinesisStream,
                 recType='work'
             )
+
+        self.output.flushKinesis()
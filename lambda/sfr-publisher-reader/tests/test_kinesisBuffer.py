@@ -0,0 +1,127 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from lib.kinesisBuffer import KinesisBuffer
+
+
+class StubKinesisClient:
+    """Accepts put_records calls, failing each record the number of times
+    given by the "fail" value of its data"""
+    def __init__(self):
+        self.calls = []
+        self.attempts = {}
+
+    def put_records(self, Records, StreamName):
+        self.calls.append(Records)
+        results = []
+        for rec in Records:
+            attempt = self.attempts.get(rec['PartitionKey'], 0)
+            self.attempts[rec['PartitionKey']] = attempt + 1
+            if attempt < json.loads(rec['Data']).get('fail', 0):
+                results.append({
+                    'ErrorCode': 'ProvisionedThroughputExceededException'
+                })
+            else:
+                results.append({'SequenceNumber': '1', 'ShardId': '1'})
+
+        return {
+            'FailedRecordCount': len([r for r in results if 'ErrorCode' in r]),
+            'Records': results
+        }
+
+
+class TestKinesisBuffer:
+    @pytest.fixture
+    def stub(self):
+        return StubKinesisClient()
+
+    @pytest.fixture
+    def mockSleep(self, mocker):
+        return mocker.patch('lib.kinesisBuffer.time.sleep')
+
+    def test_add_auto_flush(self, stub):
+        testBuffer = KinesisBuffer(stub)
+        for i in range(501):
+            testBuffer.add('testStream', '{}', str(i))
+
+        assert [len(call) for call in stub.calls] == [500]
+        assert len(testBuffer.records['testStream']) == 1
+
+    def test_add_no_flush(self, stub):
+        testBuffer = KinesisBuffer(stub, autoFlush=False)
+        for i in range(600):
+            assert testBuffer.add('testStream', '{}', str(i)) == []
+
+        assert stub.calls == []
+
+    def test_flush_chunks(self, stub, mockSleep):
+        testBuffer = KinesisBuffer(stub, autoFlush=False)
+        for i in range(1201):
+            testBuffer.add('testStream', '{}', str(i))
+
+        assert testBuffer.flush() == []
+        assert [len(call) for call in stub.calls] == [500, 500, 201]
+        assert testBuffer.records == {}
+        mockSleep.assert_not_called()
+
+    def test_chunkRecords_bytes(self):
+        records = [('0' * 1048000, str(i)) for i in range(6)]
+        chunks = list(KinesisBuffer.chunkRecords(records))
+        assert [len(chunk) for chunk in chunks] == [5, 1]
+
+    def test_flush_retry_failed(self, stub, mockSleep):
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.add('testStream', '{}', '1')
+        testBuffer.add('testStream', '{"fail": 2}', '2')
+
+        assert testBuffer.flush() == []
+        assert len(stub.calls) == 3
+        assert stub.calls[2] == [{'Data': '{"fail": 2}', 'PartitionKey': '2'}]
+        assert mockSleep.call_args[0][0] == 0.2
+
+    def test_flush_retries_exhausted(self, stub, mockSleep):
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.maxRetries = 2
+        testBuffer.add('testStream', '{"fail": 5}', '1')
+
+        assert testBuffer.flush() == [('{"fail": 5}', '1')]
+        assert len(stub.calls) == 3
+
+    def test_flush_request_error(self):
+        mockClient = MagicMock()
+        mockClient.put_records.side_effect = Exception('test')
+        testBuffer = KinesisBuffer(mockClient)
+        testBuffer.add('testStream', '{}', '1')
+
+        assert testBuffer.flush() == [('{}', '1')]
+        assert testBuffer.records == {}
+
+    def test_flush_oversized(self, stub):
+        testBuffer = KinesisBuffer(stub)
+        testBuffer.add('testStream', '0' * 1048576, '1')
+        testBuffer.add('testStream', '{}', '2')
+
+        assert testBuffer.flush() == [('0' * 1048576, '1')]
+        assert stub.calls == [[{'Data': '{}', 'PartitionKey': '2'}]]
+
+    def test_flush_aggregate(self, stub, monkeypatch):
+        monkeypatch.setenv('KINESIS_AGGREGATE', 'true')
+        monkeypatch.setenv('KINESIS_AGGREGATE_BYTES', '60')
+        testBuffer = KinesisBuffer(stub)
+        testRecords = [
+            '{"data": "%s"}' % i for i in range(5)
+        ] + ['{"data": "%s"}' % ('x' * 60)]
+        for i, record in enumerate(testRecords):
+            testBuffer.add('testStream', record, str(i))
+
+        testBuffer.flush()
+
+        sent = stub.calls[0]
+        assert len(sent) == 3
+        firstAgg = json.loads(sent[0]['Data'])
+        assert firstAgg['type'] == 'aggregate'
+        assert firstAgg['records'] == [{'data': str(i)} for i in range(4)]
+        assert sent[0]['PartitionKey'] == '0'
+        assert sent[1]['Data'] == testRecords[5]
+        assert json.loads(sent[2]['Data']) == {'data': '4'}
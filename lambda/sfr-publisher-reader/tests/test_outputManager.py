@@ -7,6 +7,7 @@ from lib.outputManager import OutputManager
 
 class MockOutputManager(OutputManager):
     KINESIS_CLIENT = MagicMock()
+    KINESIS_BUFFER = MagicMock()
 
 
 class MockOutObject:
@@ -42,6 +43,26 @@ class TestOutputManager:
         with pytest.raises(OutputError):
             testManager.putKinesis('data', 'test-stream', recType='testing')
 
+    def test_bufferKinesis(self, testManager, mocker):
+        mocker.patch.object(
+            OutputManager, '_convertToJSON', return_value='stream'
+        )
+        mocker.patch.object(
+            OutputManager, '_createPartitionKey', return_value=1
+        )
+        testManager.KINESIS_BUFFER.add.return_value = []
+        testManager.bufferKinesis('data', 'test-stream', recType='testing')
+        testManager.KINESIS_BUFFER.add.assert_called_once_with(
+            'test-stream', 'stream', 1
+        )
+        testManager.KINESIS_BUFFER.add.reset_mock()
+
+    def test_flushKinesis_failure(self, testManager):
+        testManager.KINESIS_BUFFER.flush.return_value = [('stream', 1)]
+        with pytest.raises(OutputError):
+            testManager.flushKinesis()
+        testManager.KINESIS_BUFFER.flush.return_value = []
+
     def test_convertToJSON_object(self):
         testObj = MockOutObject(field1='testing', field2='again')
 
@@ -60,6 +60,11 @@ class TestManager:
     def test_sendWorksToKinesis(self, testManager):
         mockWork = MagicMock()
         testManager.works = [mockWork]
-        with patch.object(OutputManager, 'putKinesis') as mockPut:
+        with patch.multiple(
+            OutputManager, bufferKinesis=DEFAULT, flushKinesis=DEFAULT
+        ) as mocks:
             testManager.sendWorksToKinesis()
-            mockPut.assert_called_with(vars(mockWork), 'testStream', recType='work')
+            mocks['bufferKinesis'].assert_called_with(
+                vars(mockWork), 'testStream', recType='work'
+            )
+            mocks['flushKinesis'].assert_called_once()